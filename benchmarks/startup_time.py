@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure how long each dls-* entry point takes to import, with
+python -X importtime, and fail if any takes longer than a budget.
+
+Run from the top of the repository:
+
+    python3 benchmarks/startup_time.py [--budget MS] [--repeat N]
+
+The import time of an entry point is the cumulative time python reports for
+its module, the best of --repeat runs. Requires Python 3.7 or later.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 'dls-list-releases.py = dls_ade.dls_list_releases:main' in setup.py
+ENTRY_POINT_RE = re.compile(r"'([\w.-]+)\s*=\s*([\w.]+):\w+'")
+# import time:       self [us] |  cumulative | imported package
+IMPORT_TIME_RE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+DEFAULT_BUDGET_MS = 300
+
+
+def entry_points(setup_path=os.path.join(TOP, "setup.py")):
+    """Return (script, module) for each console script in setup.py."""
+    with open(setup_path) as f:
+        return ENTRY_POINT_RE.findall(f.read())
+
+
+def import_times(module):
+    """Import a module in a new interpreter and return the cumulative import
+    time of every module it imported, in microseconds, by name."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [TOP] + [p for p in [env.get("PYTHONPATH")] if p])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    if result.returncode != 0:
+        raise RuntimeError("Importing {} failed:\n{}".format(
+            module, result.stderr))
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def measure(module, repeat, startup=()):
+    """Return the best cumulative import time of a module over several runs,
+    in milliseconds, and the slowest modules it imported in that run, other
+    than those imported when the interpreter starts."""
+    best = None
+    for _ in range(repeat):
+        times = import_times(module)
+        if best is None or times[module] < best[module]:
+            best = times
+    slowest = sorted(((t, name) for name, t in best.items()
+                      if not name.startswith("dls_ade") and
+                      name not in startup), reverse=True)
+    return best[module] / 1000.0, [name for _, name in slowest[:3]]
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum import time of an entry point in ms, "
+                             "default %(default)s")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs for each entry point, "
+                             "default %(default)s")
+    return parser
+
+
+def main():
+    args = make_parser().parse_args()
+    over_budget = []
+    startup = set(import_times("sys"))
+    print("{:<34} {:>9}  {}".format("Entry point", "Time/ms", "Slowest"))
+    for script, module in entry_points():
+        time_ms, slowest = measure(module, args.repeat, startup)
+        flag = " OVER BUDGET" if time_ms > args.budget else ""
+        print("{:<34} {:>9.1f}  {}{}".format(script, time_ms,
+                                             ", ".join(slowest), flag))
+        if flag:
+            over_budget.append(script)
+    if over_budget:
+        print("{} entry points took longer than {} ms to import".format(
+            len(over_budget), args.budget))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compare the startup time of a dls-* script run from the zipapp built by
+tools/build_zipapp.py with the same script from the egg install.
+
+    python3 benchmarks/zipapp_startup.py --zipapp DIR --egg DIR
+        [--egg-path PATH] [--script NAME] [--repeat N] [--drop-caches]
+
+--zipapp and --egg are the bin directories of the two installs, e.g.
+zipapp/bin and prefix/bin after make install. --egg-path is added to the
+PYTHONPATH of the egg scripts, e.g. prefix/lib/python2.7/site-packages.
+
+The cold time is the first run of each script. For a true cold start run as
+root with --drop-caches, which empties the page, dentry and inode caches
+before it; over NFS the client caches are dropped but the server's are not.
+The warm time is the median of --repeat runs after it.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+DEFAULT_SCRIPT = "dls-list-modules.py"
+DEFAULT_ARGS = ["--help"]
+
+
+def drop_caches():
+    """Empty the page, dentry and inode caches. Needs root."""
+    subprocess.check_call(["sync"])
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def run_time(command, env):
+    """Run a command and return how long it took, in milliseconds."""
+    start = time.time()
+    subprocess.check_call(command, env=env, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+    return (time.time() - start) * 1000.0
+
+
+def measure(command, env, repeat, cold_caches):
+    """Return the cold time and median warm time of a command, in ms."""
+    if cold_caches:
+        drop_caches()
+    cold = run_time(command, env)
+    warm = sorted(run_time(command, env) for _ in range(repeat))
+    return cold, warm[len(warm) // 2]
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument("--zipapp", required=True,
+                        help="bin directory of the zipapp build")
+    parser.add_argument("--egg", required=True,
+                        help="bin directory of the egg install")
+    parser.add_argument("--egg-path",
+                        help="Directory to add to PYTHONPATH for the egg "
+                             "install")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT,
+                        help="Script to run, default %(default)s")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Number of warm runs, default %(default)s")
+    parser.add_argument("--drop-caches", action="store_true",
+                        help="Drop the kernel caches before each cold run "
+                             "(needs root)")
+    parser.add_argument("args", nargs="*", default=DEFAULT_ARGS,
+                        help="Arguments of the script, default "
+                             "%(default)s")
+    return parser
+
+
+def main():
+    args = make_parser().parse_args()
+    runs = []
+    for name, bin_dir, path in (("egg", args.egg, args.egg_path),
+                                ("zipapp", args.zipapp, None)):
+        env = dict(os.environ)
+        if path:
+            env["PYTHONPATH"] = os.pathsep.join(
+                [path] + [p for p in [env.get("PYTHONPATH")] if p])
+        command = [os.path.join(bin_dir, args.script)] + args.args
+        runs.append((name,) + measure(command, env, args.repeat,
+                                      args.drop_caches))
+
+    print("{} {}".format(args.script, " ".join(args.args)))
+    print("{:<8} {:>10} {:>10}".format("Install", "Cold/ms", "Warm/ms"))
+    for name, cold, warm in runs:
+        print("{:<8} {:>10.1f} {:>10.1f}".format(name, cold, warm))
+    (_, egg_cold, egg_warm), (_, zip_cold, zip_warm) = runs
+    print("Zipapp speed up: {:.1f}x cold, {:.1f}x warm".format(
+        egg_cold / zip_cold, egg_warm / zip_warm))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,44 @@
 import sys
+import importlib
+
+# Directory of the data files of dls_ade (module_templates, dlsbuild_scripts),
+# or None for the package directory. Set by the zipapp launchers, as files
+# cannot be read from inside the zip.
+DATA_DIR = None
+
+
+class LazyModule(object):
+    """Stand-in for a module that is imported when one of its attributes is
+    first used. Used for the libraries that are slow to import and that most
+    dls-* scripts never need, e.g. gitlab and ldap.
+
+    Attributes can be set on the stand-in, e.g. by mock.patch, and then take
+    precedence over the module's own.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_lazy_module_name"] = name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._lazy_module_name)
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return "<lazily imported module {!r}>".format(self._lazy_module_name)
+
+
+def lazy_import(name):
+    """Return a module that is only imported when it is first used.
+
+    Args:
+        name(str): Absolute name of the module, e.g. gitlab
+
+    Returns:
+        :class:`LazyModule`: Stand-in for the module, or the module itself if
+            it has been imported already
+
+    """
+    return sys.modules.get(name) or LazyModule(name)
 
 
 def bytes_to_string(bytes_obj):
@@ -1,5 +1,6 @@
 from argparse import ArgumentParser
 from dls_ade import dls_environment
+from dls_ade import profiling
 env = dls_environment.environment()
 
 areas = ["support", "ioc", "matlab", "python", "python3", "python3ext" , "etc", "tools", "epics"]
@@ -7,7 +8,7 @@ areas = ["support", "ioc", "matlab", "python", "python3", "python3ext" , "etc",
 
 class ArgParser(ArgumentParser):
     """
-    Makes a custom parser class with area arguments by default.
+    Makes a custom parser class with area and --profile arguments by default.
 
     """
     def __init__(self, usage_v, supported_areas=None):
@@ -36,6 +37,8 @@ class ArgParser(ArgumentParser):
                 help="Set 'python3' area"
             )
 
+        profiling.add_profile_arg(self)
+
     def parse_args(self, args=None, namespace=None):
         """
         Parses shortcut flags for setting area; support by default, python if -p, ioc if -i.
@@ -0,0 +1,381 @@
+"""
+Creation of EPICS application skeletons in the way makeBaseApp.pl does, without
+starting Perl or needing an EPICS installation beyond the template files.
+
+makeBaseApp templates are directories of the form::
+
+    <top>/<type>App/...             copied to <app name>App/
+    <top>/<type>Boot/...            copied to iocBoot/
+    <top>/<type>Boot/ioc/...        copied to iocBoot/ioc<ioc name>/
+    <top>/Makefile, <top>/configure copied once, if there is no configure/
+
+where <top> is the first of:
+
+    * $EPICS_MBA_TEMPLATE_TOP, as for makeBaseApp.pl
+    * $EPICS_BASE/templates/makeBaseApp/top, with EPICS_BASE defaulting to
+      the base of the current EPICS version
+    * the template cache, $DLS_ADE_MBA_TEMPLATE_CACHE or makeBaseApp in the
+      dls_ade cache directory
+
+that has the requested type. Names and contents have the same _APPNAME_,
+_IOC_, _USER_ etc. placeholders replaced as by makeBaseApp.pl. As for
+makeBaseApp.pl, CVS and .svn directories are not copied. Templates with a
+Replace.pl script are left to makeBaseApp.pl, which runs it.
+
+No templates are shipped with dls_ade. The first time the dls and dlsBL
+templates are found in an EPICS installation they are copied to the template
+cache, which is then used where there is no EPICS, e.g. in a CI container
+given a copy of the cache. Making the etc folder of a support module still
+needs dls-make-etc-dir.py.
+"""
+
+import os
+import re
+import stat
+import shutil
+import getpass
+import logging
+import tempfile
+
+from dls_ade import local_store
+from dls_ade.dls_environment import environment
+
+log = logging.getLogger(__name__)
+
+BOOT_FOLDER = "iocBoot"
+DEFAULT_ARCH = "linux-x86_64"
+# Script of extra replacements, run by makeBaseApp.pl
+REPLACE_SCRIPT = "Replace.pl"
+# Template files and directories that makeBaseApp.pl does not copy
+SKIPPED_NAMES = ("CVS", ".svn", REPLACE_SCRIPT)
+
+# Override with DLS_ADE_MBA_TEMPLATE_CACHE, e.g. to use a copy of the cache
+# made on a machine with EPICS
+TEMPLATE_CACHE = os.getenv("DLS_ADE_MBA_TEMPLATE_CACHE",
+                           os.path.join(local_store.CACHE_DIR, "makeBaseApp"))
+# Application types copied to the template cache
+CACHED_TYPES = ("dls", "dlsBL")
+
+# Template folder to (signature, files), so that templates are only read
+# again when they change
+_template_cache = {}
+
+
+def epics_base():
+    """Return the EPICS base directory, from $EPICS_BASE or the current EPICS
+    version."""
+    return os.environ.get("EPICS_BASE",
+                          os.path.join(environment().epicsDir(), "base"))
+
+
+def template_tops():
+    """Return the directories searched for makeBaseApp templates, in order.
+    """
+    tops = []
+    if os.environ.get("EPICS_MBA_TEMPLATE_TOP"):
+        tops.append(os.environ["EPICS_MBA_TEMPLATE_TOP"])
+    tops.append(os.path.join(epics_base(), "templates", "makeBaseApp", "top"))
+    tops.append(TEMPLATE_CACHE)
+    return tops
+
+
+def _copy_folder(source, destination):
+    """Copy a template folder with its file modes, so that it appears
+    complete or not at all to other processes using the cache."""
+    parent = os.path.dirname(destination)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    staging = tempfile.mkdtemp(dir=parent)
+    try:
+        copy = os.path.join(staging, os.path.basename(destination))
+        if os.path.isdir(source):
+            shutil.copytree(source, copy,
+                            ignore=shutil.ignore_patterns("CVS", ".svn"))
+        else:
+            shutil.copy2(source, copy)
+        try:
+            os.rename(copy, destination)
+        except OSError:
+            # Copied by another process in the meantime
+            if not os.path.exists(destination):
+                raise
+    finally:
+        shutil.rmtree(staging)
+
+
+def cache_templates(top, cache=None, app_types=CACHED_TYPES):
+    """
+    Copy makeBaseApp templates to the template cache, for machines without
+    EPICS.
+
+    Only application types missing from the cache are copied, so the cache
+    is a snapshot of the templates. Remove it to take a new one.
+
+    Args:
+        top(str): Template directory
+        cache(str): Cache directory, defaults to :data:`TEMPLATE_CACHE`
+        app_types(tuple of str): Application types to copy
+
+    Returns:
+        list of str: Application types copied
+
+    """
+    cache = cache or TEMPLATE_CACHE
+    copied = []
+    for app_type in app_types:
+        if (not os.path.isdir(os.path.join(top, app_type + "App")) or
+                os.path.isdir(os.path.join(cache, app_type + "App"))):
+            continue
+        # The App folder goes last as it marks the type as cached
+        for name in ("Makefile", "configure", app_type + "Boot",
+                     app_type + "App"):
+            source = os.path.join(top, name)
+            destination = os.path.join(cache, name)
+            if os.path.exists(source) and not os.path.exists(destination):
+                _copy_folder(source, destination)
+        copied.append(app_type)
+    if copied:
+        log.info("Copied %s templates from %s to %s", ", ".join(copied), top,
+                 cache)
+    return copied
+
+
+def find_template_top(app_type, ioc=False):
+    """
+    Find the template directory that has an application type.
+
+    Args:
+        app_type(str): Application type, e.g. dls
+        ioc(bool): Whether the IOC boot template is needed as well
+
+    Returns:
+        str: Template directory, or None if no directory has the type or
+            its templates have a Replace.pl script
+
+    """
+    for top in template_tops():
+        folders = [os.path.join(top, app_type + "App")]
+        if ioc:
+            folders.append(os.path.join(top, app_type + "Boot"))
+        if not all(os.path.isdir(folder) for folder in folders):
+            continue
+        if any(os.path.isfile(os.path.join(folder, REPLACE_SCRIPT))
+               for folder in folders):
+            log.debug("%s templates in %s have a %s script", app_type, top,
+                      REPLACE_SCRIPT)
+            return None
+        if os.path.abspath(top) != os.path.abspath(TEMPLATE_CACHE):
+            try:
+                cache_templates(top)
+            except (OSError, IOError, shutil.Error) as e:
+                log.warning("Could not copy templates to %s: %s",
+                            TEMPLATE_CACHE, e)
+        return top
+    return None
+
+
+def _read_templates(folder):
+    """Return the relative path, contents and permission bits of each file
+    under a folder, reading them only if the folder has changed since it was
+    last read."""
+    paths = []
+    for dir_path, dir_names, files in os.walk(folder):
+        dir_names[:] = [d for d in dir_names if d not in SKIPPED_NAMES]
+        for file_name in sorted(files):
+            if file_name not in SKIPPED_NAMES:
+                paths.append(os.path.join(dir_path, file_name))
+    signature = []
+    for path in paths:
+        status = os.stat(path)
+        signature.append((path, status.st_mtime, status.st_size,
+                          stat.S_IMODE(status.st_mode)))
+
+    cached = _template_cache.get(folder)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    files = []
+    for path, _, _, mode in signature:
+        with open(path, "r") as f:
+            files.append((os.path.relpath(path, folder), f.read(), mode))
+    _template_cache[folder] = (signature, files)
+    return files
+
+
+def substitutions(top, app_type, app_name, ioc_name=None, user=None,
+                  arch=None):
+    """
+    Return the placeholders of makeBaseApp templates and their values.
+
+    Args:
+        top(str): Template directory
+        app_type(str): Application type, e.g. dls
+        app_name(str): Application name
+        ioc_name(str): IOC name, defaults to app_name
+        user(str): User name, defaults to the current user
+        arch(str): Architecture, defaults to $EPICS_HOST_ARCH
+
+    Returns:
+        list of tuple(str, str): Placeholder and value, in the order
+            makeBaseApp.pl replaces them
+
+    """
+    return [
+        ("_USER_", user or getpass.getuser()),
+        ("_EPICS_BASE_", epics_base()),
+        ("_ARCH_", arch or os.environ.get("EPICS_HOST_ARCH", DEFAULT_ARCH)),
+        ("_APPNAME_", app_name),
+        ("_CSAFEAPPNAME_", re.sub(r"\W", "_", app_name)),
+        ("_APPTYPE_", app_type),
+        ("_TEMPLATE_TOP_", top),
+        ("_IOC_", ioc_name or app_name),
+    ]
+
+
+def replace_placeholders(text, replacements):
+    """
+    Replace placeholders in template text as makeBaseApp.pl does: the first
+    occurrence of each placeholder on each line.
+
+    Args:
+        text(str): Template text
+        replacements(list of tuple(str, str)): From :func:`substitutions`
+
+    Returns:
+        str: Text with placeholders replaced
+
+    """
+    if "_" not in text:
+        return text
+    lines = text.splitlines(True)
+    for i, line in enumerate(lines):
+        for placeholder, value in replacements:
+            line = line.replace(placeholder, value, 1)
+        lines[i] = line
+    return "".join(lines)
+
+
+def _copy_templates(folder, destination, replacements, skip=()):
+    """Write the templates under folder to destination, replacing
+    placeholders in names and contents and keeping their permission bits, as
+    makeBaseApp.pl does. Existing files are not changed.
+
+    Returns:
+        list of str: Paths of the files written
+    """
+    written = []
+    for rel_path, contents, mode in _read_templates(folder):
+        if rel_path.split(os.sep)[0] in skip:
+            continue
+        path = os.path.join(destination,
+                            replace_placeholders(rel_path, replacements))
+        if os.path.exists(path):
+            log.debug("%s exists, not modified", path)
+            continue
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.isdir(dir_path):
+            os.makedirs(dir_path)
+        with open(path, "w") as f:
+            f.write(replace_placeholders(contents, replacements))
+        os.chmod(path, mode)
+        written.append(path)
+    return written
+
+
+def make_top(top, replacements, path="."):
+    """
+    Create the top level Makefile and configure directory of an EPICS
+    module, if it does not have a configure directory yet.
+
+    Args:
+        top(str): Template directory
+        replacements(list of tuple(str, str)): From :func:`substitutions`
+        path(str): Module directory
+
+    Returns:
+        list of str: Paths of the files written
+
+    """
+    if os.path.isdir(os.path.join(path, "configure")):
+        return []
+    written = []
+    if os.path.isdir(os.path.join(top, "configure")):
+        written += _copy_templates(os.path.join(top, "configure"),
+                                   os.path.join(path, "configure"),
+                                   replacements)
+    makefile = os.path.join(top, "Makefile")
+    target = os.path.join(path, "Makefile")
+    if os.path.isfile(makefile) and not os.path.exists(target):
+        with open(makefile, "r") as f:
+            contents = f.read()
+        with open(target, "w") as f:
+            f.write(replace_placeholders(contents, replacements))
+        shutil.copymode(makefile, target)
+        written.append(target)
+    return written
+
+
+def make_app(app_type, app_name, top=None, path=".", user=None):
+    """
+    Create an application, like makeBaseApp.pl -t <app_type> <app_name>.
+
+    Args:
+        app_type(str): Application type, e.g. dls
+        app_name(str): Application name
+        top(str): Template directory, see :func:`find_template_top`
+        path(str): Module directory
+        user(str): User name for the templates
+
+    Returns:
+        list of str: Paths of the files written
+
+    Raises:
+        :class:`exceptions.ValueError`: If there is no template for app_type
+
+    """
+    top = top or find_template_top(app_type)
+    if top is None:
+        raise ValueError("No makeBaseApp template for " + app_type)
+    replacements = substitutions(top, app_type, app_name, user=user)
+    written = make_top(top, replacements, path)
+    written += _copy_templates(os.path.join(top, app_type + "App"),
+                               os.path.join(path, app_name + "App"),
+                               replacements)
+    return written
+
+
+def make_ioc_boot(app_type, ioc_name, app_name=None, top=None, path=".",
+                  user=None):
+    """
+    Create the boot directory of an IOC, like
+    makeBaseApp.pl -i -t <app_type> <ioc_name>.
+
+    Args:
+        app_type(str): Application type, e.g. dls
+        ioc_name(str): IOC name
+        app_name(str): Application the IOC runs, defaults to ioc_name
+        top(str): Template directory, see :func:`find_template_top`
+        path(str): Module directory
+        user(str): User name for the templates
+
+    Returns:
+        list of str: Paths of the files written
+
+    Raises:
+        :class:`exceptions.ValueError`: If there is no IOC template for \
+            app_type
+
+    """
+    top = top or find_template_top(app_type, ioc=True)
+    if top is None:
+        raise ValueError("No makeBaseApp IOC template for " + app_type)
+    replacements = substitutions(top, app_type, app_name or ioc_name,
+                                 ioc_name=ioc_name, user=user)
+    boot = os.path.join(top, app_type + "Boot")
+    boot_path = os.path.join(path, BOOT_FOLDER)
+    written = _copy_templates(boot, boot_path, replacements, skip=("ioc",))
+    if os.path.isdir(os.path.join(boot, "ioc")):
+        written += _copy_templates(os.path.join(boot, "ioc"),
+                                   os.path.join(boot_path, "ioc" + ioc_name),
+                                   replacements)
+    return written
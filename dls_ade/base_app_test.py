@@ -0,0 +1,147 @@
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from dls_ade import base_app
+
+
+class MakeAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.addCleanup(base_app._template_cache.clear)
+        self.top = os.path.join(self.root, "top")
+        self.module = os.path.join(self.root, "module")
+        os.makedirs(self.module)
+        self.write(self.top, "Makefile", "TOP = .\n")
+        self.write(self.top, "configure/RELEASE",
+                   "TEMPLATE_TOP=_TEMPLATE_TOP_\nEPICS_BASE=_EPICS_BASE_\n")
+        self.write(self.top, "dlsApp/src/Makefile",
+                   "PROD_IOC = _APPNAME_ _APPNAME_\n# by _USER_\n")
+        self.write(self.top, "dlsApp/src/_APPNAME_Main.cpp", "int main;\n")
+        self.write(self.top, "dlsBoot/Makefile", "DIRS += $(wildcard ioc*)\n")
+        self.write(self.top, "dlsBoot/ioc/st.cmd", "< envPaths _IOC_\n")
+        patch_env = patch.dict(os.environ, {
+            "EPICS_MBA_TEMPLATE_TOP": self.top,
+            "EPICS_BASE": "/epics/base"})
+        patch_env.start()
+        self.addCleanup(patch_env.stop)
+        self.cache = os.path.join(self.root, "cache")
+        patch_cache = patch.object(base_app, "TEMPLATE_CACHE", self.cache)
+        patch_cache.start()
+        self.addCleanup(patch_cache.stop)
+
+    def write(self, folder, path, contents):
+        path = os.path.join(folder, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(contents)
+
+    def read(self, path):
+        with open(os.path.join(self.module, path)) as f:
+            return f.read()
+
+    def test_find_template_top_uses_environment(self):
+        self.assertEqual(base_app.find_template_top("dls", ioc=True),
+                         self.top)
+        self.assertIsNone(base_app.find_template_top("missing"))
+
+    def test_given_templates_found_then_copied_to_cache_once(self):
+        os.chmod(os.path.join(self.top, "dlsBoot", "ioc", "st.cmd"), 0o755)
+
+        base_app.find_template_top("dls")
+
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.cache, "dlsApp", "src", "_APPNAME_Main.cpp")))
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.cache, "configure", "RELEASE")))
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.join(
+            self.cache, "dlsBoot", "ioc", "st.cmd")).st_mode), 0o755)
+        self.assertEqual(base_app.cache_templates(self.top), [])
+
+    def test_given_no_epics_then_cached_templates_used(self):
+        base_app.find_template_top("dls")
+        shutil.rmtree(self.top)
+
+        with patch.dict(os.environ, {"EPICS_MBA_TEMPLATE_TOP": "",
+                                     "EPICS_BASE": self.top}):
+            self.assertEqual(base_app.find_template_top("dls", ioc=True),
+                             self.cache)
+            base_app.make_ioc_boot("dls", "example", path=self.module)
+
+        self.assertEqual(self.read("iocBoot/iocexample/st.cmd"),
+                         "< envPaths example\n")
+
+    def test_app_created_with_placeholders_replaced_once_per_line(self):
+        base_app.make_app("dls", "example", path=self.module, user="abc123")
+
+        self.assertEqual(self.read("exampleApp/src/Makefile"),
+                         "PROD_IOC = example _APPNAME_\n# by abc123\n")
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.module, "exampleApp/src/exampleMain.cpp")))
+        self.assertEqual(self.read("configure/RELEASE"),
+                         "TEMPLATE_TOP={}\nEPICS_BASE=/epics/base\n".format(
+                             self.top))
+        self.assertEqual(self.read("Makefile"), "TOP = .\n")
+
+    def test_existing_files_and_configure_not_changed(self):
+        self.write(self.module, "configure/RELEASE", "Existing\n")
+        self.write(self.module, "exampleApp/src/Makefile", "Existing\n")
+
+        written = base_app.make_app("dls", "example", path=self.module)
+
+        self.assertEqual(written, [os.path.join(
+            self.module, "exampleApp", "src", "exampleMain.cpp")])
+        self.assertEqual(self.read("exampleApp/src/Makefile"), "Existing\n")
+        self.assertFalse(os.path.exists(os.path.join(self.module, "Makefile")))
+
+    def test_ioc_boot_created(self):
+        base_app.make_ioc_boot("dls", "example", path=self.module)
+
+        self.assertEqual(self.read("iocBoot/Makefile"),
+                         "DIRS += $(wildcard ioc*)\n")
+        self.assertEqual(self.read("iocBoot/iocexample/st.cmd"),
+                         "< envPaths example\n")
+
+    def test_given_executable_template_then_written_executable(self):
+        os.chmod(os.path.join(self.top, "dlsBoot", "ioc", "st.cmd"), 0o755)
+
+        base_app.make_ioc_boot("dls", "example", path=self.module)
+
+        boot = os.path.join(self.module, "iocBoot")
+        st_cmd = os.stat(os.path.join(boot, "iocexample", "st.cmd"))
+        makefile = os.stat(os.path.join(boot, "Makefile"))
+        self.assertEqual(stat.S_IMODE(st_cmd.st_mode), 0o755)
+        self.assertFalse(makefile.st_mode & stat.S_IXUSR)
+
+    def test_given_cvs_and_svn_folders_then_not_copied(self):
+        self.write(self.top, "dlsApp/CVS/Entries", "\n")
+        self.write(self.top, "dlsApp/src/.svn/entries", "\n")
+
+        base_app.make_app("dls", "example", path=self.module)
+
+        self.assertFalse(os.path.exists(
+            os.path.join(self.module, "exampleApp", "CVS")))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.module, "exampleApp", "src", ".svn")))
+
+    def test_given_replace_script_then_template_left_to_make_base_app(self):
+        self.write(self.top, "dlsBoot/Replace.pl", "sub ReplaceLine {}\n")
+
+        self.assertEqual(base_app.find_template_top("dls"), self.top)
+        self.assertIsNone(base_app.find_template_top("dls", ioc=True))
+
+    def test_given_template_unchanged_then_not_read_again(self):
+        base_app.make_app("dls", "first", path=self.module)
+
+        with patch.object(base_app, "open", create=True) as mock_open_file:
+            files = base_app._read_templates(os.path.join(self.top, "dlsApp"))
+
+        self.assertFalse(mock_open_file.called)
+        self.assertEqual(len(files), 2)
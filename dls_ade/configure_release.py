@@ -0,0 +1,128 @@
+"""
+Parsing of EPICS configure/RELEASE files. These define the paths of the
+modules that a module is built against as make macros, e.g.::
+
+    SUPPORT = /dls_sw/prod/R3.14.12.7/support
+    ASYN = $(SUPPORT)/asyn/4-41
+"""
+
+import os
+import re
+from collections import OrderedDict
+
+# NAME = value, also allowing := and +=
+MACRO_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*[:+]?=\s*(.*?)\s*$")
+# $(NAME) or ${NAME}
+REFERENCE_RE = re.compile(r"\$[({]([A-Za-z_][A-Za-z0-9_.]*)[)}]")
+
+# EPICS base directory, e.g. /dls_sw/epics/R3.14.12.7/base
+EPICS_BASE_RE = re.compile(r"/dls_sw/epics/(R\d(?:\.\d+)+)/base")
+
+# Limit on nested macro expansion, in case of recursive definitions
+MAX_EXPANSION_DEPTH = 10
+
+
+def expand_macros(value, macros):
+    """
+    Expand references to macros in a value. Unknown macros are left as they
+    are.
+
+    Args:
+        value(str): Value, e.g. $(SUPPORT)/asyn/4-41
+        macros(dict): Macro name to value
+
+    Returns:
+        str: Expanded value
+
+    """
+    def replace(match):
+        return macros.get(match.group(1), match.group(0))
+
+    for _ in range(MAX_EXPANSION_DEPTH):
+        expanded = REFERENCE_RE.sub(replace, value)
+        if expanded == value:
+            break
+        value = expanded
+    return value
+
+
+def parse_release(text, macros=None):
+    """
+    Parse the contents of a configure/RELEASE file.
+
+    Definitions are expanded as they are read, so a macro can use the macros
+    defined before it. include lines and comments are ignored.
+
+    Args:
+        text(str): File contents
+        macros(dict): Macros defined before the file is read, e.g. by the
+            build system. The file can override them.
+
+    Returns:
+        :class:`collections.OrderedDict`: Macro name to expanded value, for
+            the macros defined in the file, in the order they are defined
+
+    """
+    defined = dict(macros or {})
+    release = OrderedDict()
+    for line in text.splitlines():
+        match = MACRO_RE.match(line.split("#", 1)[0])
+        if match is None:
+            continue
+        name, value = match.groups()
+        value = expand_macros(value, defined)
+        defined[name] = value
+        release[name] = value
+    return release
+
+
+def read_release(path, macros=None):
+    """
+    Read and parse a configure/RELEASE file, see :func:`parse_release`.
+
+    Args:
+        path(str): Path of the file
+        macros(dict): Macros defined before the file is read
+
+    Returns:
+        :class:`collections.OrderedDict`: Macro name to expanded value. Empty
+            if the file cannot be read.
+
+    """
+    try:
+        with open(path, "r") as f:
+            text = f.read()
+    except (IOError, OSError):
+        return OrderedDict()
+    return parse_release(text, macros)
+
+
+def module_references(release, root, depth=1):
+    """
+    Find the module releases under a directory that a RELEASE file refers
+    to.
+
+    Args:
+        release(dict): Parsed RELEASE file, from :func:`parse_release`
+        root(str): Area directory, e.g. /dls_sw/prod/R3.14.12.7/support
+        depth(int): Number of path components in a module name, e.g. 2 for
+            IOCs (BL08J/BL08J-MO-IOC-01)
+
+    Returns:
+        list of tuple(str, str): (module, version) for each reference to a
+            <root>/<module>/<version> directory, or to a path inside one
+
+    """
+    root = os.path.normpath(root) + os.sep
+    references = []
+    for value in release.values():
+        path = os.path.normpath(value)
+        if not path.startswith(root):
+            continue
+        parts = path[len(root):].split(os.sep)
+        if len(parts) <= depth:
+            continue
+        reference = ("/".join(parts[:depth]), parts[depth])
+        if reference not in references:
+            references.append(reference)
+    return references
@@ -0,0 +1,65 @@
+#!/bin/env dls-python
+
+import unittest
+
+from dls_ade import configure_release
+
+
+RELEASE = """
+# Comment line
+SUPPORT=/dls_sw/prod/R3.14.12.7/support
+ASYN = $(SUPPORT)/asyn/4-41   # trailing comment
+MOTOR := ${SUPPORT}/motor/7-0dls5
+BUSY=$(SUPPORT)/busy/1-7/
+WORK=/dls_sw/work/R3.14.12.7/support
+#CALC=$(SUPPORT)/calc/3-7
+-include $(TOP)/configure/RELEASE.private
+EPICS_BASE=/dls_sw/epics/R3.14.12.7/base
+"""
+
+
+class ParseReleaseTest(unittest.TestCase):
+
+    def test_macros_defined_in_order_and_expanded(self):
+        release = configure_release.parse_release(RELEASE)
+
+        self.assertEqual(list(release), ["SUPPORT", "ASYN", "MOTOR", "BUSY",
+                                         "WORK", "EPICS_BASE"])
+        self.assertEqual(release["ASYN"],
+                         "/dls_sw/prod/R3.14.12.7/support/asyn/4-41")
+        self.assertEqual(release["MOTOR"],
+                         "/dls_sw/prod/R3.14.12.7/support/motor/7-0dls5")
+
+    def test_given_predefined_macros_then_used_for_expansion(self):
+        release = configure_release.parse_release(
+            "ASYN=$(TOP)/asyn", {"TOP": "/top"})
+
+        self.assertEqual(release, {"ASYN": "/top/asyn"})
+
+    def test_given_unknown_macro_then_left_unexpanded(self):
+        release = configure_release.parse_release("ASYN=$(UNKNOWN)/asyn")
+
+        self.assertEqual(release["ASYN"], "$(UNKNOWN)/asyn")
+
+    def test_given_missing_file_then_empty(self):
+        self.assertEqual(
+            configure_release.read_release("/not/a/RELEASE"), {})
+
+
+class ModuleReferencesTest(unittest.TestCase):
+
+    def test_references_to_releases_under_root_returned(self):
+        release = configure_release.parse_release(RELEASE)
+
+        references = configure_release.module_references(
+            release, "/dls_sw/prod/R3.14.12.7/support")
+
+        self.assertEqual(references, [("asyn", "4-41"), ("motor", "7-0dls5"),
+                                      ("busy", "1-7")])
+
+    def test_given_depth_then_module_has_that_many_components(self):
+        references = configure_release.module_references(
+            {"IOC": "/prod/ioc/BL08J/BL08J-MO-IOC-01/1-2/bin"}, "/prod/ioc",
+            depth=2)
+
+        self.assertEqual(references, [("BL08J/BL08J-MO-IOC-01", "1-2")])
@@ -0,0 +1,168 @@
+"""
+Local copies of the cookiecutter templates used to create modules.
+
+Each template is checked out once per commit, under the dls_ade cache
+directory::
+
+    cookiecutter_templates/<template>/<commit sha>/
+    cookiecutter_templates/<template>/PINNED
+
+Before a copy is used the template HEAD is looked up with git ls-remote, which
+is much cheaper than cloning. If the server cannot be reached, the commit in
+PINNED (the last one checked out) is used, so modules can be created offline.
+"""
+
+import os
+import shutil
+import tempfile
+import logging
+from collections import namedtuple
+
+import git
+
+from dls_ade import local_store
+from dls_ade.exceptions import ModuleTemplateError
+
+log = logging.getLogger(__name__)
+
+CACHE_FOLDER = "cookiecutter_templates"
+PINNED_FILE = "PINNED"
+
+CachedTemplate = namedtuple("CachedTemplate", "name commit path")
+"""A checked out template: its name, commit sha and local directory."""
+
+
+def template_name(url):
+    """Return the name of a template from its URL, e.g.
+    dls_python3_template_module."""
+    return os.path.basename(url.rstrip("/"))
+
+
+def template_folder(name):
+    """Return the cache directory of a template, creating it if necessary."""
+    folder = os.path.join(local_store.cache_path(CACHE_FOLDER), name)
+    if not os.path.isdir(folder):
+        try:
+            os.makedirs(folder)
+        except OSError:
+            # Created by another process in the meantime
+            if not os.path.isdir(folder):
+                raise
+    return folder
+
+
+def remote_head(url):
+    """
+    Look up the commit a template's HEAD points to, without cloning it.
+
+    Args:
+        url(str): Repository URL of the template
+
+    Returns:
+        str: Commit sha
+
+    Raises:
+        :class:`git.exc.GitCommandError`: If the server cannot be reached
+        :class:`~dls_ade.exceptions.ModuleTemplateError`: If the repository \
+            has no HEAD
+
+    """
+    output = git.cmd.Git().ls_remote(url, "HEAD")
+    for line in output.splitlines():
+        sha, ref = line.split("\t")
+        if ref == "HEAD":
+            return sha
+    raise ModuleTemplateError("Template {} has no HEAD".format(url))
+
+
+def read_pinned(name):
+    """Return the commit last checked out for a template, or None."""
+    try:
+        with open(os.path.join(template_folder(name), PINNED_FILE)) as f:
+            commit = f.read().strip()
+    except (IOError, OSError):
+        return None
+    return commit or None
+
+
+def write_pinned(name, commit):
+    """Record the commit to use for a template when the server cannot be
+    reached."""
+    folder = template_folder(name)
+    handle, temp_path = tempfile.mkstemp(dir=folder)
+    with os.fdopen(handle, "w") as f:
+        f.write(commit + "\n")
+    os.rename(temp_path, os.path.join(folder, PINNED_FILE))
+
+
+def _check_out(url, name, commit):
+    """Clone a template into the cache and return its commit and path.
+
+    The clone is made next to its final location and renamed into place, so
+    that other processes never see a partial checkout.
+    """
+    folder = template_folder(name)
+    temp_path = tempfile.mkdtemp(dir=folder, prefix=".clone_")
+    try:
+        repo = git.Repo.clone_from(url, temp_path, depth=1)
+        # HEAD may have moved since it was looked up
+        commit = repo.head.commit.hexsha
+        path = os.path.join(folder, commit)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            # Checked out by another process in the meantime
+            if not os.path.isdir(path):
+                raise
+        return commit, path
+    finally:
+        if os.path.isdir(temp_path):
+            shutil.rmtree(temp_path)
+
+
+def get_template(url):
+    """
+    Return a local copy of a cookiecutter template at the commit its HEAD
+    points to, checking it out only if it is not in the cache already.
+
+    If the server cannot be reached, the copy last checked out is used.
+
+    Args:
+        url(str): Repository URL of the template
+
+    Returns:
+        :class:`CachedTemplate`: Name, commit and path of the copy
+
+    Raises:
+        :class:`~dls_ade.exceptions.ModuleTemplateError`: If the server \
+            cannot be reached and the template has never been checked out
+
+    """
+    name = template_name(url)
+    try:
+        commit = remote_head(url)
+    except git.exc.GitCommandError as e:
+        log.debug("ls-remote of {} failed: {}".format(url, e))
+        commit = None
+
+    if commit is not None:
+        path = os.path.join(template_folder(name), commit)
+        try:
+            if not os.path.isdir(path):
+                log.info("Fetching template %s at %s", name, commit[:7])
+                commit, path = _check_out(url, name, commit)
+            write_pinned(name, commit)
+            return CachedTemplate(name, commit, path)
+        except git.exc.GitCommandError as e:
+            log.debug("Clone of {} failed: {}".format(url, e))
+
+    pinned = read_pinned(name)
+    if pinned is None or not os.path.isdir(
+            os.path.join(template_folder(name), pinned)):
+        raise ModuleTemplateError(
+            "Cannot reach template {} and there is no local copy of "
+            "it".format(url))
+    log.warning("Cannot reach template %s, using the local copy at %s",
+                name, pinned[:7])
+    return CachedTemplate(name, pinned, os.path.join(template_folder(name),
+                                                     pinned))
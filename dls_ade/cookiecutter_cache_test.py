@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import git
+from mock import patch
+
+from dls_ade import cookiecutter_cache
+from dls_ade.exceptions import ModuleTemplateError
+
+
+class GetTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        patch_cache = patch("dls_ade.local_store.CACHE_DIR",
+                            os.path.join(self.root, "cache"))
+        patch_cache.start()
+        self.addCleanup(patch_cache.stop)
+
+        self.repo = git.Repo.init(os.path.join(self.root, "test_template"))
+        self.commit("cookiecutter.json", "{}\n")
+        self.url = "file://" + os.path.join(self.root, "test_template")
+
+    def commit(self, path, contents):
+        with open(os.path.join(self.repo.working_tree_dir, path), "w") as f:
+            f.write(contents)
+        self.repo.index.add([path])
+        return self.repo.index.commit("Change " + path).hexsha
+
+    def test_given_empty_cache_then_template_checked_out_and_pinned(self):
+        template = cookiecutter_cache.get_template(self.url)
+
+        self.assertEqual(template.name, "test_template")
+        self.assertEqual(template.commit, self.repo.head.commit.hexsha)
+        self.assertTrue(os.path.isfile(
+            os.path.join(template.path, "cookiecutter.json")))
+        self.assertEqual(cookiecutter_cache.read_pinned("test_template"),
+                         template.commit)
+
+    def test_given_template_cached_then_not_cloned_again(self):
+        first = cookiecutter_cache.get_template(self.url)
+
+        with patch.object(git.Repo, "clone_from") as mock_clone:
+            second = cookiecutter_cache.get_template(self.url)
+
+        self.assertFalse(mock_clone.called)
+        self.assertEqual(second, first)
+
+    def test_given_new_commit_then_new_copy_checked_out(self):
+        first = cookiecutter_cache.get_template(self.url)
+        commit = self.commit("README", "Updated\n")
+
+        second = cookiecutter_cache.get_template(self.url)
+
+        self.assertEqual(second.commit, commit)
+        self.assertNotEqual(second.path, first.path)
+        self.assertTrue(os.path.isfile(os.path.join(second.path, "README")))
+
+    def test_given_server_unreachable_then_pinned_copy_used(self):
+        first = cookiecutter_cache.get_template(self.url)
+        shutil.rmtree(self.repo.working_tree_dir)
+
+        self.assertEqual(cookiecutter_cache.get_template(self.url), first)
+
+    def test_given_server_unreachable_and_no_copy_then_error_raised(self):
+        shutil.rmtree(self.repo.working_tree_dir)
+
+        with self.assertRaises(ModuleTemplateError):
+            cookiecutter_cache.get_template(self.url)
+
+
+class TemplateNameTest(unittest.TestCase):
+
+    def test_name_is_last_part_of_url(self):
+        self.assertEqual(
+            cookiecutter_cache.template_name(
+                "https://gitlab.diamond.ac.uk/controls/templates/"
+                "dls_python3_template_module/"),
+            "dls_python3_template_module")
@@ -0,0 +1,487 @@
+#!/bin/env dls-python
+# This script comes from the dls_scripts python module
+"""
+Archive old releases of the modules in a prod area to reclaim disk space,
+keeping the newest releases of each module and any release that another
+release is built against
+"""
+
+import os
+import sys
+import json
+import stat
+import sqlite3
+import logging
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from six.moves import input
+
+from dls_ade import dlsbuild
+from dls_ade import configure_release
+from dls_ade import logconfig
+from dls_ade import prod_index
+from dls_ade.argument_parser import ArgParser
+from dls_ade.dls_environment import environment
+from dls_ade.dls_tar_module import SUPPORTED_AREAS
+
+try:
+    from os import scandir
+except ImportError:  # Python 2
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+log = logging.getLogger(name="dls_ade")
+usermsg = logging.getLogger(name="usermessages")
+output = logging.getLogger(name="output")
+
+usage = """
+Default <area> is 'support'.
+Archive the old releases of modules in the prod area with dls-tar-module.
+The newest releases of each module are kept (see --keep), as is any release
+that is referred to by the configure/RELEASE file of another release that
+has not been archived. Releases are archived by the build server, in batches.
+With --dry-run, only report the disk usage of each module and how much space
+archiving would reclaim.
+"""
+
+# A release directory in a prod area. size is its disk usage in bytes and
+# references are the (module, version) releases that its configure/RELEASE
+# refers to.
+Release = namedtuple("Release", ["module", "version", "path", "size",
+                                 "references"])
+
+# Areas whose releases can be referred to by the releases of other areas
+REFERRING_AREAS = {"support": ["support", "ioc"]}
+
+# Number of directory path components in a module name
+MODULE_DEPTH = {"ioc": 2}
+
+
+def make_parser():
+    """
+    Takes ArgParse instance with default arguments and adds
+
+    Positional Arguments:
+        * modules
+
+    Flags:
+        * -e (epics_version)
+        * -r (rhel_version)
+        * -k (keep)
+        * -n (dry-run)
+        * -j (jobs)
+        * -b (batch)
+        * -c (codec)
+        * --level
+        * -y (yes)
+
+    Returns:
+        :class:`argparse.ArgumentParser`: ArgParse instance
+
+    """
+    parser = ArgParser(usage, SUPPORTED_AREAS)
+    parser.add_argument(
+        "modules", nargs="*", type=str, default=[],
+        help="Only archive releases of these modules. Default is every "
+             "module in the area")
+    parser.add_epics_version_flag()
+    parser.add_rhel_version_flag()
+    parser.add_argument(
+        "-k", "--keep", action="store", type=int, default=3, dest="keep",
+        help="Number of the newest releases of each module to keep. "
+             "Default is 3")
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", dest="dry_run",
+        help="Only report what would be archived and the space it would "
+             "reclaim")
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, default=16, dest="jobs",
+        help="Number of directories to scan at the same time. Default is 16")
+    parser.add_argument(
+        "-b", "--batch", action="store", type=int, default=20, dest="batch",
+        help="Number of archive jobs to queue at a time. Default is 20")
+    parser.add_argument(
+        "-c", "--codec", action="store", dest="codec",
+        choices=[codec for codec, _ in dlsbuild.ARCHIVE_CODECS],
+        default=dlsbuild.ARCHIVE_CODECS[0][0],
+        help="Compression to archive with. Default is gzip")
+    parser.add_argument(
+        "--level", action="store", type=int, dest="level",
+        help="Compression level. Default is the compressor's default")
+    parser.add_argument(
+        "-y", "--yes", action="store_true", dest="yes",
+        help="Don't ask for confirmation before queueing the archive jobs")
+
+    return parser
+
+
+def _list_dirs(path):
+    """Return the names of the directories in a directory, not following
+    symbolic links or including hidden directories"""
+    if scandir is not None:
+        try:
+            return sorted(entry.name for entry in scandir(path)
+                          if not entry.name.startswith(".") and
+                          entry.is_dir(follow_symlinks=False))
+        except OSError:
+            return []
+
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    return sorted(name for name in names if not name.startswith(".") and
+                  stat.S_ISDIR(os.lstat(os.path.join(path, name)).st_mode))
+
+
+def _file_usage(st):
+    """Return the disk space used by a file, from its stat result"""
+    blocks = getattr(st, "st_blocks", None)
+    if blocks is None:
+        return st.st_size
+    return blocks * 512
+
+
+def disk_usage(path):
+    """
+    Work out the disk space used by a directory tree, like du. Symbolic links
+    are not followed.
+
+    Args:
+        path(str): Directory
+
+    Returns:
+        int: Disk usage in bytes
+
+    """
+    total = 0
+    if scandir is None:
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                try:
+                    total += _file_usage(os.lstat(os.path.join(root, name)))
+                except OSError:
+                    pass
+        return total
+
+    pending = [path]
+    while pending:
+        try:
+            entries = list(scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                total += _file_usage(entry.stat(follow_symlinks=False))
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+            except OSError:
+                pass
+    return total
+
+
+def list_releases(area_dir, depth=1, modules=None):
+    """
+    List the (unarchived) releases in a prod area.
+
+    Args:
+        area_dir(str): Prod area directory
+        depth(int): Number of path components in a module name
+        modules(list of str): Only list releases of these modules
+
+    Returns:
+        list of tuple(str, str, str): Module, version and path of each
+            release
+
+    """
+    module_paths = [((), area_dir)]
+    for _ in range(depth):
+        module_paths = [(parts + (name,), os.path.join(path, name))
+                        for parts, path in module_paths
+                        for name in _list_dirs(path)]
+
+    releases = []
+    for parts, path in module_paths:
+        module = "/".join(parts)
+        if modules and module not in modules:
+            continue
+        for version in _list_dirs(path):
+            releases.append((module, version, os.path.join(path, version)))
+    return releases
+
+
+def scan_releases(area_dir, releases, jobs, usage=True, depth=1):
+    """
+    Work out the disk usage and references of releases, in parallel.
+
+    Args:
+        area_dir(str): Prod area whose releases references are looked for
+        releases(list of tuple): From :func:`list_releases`
+        jobs(int): Number of releases to scan at the same time
+        usage(bool): Work out disk usage. If False, the sizes are 0.
+        depth(int): Number of path components in the module names of
+            `area_dir`
+
+    Returns:
+        list of :class:`Release`: Scanned releases, in the same order
+
+    """
+    def scan(release):
+        module, version, path = release
+        size = disk_usage(path) if usage else 0
+        macros = configure_release.read_release(
+            os.path.join(path, "configure", "RELEASE"))
+        references = configure_release.module_references(
+            macros, area_dir, depth)
+        return Release(module, version, path, size, references)
+
+    if not releases:
+        return []
+    pool = ThreadPool(max(1, min(jobs, len(releases))))
+    try:
+        return pool.map(scan, releases)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def referenced_releases(env, area, area_dir, jobs, releases, modules):
+    """
+    Find the releases of an area that another release is built against, from
+    the prod index. If the index cannot be used, the RELEASE files of the
+    referring areas are scanned instead.
+
+    Args:
+        env(:class:`~dls_ade.dls_environment.environment`): Environment
+        area(str): Area whose releases are archived
+        area_dir(str): Prod directory of the area
+        jobs(int): Number of directories to scan at the same time
+        releases(list of :class:`Release`): Scanned releases of the area
+        modules(list of str): Modules whose releases were scanned, or empty
+            for every module
+
+    Returns:
+        set of tuple(str, str): (module, version) releases
+
+    """
+    depth = MODULE_DEPTH.get(area, 1)
+    referring_areas = REFERRING_AREAS.get(area, [area])
+    try:
+        index = prod_index.ProdIndex()
+        try:
+            for referring_area in referring_areas:
+                referring_dir = env.prodArea(referring_area)
+                index.refresh(referring_dir,
+                              MODULE_DEPTH.get(referring_area, 1))
+                index.refresh_dependencies(referring_dir, area_dir, depth,
+                                           jobs)
+            return index.referenced(area_dir)
+        finally:
+            index.close()
+    except (sqlite3.Error, OSError) as e:
+        log.warning("Cannot use the prod index, scanning RELEASE files: "
+                    "{}".format(e))
+
+    referenced = set()
+    for referring_area in referring_areas:
+        if referring_area == area and not modules:
+            referring = releases
+        else:
+            referring_dir = env.prodArea(referring_area)
+            referring = scan_releases(
+                area_dir, list_releases(referring_dir,
+                                        MODULE_DEPTH.get(referring_area, 1)),
+                jobs, usage=False, depth=depth)
+        for release in referring:
+            referenced.update(release.references)
+    return referenced
+
+
+def select_releases(releases, keep, referenced, env):
+    """
+    Choose the releases to archive.
+
+    Args:
+        releases(list of :class:`Release`): Releases of the area
+        keep(int): Number of the newest releases of each module to keep
+        referenced(set of tuple): (module, version) releases that another
+            release refers to, which are kept
+        env(:class:`~dls_ade.dls_environment.environment`): Environment, for
+            sorting releases
+
+    Returns:
+        list of :class:`Release`: Releases to archive, oldest first for each
+            module
+
+    """
+    by_module = {}
+    for release in releases:
+        by_module.setdefault(release.module, []).append(release)
+
+    selected = []
+    for module in sorted(by_module):
+        by_path = dict((release.path, release)
+                       for release in by_module[module])
+        ordered = [by_path[path] for path in env.sortReleases(list(by_path))]
+        old = ordered[:-keep] if keep > 0 else ordered
+        selected.extend(release for release in old
+                        if (release.module, release.version) not in referenced)
+    return selected
+
+
+def format_size(size):
+    """
+    Format a number of bytes for people, e.g. 1.5 GiB
+
+    Args:
+        size(int): Number of bytes
+
+    Returns:
+        str: Formatted size
+
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return "{:.1f} {}".format(size, unit) if unit != "B" \
+                else "{} B".format(size)
+        size /= 1024.0
+    return "{:.1f} TiB".format(size)
+
+
+def format_report(releases, selected):
+    """
+    Format the disk usage of each module and the space archiving would
+    reclaim.
+
+    Args:
+        releases(list of :class:`Release`): Every release of the area
+        selected(list of :class:`Release`): Releases to archive
+
+    Returns:
+        str: Table with a row per module and a total
+
+    """
+    totals = {}
+    for release in releases:
+        count, size, archived, reclaimed = totals.get(
+            release.module, (0, 0, 0, 0))
+        totals[release.module] = (count + 1, size + release.size,
+                                  archived, reclaimed)
+    for release in selected:
+        count, size, archived, reclaimed = totals[release.module]
+        totals[release.module] = (count, size, archived + 1,
+                                  reclaimed + release.size)
+
+    width = max([len("Module")] + [len(module) for module in totals])
+    row = "{:<%d}  {:>8}  {:>10}  {:>8}  {:>10}" % width
+    lines = [row.format("Module", "Releases", "Size", "Archive", "Reclaim")]
+    for module in sorted(totals):
+        count, size, archived, reclaimed = totals[module]
+        lines.append(row.format(module, count, format_size(size), archived,
+                                format_size(reclaimed)))
+    lines.append(row.format(
+        "Total", len(releases),
+        format_size(sum(release.size for release in releases)),
+        len(selected), format_size(sum(release.size for release in selected))))
+    return "\n".join(lines)
+
+
+def submit_archive_jobs(build, selected, batch):
+    """
+    Queue archive jobs for releases, a batch at a time.
+
+    Args:
+        build(:class:`~dls_ade.dlsbuild.ArchiveBuild`): Archive build object
+        selected(list of :class:`Release`): Releases to archive
+        batch(int): Number of jobs to queue at a time
+
+    Returns:
+        list of str: Build names of the jobs
+
+    """
+    vcs = dlsbuild.VcsInfo("git", "")
+    build_names = []
+    for start in range(0, len(selected), batch):
+        jobs = [(build, release.module, release.version, vcs)
+                for release in selected[start:start + batch]]
+        build_names.extend(dlsbuild.submit_jobs(jobs))
+        usermsg.info("Queued {} of {} archive jobs".format(
+            len(build_names), len(selected)))
+    return build_names
+
+
+def _main():
+    parser = make_parser()
+    args = parser.parse_args()
+
+    log.info(json.dumps({'CLI': sys.argv, 'options_args': vars(args)}))
+
+    if args.keep < 0 or args.jobs < 1 or args.batch < 1:
+        parser.error("--keep must not be negative and --jobs and --batch "
+                     "must be positive")
+
+    env = environment()
+    env.check_epics_version(args.epics_version)
+    env.check_rhel_version(args.rhel_version)
+    area_dir = env.prodArea(args.area)
+
+    depth = MODULE_DEPTH.get(args.area, 1)
+    usermsg.info("Scanning {}".format(area_dir))
+    releases = scan_releases(
+        area_dir, list_releases(area_dir, depth, args.modules), args.jobs,
+        depth=depth)
+
+    referenced = referenced_releases(env, args.area, area_dir, args.jobs,
+                                     releases, args.modules)
+    selected = select_releases(releases, args.keep, referenced, env)
+    output.info(format_report(releases, selected))
+    for release in selected:
+        log.debug("Archive {}".format(release.path))
+
+    if args.dry_run or not selected:
+        return 0
+
+    # The EPICS version is passed on explicitly, as without it the build
+    # picks the server's default version if the environment's is not on the
+    # server, and would archive releases of a tree that was not checked
+    try:
+        build = dlsbuild.ArchiveBuild(args.rhel_version, env.epicsVer(),
+                                      False, args.codec, args.level)
+    except AssertionError as err:
+        usermsg.error("Aborting: {}".format(err))
+        return 1
+    if build.epics() != env.epicsVer():
+        usermsg.error("Aborting: archive jobs would run for EPICS {} but "
+                      "releases were checked for EPICS {}".format(
+                          build.epics(), env.epicsVer()))
+        return 1
+    build.set_area(args.area)
+
+    if not args.yes:
+        answer = input("Archive {} releases? [y/N] ".format(len(selected)))
+        if answer.strip().lower() not in ("y", "yes"):
+            usermsg.info("Cancelled")
+            return 0
+
+    submit_archive_jobs(build, selected, args.batch)
+    return 0
+
+
+def main():
+    # Catch unhandled exceptions and ensure they're logged
+    try:
+        logconfig.setup_logging(application='dls-archive-releases.py')
+        return _main()
+    except Exception as e:
+        logging.exception(e)
+        logging.getLogger("usermessages").exception(
+            "ABORT: Unhandled exception (see trace below): {}".format(e)
+        )
+        exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
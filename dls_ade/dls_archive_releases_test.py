@@ -0,0 +1,226 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from mock import patch, MagicMock
+
+from dls_ade import dls_archive_releases
+from dls_ade import prod_index
+from dls_ade.dls_archive_releases import Release
+from dls_ade.dls_environment import environment
+
+
+class MakeParserTest(unittest.TestCase):
+
+    def test_defaults(self):
+        args = dls_archive_releases.make_parser().parse_args([])
+
+        self.assertEqual(args.modules, [])
+        self.assertEqual(args.keep, 3)
+        self.assertFalse(args.dry_run)
+        self.assertEqual(args.codec, "gzip")
+
+
+class ScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.area_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.area_dir)
+
+    def make_release(self, module, version, release_text=None, size=0):
+        path = os.path.join(self.area_dir, module, version)
+        os.makedirs(os.path.join(path, "configure"))
+        if release_text is not None:
+            with open(os.path.join(path, "configure", "RELEASE"), "w") as f:
+                f.write(release_text)
+        with open(os.path.join(path, "data"), "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_list_releases_skips_archives_and_hidden_directories(self):
+        self.make_release("asyn", "4-41")
+        self.make_release("asyn", ".tmp")
+        open(os.path.join(self.area_dir, "asyn", "4-40.tar.gz"), "w").close()
+
+        releases = dls_archive_releases.list_releases(self.area_dir)
+
+        self.assertEqual(releases, [
+            ("asyn", "4-41", os.path.join(self.area_dir, "asyn", "4-41"))])
+
+    def test_list_releases_filters_modules(self):
+        self.make_release("asyn", "4-41")
+        self.make_release("motor", "7-0")
+
+        releases = dls_archive_releases.list_releases(
+            self.area_dir, modules=["motor"])
+
+        self.assertEqual([r[0] for r in releases], ["motor"])
+
+    def test_scan_finds_usage_and_references(self):
+        self.make_release("asyn", "4-41")
+        self.make_release(
+            "motor", "7-0",
+            "SUPPORT={}\nASYN=$(SUPPORT)/asyn/4-41\n".format(self.area_dir),
+            size=100000)
+
+        releases = dls_archive_releases.scan_releases(
+            self.area_dir, dls_archive_releases.list_releases(self.area_dir),
+            jobs=2)
+
+        motor = releases[1]
+        self.assertEqual(motor.references, [("asyn", "4-41")])
+        self.assertGreaterEqual(motor.size, 100000)
+        self.assertEqual(releases[0].references, [])
+
+    def referring_env(self):
+        env = environment()
+        env.prodArea = lambda area: os.path.join(self.area_dir, area)
+        return env
+
+    def test_referenced_releases_read_from_prod_index(self):
+        index = prod_index.ProdIndex(":memory:")
+        self.addCleanup(index.close)
+        support_dir = os.path.join(self.area_dir, "support")
+        os.makedirs(os.path.join(support_dir, "motor", "7-0", "configure"))
+        with open(prod_index.release_file(support_dir, "motor", "7-0"),
+                  "w") as f:
+            f.write("ASYN={}/asyn/4-41\n".format(support_dir))
+
+        with patch.object(prod_index, 'ProdIndex', return_value=index):
+            referenced = dls_archive_releases.referenced_releases(
+                self.referring_env(), "support", support_dir, 2, [],
+                ["asyn"])
+
+        self.assertEqual(referenced, {("asyn", "4-41")})
+
+    @patch('dls_ade.dls_archive_releases.prod_index.ProdIndex',
+           side_effect=sqlite3.OperationalError("locked"))
+    def test_given_index_error_then_release_files_scanned(self, _1):
+        releases = [Release("motor", "7-0", "/prod/motor/7-0", 0,
+                            [("asyn", "4-41")])]
+
+        referenced = dls_archive_releases.referenced_releases(
+            self.referring_env(), "python", self.area_dir, 2, releases, [])
+
+        self.assertEqual(referenced, {("asyn", "4-41")})
+
+
+class SelectReleasesTest(unittest.TestCase):
+
+    def release(self, module, version):
+        return Release(module, version, "/prod/{}/{}".format(module, version),
+                       10, [])
+
+    def test_newest_kept_and_referenced_releases_kept(self):
+        releases = [self.release("asyn", v)
+                    for v in ["4-9", "4-10", "4-41", "4-2"]]
+
+        selected = dls_archive_releases.select_releases(
+            releases, 1, {("asyn", "4-9")}, environment())
+
+        self.assertEqual([r.version for r in selected], ["4-2", "4-10"])
+
+    def test_given_keep_zero_then_all_unreferenced_selected(self):
+        releases = [self.release("asyn", "4-9"), self.release("motor", "7-0")]
+
+        selected = dls_archive_releases.select_releases(
+            releases, 0, set(), environment())
+
+        self.assertEqual(len(selected), 2)
+
+
+class ReportTest(unittest.TestCase):
+
+    def test_format_size(self):
+        self.assertEqual(dls_archive_releases.format_size(512), "512 B")
+        self.assertEqual(dls_archive_releases.format_size(1536), "1.5 KiB")
+        self.assertEqual(
+            dls_archive_releases.format_size(3 * 1024 ** 3), "3.0 GiB")
+
+    def test_report_has_module_rows_and_total(self):
+        releases = [Release("asyn", "4-9", "/a/4-9", 2048, []),
+                    Release("asyn", "4-41", "/a/4-41", 1024, [])]
+
+        report = dls_archive_releases.format_report(
+            releases, releases[:1]).splitlines()
+
+        self.assertEqual(report[1].split(),
+                         ["asyn", "2", "3.0", "KiB", "1", "2.0", "KiB"])
+        self.assertEqual(report[2].split()[0], "Total")
+
+
+class SubmitArchiveJobsTest(unittest.TestCase):
+
+    @patch('dls_ade.dls_archive_releases.dlsbuild.submit_jobs')
+    def test_jobs_submitted_in_batches(self, mock_submit):
+        mock_submit.side_effect = lambda jobs: [job[1] for job in jobs]
+        selected = [Release("m{}".format(i), "1-0", "/p", 1, [])
+                    for i in range(5)]
+
+        build_names = dls_archive_releases.submit_archive_jobs(
+            "build", selected, 2)
+
+        self.assertEqual(mock_submit.call_count, 3)
+        self.assertEqual(build_names, ["m0", "m1", "m2", "m3", "m4"])
+
+
+@patch('dls_ade.dls_archive_releases.submit_archive_jobs')
+@patch('dls_ade.dls_archive_releases.select_releases',
+       return_value=[Release("asyn", "4-41", "/p", 1, [])])
+@patch('dls_ade.dls_archive_releases.referenced_releases', return_value=set())
+@patch('dls_ade.dls_archive_releases.scan_releases', return_value=[])
+@patch('dls_ade.dls_archive_releases.list_releases', return_value=[])
+@patch('dls_ade.dls_archive_releases.format_report', return_value="")
+@patch('dls_ade.dlsbuild.lookup_contact_details',
+       return_value=("User", "user@diamond.ac.uk"))
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        patch_env = patch.dict(os.environ,
+                               {"DLS_EPICS_RELEASE": "R3.14.12.7"})
+        patch_env.start()
+        self.addCleanup(patch_env.stop)
+        # The default of -e is read from the environment at import
+        patch_default = patch('dls_ade.argument_parser.env',
+                              environment("R3.14.12.7"))
+        patch_default.start()
+        self.addCleanup(patch_default.stop)
+
+    def run_main(self, *args):
+        with patch('sys.argv', ["dls-archive-releases.py", "-y"] +
+                   list(args)):
+            return dls_archive_releases._main()
+
+    def test_given_no_epics_and_not_server_default_then_env_epics_archived(
+            self, *mocks):
+        mock_submit = mocks[-1]
+
+        self.assertEqual(self.run_main("-r", "7"), 0)
+
+        build = mock_submit.call_args[0][0]
+        self.assertEqual(build.epics(), "R3.14.12.7")
+        self.assertEqual(build.get_server(), "redhat7-x86_64")
+
+    def test_given_no_epics_and_env_epics_not_on_server_then_not_submitted(
+            self, *mocks):
+        mock_submit = mocks[-1]
+
+        # The first EPICS version of the server is R3.14.12.3
+        self.assertEqual(self.run_main("-r", "6"), 1)
+
+        self.assertFalse(mock_submit.called)
+
+    def test_given_build_epics_differs_from_checked_then_not_submitted(
+            self, *mocks):
+        mock_submit = mocks[-1]
+        build = MagicMock()
+        build.epics.return_value = "R3.14.12.3"
+
+        with patch('dls_ade.dls_archive_releases.dlsbuild.ArchiveBuild',
+                   return_value=build):
+            self.assertEqual(self.run_main(), 1)
+
+        self.assertFalse(mock_submit.called)
@@ -26,9 +26,107 @@ try:
 except ImportError:  # Python 3
     from configparser import SafeConfigParser
 
+from dls_ade.dls_version import ReleaseKey, Version, parse, release_key  # noqa
+
 log = logging.getLogger(__name__)
 
 
+def release_name(path):
+    """
+    Return the release number at the end of a path, as
+    os.path.split(os.path.normpath(path))[1] does.
+
+    Args:
+        path(str or tuple): Path, or a tuple whose first item is a path
+
+    Returns:
+        str: Last component of the path
+
+    """
+    if type(path) == tuple:
+        path = path[0]
+    name = os.path.basename(path)
+    # normpath only changes the last component when it is empty, . or ..
+    if name in ("", ".", ".."):
+        name = os.path.split(os.path.normpath(path))[1]
+    return name
+
+
+def _sort_key(path):
+    return parse(release_name(path)).key, path
+
+
+def sort_releases(paths):
+    """
+    Sort paths by their release numbers, see :meth:`environment.sortReleases`.
+
+    Args:
+        paths(list of str and/or tuple): Paths to sort
+
+    Returns:
+        list: Sorted paths
+
+    """
+    return sorted(paths, key=_sort_key)
+
+
+def latest(paths):
+    """
+    Return the path with the highest release number, i.e. the last path that
+    :func:`sort_releases` would return, without sorting.
+
+    Args:
+        paths(list of str and/or tuple): Paths, which must not be empty
+
+    Returns:
+        str or tuple: Path of the latest release
+
+    Raises:
+        :class:`exceptions.ValueError`: No paths are given
+
+    """
+    return max(paths, key=_sort_key)
+
+
+class _PrefixTrie(object):
+    """
+    Character trie of path prefixes, finding the highest priority prefix of
+    a path in one pass over it.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, prefix, value):
+        """Add a prefix. Values are compared to choose between prefixes that
+        match the same path, the lowest wins."""
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        if None not in node or value < node[None]:
+            node[None] = value
+
+    def match(self, path):
+        """Return the lowest value of the prefixes of path, or None"""
+        best = self.root.get(None)
+        node = self.root
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            value = node.get(None)
+            if value is not None and (best is None or value < best):
+                best = value
+        return best
+
+
+# Tries of the area roots, by environment class, EPICS and RHEL directory
+# versions and areas
+_area_tries = {}
+# Environments for EPICS versions found in paths, by class and EPICS version
+_epics_environments = {}
+
+
 class environment(object):
     """
     A class representing the epics environment of a site.
@@ -291,32 +389,7 @@ class environment(object):
             list: Component parts of release tag
 
         """
-        components = []
-        # first split by dls: 4-5beta2dls1-3 --> 4-5beta2 and 1-3
-        for part in release.split("dls", 1):
-            # rejig separators
-            part = part.replace(".", "-").replace("_", "-")
-            # allow up to 3 -'s: 4-5beta2 --> 4, 5 and beta2
-            for subpart in part.split("-", 3):
-                match = re.match("\d+", subpart)
-                if match:
-                    # turn the digit to an int so it sorts properly
-                    components.append(int(match.group()))
-                    suffix = subpart[match.start() + len(match.group()):]
-                    if suffix == '':
-                        components.append('z')
-                    else:
-                        components.append(suffix)
-                else:
-                    # just add the string part
-                    components.append(0)
-                    components.append(subpart)
-            # pad to 6 elements
-            components += [0, ''] * int((6-len(components))/2)
-        # pad to 12 elements
-        components += [0, ''] * int((12-len(components))/2)
-        # log.debug(components)
-        return components
+        return list(release_key(release))
 
     def sortReleases(self, paths):
         """
@@ -330,21 +403,24 @@ class environment(object):
             str: Sorted list of release tags
 
         """
-        releases = []
-        for path in paths:
-            if type(path) == tuple:
-                release = os.path.split(os.path.normpath(path[0]))[1]
-            else:
-                release = os.path.split(os.path.normpath(path))[1]
-            releases.append((self.normaliseRelease(release), path))
-
-        sorted_releases = []
-        for entry in sorted(releases):
-            sorted_releases.append(entry[1])
+        sorted_releases = sort_releases(paths)
         log.debug(sorted_releases)
 
         return sorted_releases
 
+    def latest(self, paths):
+        """
+        Return the path with the highest release number, see :func:`latest`.
+
+        Args:
+            paths(list of str and/or tuple): Paths, which must not be empty
+
+        Returns:
+            str or tuple: Path of the latest release
+
+        """
+        return latest(paths)
+
     def classifyArea(self, path):
         """
         Classify the area of a path, returning
@@ -358,32 +434,72 @@ class environment(object):
             "work", "prod", or "invalid"
 
         """
-        for a in self.areas:
-            if path.startswith(self.devArea(a)):
-                return a, "work", self.epicsVer()
-            elif path.startswith(self.prodArea(a)):
-                return a, "prod", self.epicsVer()
+        match = self._area_trie().match(path)
+        if match is not None:
+            _, area, domain = match
+            return area, domain, self.epicsVer()
 
         # not found, so strip epicsVer out and try again
         match = self.epics_ver_re.search(path)
         if match and match.group() != self.epicsVer():
-            return self.__class__(match.group()).classifyArea(path)
+            return self._epics_environment(match.group()).classifyArea(path)
         else:
             return "invalid", "invalid", self.epicsVer()
 
-    def getNameFromIni(self, ini):
+    def _area_trie(self):
+        """Return the trie of the dev and prod roots of every area, in the
+        order classifyArea tries them"""
+        key = (self.__class__, self.epicsVerDir(), self.rhelVerDir(),
+               tuple(self.areas))
+        trie = _area_tries.get(key)
+        if trie is None:
+            trie = _PrefixTrie()
+            for priority, a in enumerate(self.areas):
+                trie.add(self.devArea(a), (2 * priority, a, "work"))
+                trie.add(self.prodArea(a), (2 * priority + 1, a, "prod"))
+            _area_tries[key] = trie
+        return trie
+
+    def _epics_environment(self, epics):
+        """Return a shared environment of the same class for another EPICS
+        version"""
+        key = (self.__class__, epics)
+        env = _epics_environments.get(key)
+        if env is None:
+            env = _epics_environments[key] = self.__class__(epics)
+        return env
+
+    def getNameFromIni(self, ini, ini_cache=None):
+        """
+        Return the module name from a module.ini file.
+
+        Args:
+            ini(str): Path of the file
+            ini_cache(dict): Names already read, by path. The name is added
+                if it is not there.
+
+        Returns:
+            str: Module name
+
+        """
+        if ini_cache is not None and ini in ini_cache:
+            return ini_cache[ini]
         parser = SafeConfigParser()
         parser.read(ini)
         module = parser.get("general", "name")
+        if ini_cache is not None:
+            ini_cache[ini] = module
         return module
 
-    def classifyPath(self, path):
+    def classifyPath(self, path, ini_cache=None):
         """
         Return a (module, version) tuple for the path, where
         version is "invalid", "work", or a version number.
 
         Args:
             path(str): Path to a module or area
+            ini_cache(dict): Module names already read from module.ini
+                files, see getNameFromIni
 
         Returns:
             tuple: A tuple of <module>, <version>
@@ -391,18 +507,16 @@ class environment(object):
         """
         # classify the area
         area, domain, epics_ver = self.classifyArea(path)
-        e = self
         module = None
-        if epics_ver != self.epicsVer:
-            e = self.__class__(epics_ver)
+        e = self._epics_environment(epics_ver)
         if os.path.isfile(os.path.join(path, "etc", "module.ini")):
             # try and find name from etc/module.ini
             module = self.getNameFromIni(
-                os.path.join(path, "etc", "module.ini"))
+                os.path.join(path, "etc", "module.ini"), ini_cache)
         elif os.path.isfile(os.path.join(path, "configure", "module.ini")):
             # try and find name from configure/module.ini
             module = self.getNameFromIni(
-                os.path.join(path, "configure", "module.ini"))
+                os.path.join(path, "configure", "module.ini"), ini_cache)
         # deal with valid domains
         if domain == "work":
             root = e.devArea(area)
@@ -444,3 +558,20 @@ class environment(object):
             elif len(sections) > 1:
                 module = sections[-1]
         return module, version
+
+    def classify_paths(self, paths, ini_cache=None):
+        """
+        Classify many paths, see classifyPath.
+
+        Args:
+            paths(iterable of str): Paths to modules or areas
+            ini_cache(dict): Module names already read from module.ini
+                files. A new cache is used for this call if not given.
+
+        Returns:
+            list of tuple: A (<module>, <version>) tuple for each path
+
+        """
+        if ini_cache is None:
+            ini_cache = {}
+        return [self.classifyPath(path, ini_cache) for path in paths]
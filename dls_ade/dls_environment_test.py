@@ -1,5 +1,6 @@
 #!/bin/env dls-python
 
+import os
 import unittest
 from dls_ade import dls_environment
 from mock import patch, ANY, MagicMock
@@ -680,3 +681,152 @@ class SortReleasesTestWithPatch(SortReleasesTest):
     def test_sorts_letters(self, _1):
         super(SortReleasesTestWithPatch, self).test_sorts_letters()
 
+
+
+class ReleaseKeyTest(unittest.TestCase):
+
+    def test_key_is_components_of_normalise_release(self):
+        env = dls_environment.environment()
+        for release in ["3", "1-7-12beta1dls16-2-13", "4-5beta2dls1-3", "a"]:
+            self.assertEqual(list(dls_environment.release_key(release)),
+                             env.normaliseRelease(release))
+
+    def test_key_is_hashable_release_key(self):
+        key = dls_environment.release_key("4-5")
+
+        self.assertIsInstance(key, dls_environment.ReleaseKey)
+        self.assertEqual(len({key, dls_environment.release_key("4-5")}), 1)
+
+    def test_key_is_cached(self):
+        self.assertIs(dls_environment.release_key("6-7-8"),
+                      dls_environment.release_key("6-7-8"))
+
+
+class ReleaseNameTest(unittest.TestCase):
+
+    def test_given_paths_then_same_as_normpath(self):
+        for path in ["4-5", "/dls_sw/prod/support/asyn/4-5", "asyn/4-5/",
+                     "asyn/4-5/.", "asyn/4-5/bin/..", "asyn//4-5", ""]:
+            self.assertEqual(dls_environment.release_name(path),
+                             os.path.split(os.path.normpath(path))[1])
+
+    def test_given_tuple_then_first_item_used(self):
+        self.assertEqual(
+            dls_environment.release_name(("asyn/4-5/", "x")), "4-5")
+
+
+class LatestTest(unittest.TestCase):
+
+    releases = ["4-5beta2dls1-3", "4-5", "4-5dls1-3", "4-4-1", "asyn/4-6/",
+                "4-5beta1", "10-1", "9-12", "4-5-0", "4.5", "a", "4_5"]
+
+    def test_latest_is_last_of_sort(self):
+        env = dls_environment.environment()
+        for n in range(1, len(self.releases) + 1):
+            releases = self.releases[:n]
+            self.assertEqual(env.latest(releases),
+                             env.sortReleases(releases)[-1])
+
+    def test_given_tuples_then_latest_tuple_returned(self):
+        releases = [("asyn/4-5", 1), ("asyn/4-10", 2), ("asyn/4-9", 3)]
+
+        self.assertEqual(dls_environment.latest(releases), ("asyn/4-10", 2))
+
+    def test_given_no_releases_then_error(self):
+        with self.assertRaises(ValueError):
+            dls_environment.latest([])
+
+
+class ClassifyAreaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = dls_environment.environment("R3.14.12.7", "7")
+
+    def reference_classify_area(self, env, path):
+        for a in env.areas:
+            if path.startswith(env.devArea(a)):
+                return a, "work", env.epicsVer()
+            elif path.startswith(env.prodArea(a)):
+                return a, "prod", env.epicsVer()
+        match = env.epics_ver_re.search(path)
+        if match and match.group() != env.epicsVer():
+            fallback = dls_environment.environment(match.group(), "7")
+            return self.reference_classify_area(fallback, path)
+        return "invalid", "invalid", env.epicsVer()
+
+    def test_given_paths_then_same_as_checking_each_area(self):
+        paths = [
+            "/dls_sw/work/R3.14.12.7/support/asyn",
+            "/dls_sw/prod/R3.14.12.7/support/asyn/4-41",
+            "/dls_sw/prod/R3.14.12.7/ioc/BL08J/BL08J-MO-IOC-01/1-0",
+            "/dls_sw/work/python3/RHEL7-x86_64/dls_ade",
+            "/dls_sw/prod/python3/RHEL7-x86_64/dls_ade/1.0",
+            "/dls_sw/prod/common/python/RHEL7-x86_64/mod/1-0",
+            "/dls_sw/work/tools/RHEL7-x86_64/tool",
+            "/dls_sw/prod/etc/build",
+            "/dls_sw/epics/R3.14.12.7",
+            "/dls_sw/work/R3.14.12.3/support/asyn",
+            "/dls_sw/prod/R7.0.4/ioc/BL08J",
+            "/home/user/asyn",
+            "/dls_sw/prod/R3.14.12.7/supportx",
+            "",
+        ]
+        for path in paths:
+            self.assertEqual(self.env.classifyArea(path),
+                             self.reference_classify_area(self.env, path),
+                             path)
+
+    def test_given_python3_root_then_first_area_wins(self):
+        self.assertEqual(
+            self.env.classifyArea("/dls_sw/work/python3/RHEL7-x86_64/x"),
+            ("python3", "work", "R3.14.12.7"))
+
+    def test_trie_shared_between_environments(self):
+        other = dls_environment.environment("R3.14.12.7", "7")
+
+        self.assertIs(self.env._area_trie(), other._area_trie())
+
+    def test_trie_depends_on_areas(self):
+        other = dls_environment.environment("R3.14.12.7", "7")
+        other.areas = ["ioc"]
+
+        self.assertEqual(
+            other.classifyArea("/dls_sw/work/R3.14.12.7/support/asyn"),
+            ("invalid", "invalid", "R3.14.12.7"))
+
+
+class ClassifyPathsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = dls_environment.environment("R3.14.12.7", "7")
+
+    def test_given_paths_then_module_and_version_of_each(self):
+        paths = ["/dls_sw/prod/R3.14.12.7/support/asyn/4-41",
+                 "/dls_sw/work/R3.14.12.7/support/asyn",
+                 "/dls_sw/prod/R3.14.12.7/ioc/BL08J/BL08J-MO-IOC-01/1-0"]
+
+        self.assertEqual(self.env.classify_paths(paths),
+                         [("asyn", "4-41"), (None, "work"),
+                          ("BL08J/BL08J-MO-IOC-01", "1-0")])
+
+    @patch('dls_ade.dls_environment.SafeConfigParser')
+    @patch('dls_ade.dls_environment.os.path.isfile', return_value=True)
+    def test_given_module_ini_then_read_once(self, _1, mock_parser):
+        mock_parser.return_value.get.return_value = "asyn"
+        paths = ["/dls_sw/work/R3.14.12.7/support/asyn"] * 3
+
+        self.assertEqual(self.env.classify_paths(paths),
+                         [("asyn", "work")] * 3)
+        self.assertEqual(mock_parser.return_value.read.call_count, 1)
+
+    @patch('dls_ade.dls_environment.SafeConfigParser')
+    @patch('dls_ade.dls_environment.os.path.isfile', return_value=True)
+    def test_given_ini_cache_then_names_reused(self, _1, mock_parser):
+        ini_cache = {
+            "/dls_sw/work/R3.14.12.7/support/asyn/etc/module.ini": "cached"}
+
+        self.assertEqual(
+            self.env.classify_paths(["/dls_sw/work/R3.14.12.7/support/asyn"],
+                                    ini_cache),
+            [("cached", "work")])
+        self.assertFalse(mock_parser.called)
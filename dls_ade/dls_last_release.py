@@ -10,10 +10,14 @@ import sys
 import logging
 import csv
 import argparse
-import requests
+import sqlite3
 
 from dls_ade.constants import GELFLOG_SERVER
-from dls_ade import logconfig
+from dls_ade import logconfig, lazy_import
+from dls_ade import profiling
+from dls_ade import dls_release_history
+
+requests = lazy_import("requests")
 
 USER = os.getenv("USER")
 # Read-only API token for Graylog - see GRAYLOG_TOKEN.md
@@ -70,6 +74,7 @@ def make_parser():
         description=usage,
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
+    profiling.add_profile_arg(parser)
     parser.add_argument(
         "-w", "--wait", action="store_true",
         help="If set, wait for the most recent build to finish")
@@ -114,6 +119,7 @@ def create_graylog_query(query_str, time_frame):
     return query_params
 
 
+@profiling.timed("graylog")
 def graylog_request(params):
     """Make a graylog request
 
@@ -259,11 +265,51 @@ def get_build_jobs(time_frame, user=USER, njobs=1, local=False):
     Returns:
         list of str: List of build names
     """
+    if user == USER and not local:
+        build_jobs = get_build_jobs_from_history(time_frame, user, njobs)
+        if build_jobs:
+            return build_jobs
+
     graylog_dicts_list = get_graylog_response(create_build_job_query(user, time_frame, local))
     build_jobs = extract_build_jobs(graylog_dicts_list, time_frame, njobs=njobs)
     return build_jobs
 
 
+def get_build_jobs_from_history(time_frame, user=USER, njobs=1):
+    """Get a list of latest njobs builds for a user from the local release
+    history, which is only written for build server submissions made on this
+    account
+
+    Args:
+        time_frame(int): Search period in hours
+        user(str): Fed ID
+        njobs(int): Number of results
+
+    Returns:
+        list of str: List of build names, empty if none were found
+    """
+    since = time.time() - time_frame*60*60
+    try:
+        history = dls_release_history.open_history()
+        try:
+            builds = history.builds(user=user, since=since, limit=njobs)
+        finally:
+            history.close()
+    except (sqlite3.Error, IOError, OSError) as e:
+        logging.getLogger("dls_ade").warning(
+            "Unable to read release history: {}".format(e))
+        return []
+
+    build_name = dls_release_history.COLUMNS.index("build_name")
+    build_jobs = [build[build_name] for build in builds]
+    if build_jobs and njobs > len(build_jobs):
+        logging.getLogger("usermessages").info(str(len(build_jobs)) +
+                                               " build jobs in last " +
+                                               str(time_frame) +
+                                               " hours. Use -t to specify search range")
+    return build_jobs
+
+
 def parse_timestamp(timestamp):
     [date, rest] = timestamp.split("T")
     [time, rest] = rest.split(".")
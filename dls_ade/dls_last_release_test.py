@@ -122,3 +122,19 @@ def test_parse_timestamp(response):
 def test_find_log_file(started_dict, expected, ext):
     assert dls_last_release.find_file(started_dict, ext) == expected
 
+
+@mock.patch('dls_ade.dls_last_release.USER', 'abc12345')
+def test_get_build_jobs_for_current_user_uses_release_history():
+    with mock.patch('dls_ade.dls_last_release.get_build_jobs_from_history') as mocked_history, \
+            mock.patch('dls_ade.dls_last_release.get_graylog_response') as mocked_graylog_response:
+        mocked_history.return_value = build_jobs[:1]
+        assert dls_last_release.get_build_jobs(time_frame, user='abc12345', njobs=1) == build_jobs[:1]
+        assert not mocked_graylog_response.called
+
+@mock.patch('dls_ade.dls_last_release.USER', 'abc12345')
+def test_get_build_jobs_falls_back_to_graylog_without_history():
+    with mock.patch('dls_ade.dls_last_release.get_build_jobs_from_history') as mocked_history, \
+            mock.patch('dls_ade.dls_last_release.get_graylog_response') as mocked_graylog_response:
+        mocked_history.return_value = []
+        mocked_graylog_response.return_value = build_job_response
+        assert dls_last_release.get_build_jobs(time_frame, user='abc12345', njobs=5) == build_jobs
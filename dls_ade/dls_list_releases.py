@@ -11,6 +11,7 @@ import os
 import sys
 import shutil
 import json
+import sqlite3
 import platform
 import logging
 
@@ -19,6 +20,7 @@ from dls_ade.argument_parser import ArgParser
 from dls_ade.dls_utilities import check_technical_area
 from dls_ade import vcs_git, Server
 from dls_ade import logconfig
+from dls_ade import prod_index
 
 usage = """
 Default <area> is 'support'.
@@ -27,6 +29,8 @@ List the releases of <module_name> in the <area> area of prod or the repository
 if -g is true. By default uses the epics release number from your environment 
 to work out the area on disk to look for the module, this can be overridden 
 with the -e flag.
+Releases in prod are looked up in a local index, which is refreshed from the
+file system where it has changed. --rescan forces a full refresh.
 """
 
 
@@ -48,6 +52,45 @@ def get_rhel_version():
         return default_rhel_version
 
 
+def list_prod_releases(area_dir, module, archived=False, rescan=False):
+    """
+    List the releases of a module in prod, using the prod index where
+    possible.
+
+    Args:
+        area_dir(str): Prod area directory
+        module(str): Module name
+        archived(bool): List the archived releases instead of the live ones
+        rescan(bool): Refresh the index from the file system
+
+    Returns:
+        list of str: Releases, unsorted
+
+    """
+    try:
+        index = prod_index.ProdIndex()
+        try:
+            index.refresh(area_dir, modules=[module], rescan=rescan)
+            return index.releases(area_dir, module, archived)
+        finally:
+            index.close()
+    except (sqlite3.Error, OSError) as e:
+        logging.getLogger(name="dls_ade").warning(
+            "Prod index not available: {}".format(e))
+
+    release_dir = os.path.join(area_dir, module)
+    releases = []
+    if os.path.isdir(release_dir):
+        for p in os.listdir(release_dir):
+            if archived:
+                release = prod_index.archived_release(p)
+                if release is not None:
+                    releases.append(release)
+            elif os.path.isdir(os.path.join(release_dir, p)):
+                releases.append(p)
+    return releases
+
+
 def make_parser():
     """
     Takes ArgParse instance with default arguments and adds
@@ -61,6 +104,8 @@ def make_parser():
         * -g (git)
         * -e (epics_version)
         * -r (rhel_version)
+        * -A (archived)
+        * --rescan
 
     Returns:
         :class:`argparse.ArgumentParser`:  ArgParse instance
@@ -80,6 +125,14 @@ def make_parser():
         default=get_rhel_version(),
         help="Change the rhel version of the environment, default is " +
              get_rhel_version() + " (from your system)")
+    parser.add_argument(
+        "-A", "--archived", action="store_true", dest="archived",
+        help="List the releases in prod that have been archived with "
+             "dls-tar-module, instead of the live ones")
+    parser.add_argument(
+        "--rescan", action="store_true", dest="rescan",
+        help="Read the module's releases in prod from the file system again, "
+             "whether or not they appear to have changed")
 
     return parser
 
@@ -123,13 +176,11 @@ def _main():
     else:
         # List branches from prod
         target = "prod for {os}".format(os=env.rhelVerDir())
+        if args.archived:
+            target = "the archives in " + target
         source = env.prodArea(args.area)
-        release_dir = os.path.join(source, args.module_name)
-
-        if os.path.isdir(release_dir):
-            for p in os.listdir(release_dir):
-                if os.path.isdir(os.path.join(release_dir, p)):
-                    releases.append(p)
+        releases = list_prod_releases(source, args.module_name,
+                                      args.archived, args.rescan)
 
     # Check some releases have been made
     if len(releases) == 0:
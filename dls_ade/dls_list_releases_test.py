@@ -1,6 +1,7 @@
 #!/bin/env dls-python
 
 from dls_ade import dls_list_releases
+import sqlite3
 import unittest
 from argparse import _StoreAction
 from argparse import _StoreTrueAction
@@ -70,3 +71,43 @@ class MakeParserTest(unittest.TestCase):
         self.assertIsInstance(option, _StoreAction)
         self.assertEqual(option.dest, "rhel_version")
         self.assertIn("--rhel_version", option.option_strings)
+
+
+class ListProdReleasesTest(unittest.TestCase):
+
+    @patch('dls_ade.dls_list_releases.prod_index.ProdIndex')
+    def test_releases_read_from_refreshed_index(self, mock_index):
+        index = mock_index.return_value
+        index.releases.return_value = ["1-0"]
+
+        releases = dls_list_releases.list_prod_releases(
+            "/prod/support", "dummy", rescan=True)
+
+        index.refresh.assert_called_once_with(
+            "/prod/support", modules=["dummy"], rescan=True)
+        index.releases.assert_called_once_with(
+            "/prod/support", "dummy", False)
+        self.assertEqual(releases, ["1-0"])
+        index.close.assert_called_once_with()
+
+    @patch('dls_ade.dls_list_releases.os.path.isdir', return_value=True)
+    @patch('dls_ade.dls_list_releases.os.listdir', return_value=["1-0"])
+    @patch('dls_ade.dls_list_releases.prod_index.ProdIndex')
+    def test_given_index_locked_then_file_system_listed(self, mock_index, _2,
+                                                        _3):
+        index = mock_index.return_value
+        index.refresh.side_effect = sqlite3.OperationalError(
+            "database is locked")
+
+        self.assertEqual(dls_list_releases.list_prod_releases(
+            "/prod/support", "dummy"), ["1-0"])
+        index.close.assert_called_once_with()
+
+    @patch('dls_ade.dls_list_releases.os.path.isdir', return_value=True)
+    @patch('dls_ade.dls_list_releases.os.listdir',
+           return_value=["1-0", "0-9.tar.gz"])
+    @patch('dls_ade.dls_list_releases.prod_index.ProdIndex',
+           side_effect=OSError("read-only"))
+    def test_given_no_index_then_file_system_listed(self, _1, _2, _3):
+        self.assertEqual(dls_list_releases.list_prod_releases(
+            "/prod/support", "dummy", archived=True), ["0-9"])
@@ -0,0 +1,525 @@
+#!/bin/env dls-python
+# This script comes from the dls_scripts python module
+"""
+Report which modules depend on which, from the configure/RELEASE file of
+the latest release of every module on the repository
+"""
+
+import os
+import sys
+import json
+import logging
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from dls_ade import Server
+from dls_ade import configure_release
+from dls_ade import dls_version
+from dls_ade import local_store
+from dls_ade import logconfig
+from dls_ade import prod_index
+from dls_ade.argument_parser import ArgParser
+from dls_ade.dls_environment import environment, latest
+from dls_ade.dls_utilities import remove_git_at_end
+
+log = logging.getLogger(name="dls_ade")
+usermsg = logging.getLogger(name="usermessages")
+output = logging.getLogger(name="output")
+
+CACHE_FILE = "module_dependencies.json"
+
+# Areas whose modules have a configure/RELEASE file
+RELEASE_AREAS = ["support", "ioc"]
+
+usage = """
+Default <area> is 'support'.
+Report the dependencies between the modules of an area, as given by the
+configure/RELEASE file of the latest release of each module. References to
+support modules are found in every area, so -i reports which IOCs use which
+support modules.
+With no flags, list the modules each module depends on. With -r, list the
+modules that depend on each module instead. -t follows dependencies
+transitively and -o prints the order in which to build the modules.
+The RELEASE files are cached by commit, so only modules that have been
+released since the last run are read again.
+With --prod, list the releases installed in prod that are built against
+support modules instead, from their installed RELEASE files.
+e.g. %(prog)s -r -t asyn lists every module that would be affected by a
+change to asyn, and %(prog)s -r --prod --release 4-41 asyn lists the
+releases that use asyn 4-41.
+"""
+
+# The latest release of a module. dependencies are the (module, version)
+# support module releases that its configure/RELEASE refers to.
+ModuleRelease = namedtuple("ModuleRelease", ["module", "version", "sha",
+                                             "dependencies"])
+
+
+def make_parser():
+    """
+    Takes ArgParse instance with default arguments and adds
+
+    Positional Arguments:
+        * modules
+
+    Flags:
+        * -r (reverse)
+        * -t (transitive)
+        * -o (order)
+        * -j (jobs)
+        * --prod
+        * --release
+        * -e (epics_version)
+
+    Returns:
+        :class:`argparse.ArgumentParser`: ArgParse instance
+
+    """
+    parser = ArgParser(usage)
+    parser.add_argument(
+        "modules", nargs="*", type=str, default=[],
+        help="Modules to report on. Default is every module in the area")
+    parser.add_argument(
+        "-r", "--reverse", action="store_true", dest="reverse",
+        help="List the modules that depend on each module")
+    parser.add_argument(
+        "-t", "--transitive", action="store_true", dest="transitive",
+        help="Include indirect dependencies")
+    parser.add_argument(
+        "-o", "--order", action="store_true", dest="order",
+        help="Print the modules and their dependencies in the order they "
+             "should be built")
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, default=16, dest="jobs",
+        help="Number of modules to read at the same time. Default is 16")
+    parser.add_argument(
+        "--prod", action="store_true", dest="prod",
+        help="With -r, list the releases installed in prod that use the "
+             "support modules")
+    parser.add_argument(
+        "--release", action="store", type=str, dest="release",
+        help="With --prod, only list the users of this release")
+    parser.add_epics_version_flag()
+
+    return parser
+
+
+def release_dependencies(text):
+    """
+    Find the support module releases a configure/RELEASE file refers to.
+
+    Args:
+        text(str): Contents of the file
+
+    Returns:
+        list of tuple(str, str): (module, version) of each reference to a
+            module in the prod support area of the EPICS version the file
+            uses
+    """
+    release = configure_release.parse_release(text)
+    epics = configure_release.EPICS_BASE_RE.findall(
+        "\n".join(release.values()))
+    env = environment(epics[0] if epics else None)
+    return configure_release.module_references(release,
+                                               env.prodArea("support"))
+
+
+def latest_tag(tags, area):
+    """
+    Choose the latest release from the tags of a module.
+
+    Args:
+        tags(list of tuple(str, str)): Name and sha of each tag
+        area(str): Area of the module, for the versioning convention
+
+    Returns:
+        tuple(str, str): Name and sha of the latest tag that follows the
+            convention, or None if there is none
+    """
+    releases = [tag for tag in tags if dls_version.parse(tag[0], area).valid]
+    if not releases:
+        return None
+    return latest(releases)
+
+
+def load_cache(path=None):
+    """
+    Read the cache of RELEASE file dependencies.
+
+    Args:
+        path(str): Cache file. Default is in the local store.
+
+    Returns:
+        dict: Commit sha to list of (module, version) dependencies. Empty if
+            there is no cache or it cannot be read.
+    """
+    if path is None:
+        path = local_store.cache_path(CACHE_FILE)
+    try:
+        with open(path, "r") as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    return dict((sha, [tuple(dependency) for dependency in dependencies])
+                for sha, dependencies in cache.items())
+
+
+def save_cache(cache, path=None):
+    """
+    Write the cache of RELEASE file dependencies, replacing the file in one
+    step so that concurrent readers never see part of it.
+
+    Args:
+        cache(dict): Commit sha to list of (module, version) dependencies
+        path(str): Cache file. Default is in the local store.
+
+    """
+    if path is None:
+        path = local_store.cache_path(CACHE_FILE)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp_path, "w") as f:
+        json.dump(cache, f, sort_keys=True)
+    os.rename(temp_path, path)
+
+
+def read_module(server, repo, area, cache):
+    """
+    Find the latest release of a module and its dependencies.
+
+    Args:
+        server(:class:`~dls_ade.gitserver.GitServer`): Git server
+        repo(str): Server path of the module's repository
+        area(str): Area of the module
+        cache(dict): Commit sha to dependencies, which is only read
+
+    Returns:
+        :class:`ModuleRelease`: Latest release, or None if the module has
+            not been released
+    """
+    module = remove_git_at_end(repo).split(
+        server.dev_area_path(area) + "/", 1)[-1]
+    tag = latest_tag(server.list_tags(repo), area)
+    if tag is None:
+        return None
+    version, sha = tag
+    dependencies = cache.get(sha)
+    if dependencies is None:
+        text = server.get_file_contents(repo, "configure/RELEASE", version)
+        dependencies = release_dependencies(text) if text else []
+    return ModuleRelease(module, version, sha, dependencies)
+
+
+def build_graph(server, area, jobs=16, cache=None):
+    """
+    Read the dependencies of the latest release of every module in an area,
+    several modules at a time.
+
+    Args:
+        server(:class:`~dls_ade.gitserver.GitServer`): Git server
+        area(str): Area
+        jobs(int): Number of modules to read at the same time
+        cache(dict): Commit sha to dependencies. RELEASE files of commits in
+            the cache are not read, and the dependencies read are added.
+
+    Returns:
+        :class:`DependencyGraph`: Graph of the released modules
+    """
+    if cache is None:
+        cache = {}
+    repos = server.get_server_repo_list(server.dev_area_path(area))
+    if not repos:
+        return DependencyGraph([])
+
+    pool = ThreadPool(max(1, min(jobs, len(repos))))
+    try:
+        releases = pool.map(
+            lambda repo: read_module(server, repo, area, cache), repos)
+    finally:
+        pool.close()
+        pool.join()
+
+    releases = [release for release in releases if release is not None]
+    read = 0
+    for release in releases:
+        if release.sha not in cache:
+            cache[release.sha] = release.dependencies
+            read += 1
+    log.debug("Read {} of {} RELEASE files".format(read, len(releases)))
+    return DependencyGraph(releases)
+
+
+class DependencyGraph(object):
+    """
+    Dependencies between the latest releases of modules.
+
+    Modules are nodes and a module depends on another if its RELEASE file
+    refers to any release of it. Dependencies on modules that are not in the
+    graph are reported, but not followed.
+    """
+
+    def __init__(self, releases):
+        self.releases = dict((release.module, release)
+                             for release in releases)
+        self._dependents = {}
+        for release in releases:
+            for module, _ in release.dependencies:
+                self._dependents.setdefault(module, set()).add(
+                    release.module)
+
+    def __contains__(self, module):
+        return module in self.releases
+
+    def modules(self):
+        """Return the modules in the graph, sorted"""
+        return sorted(self.releases)
+
+    def dependencies(self, module):
+        """
+        Return the direct dependencies of a module.
+
+        Args:
+            module(str): Module name
+
+        Returns:
+            list of tuple(str, str): (module, version) releases the module
+                depends on, sorted
+        """
+        release = self.releases.get(module)
+        return sorted(release.dependencies) if release else []
+
+    def dependents(self, module):
+        """
+        Return the modules that depend directly on a module.
+
+        Args:
+            module(str): Module name
+
+        Returns:
+            list of tuple(str, str): (module, version) latest releases that
+                depend on the module, sorted
+        """
+        return sorted((dependent, self.releases[dependent].version)
+                      for dependent in self._dependents.get(module, ()))
+
+    def _closure(self, module, neighbours):
+        found = set()
+        pending = [module]
+        while pending:
+            for neighbour in neighbours(pending.pop()):
+                if neighbour not in found and neighbour != module:
+                    found.add(neighbour)
+                    pending.append(neighbour)
+        return sorted(found)
+
+    def transitive_dependencies(self, module):
+        """
+        Return every module a module depends on, directly or indirectly.
+
+        Args:
+            module(str): Module name
+
+        Returns:
+            list of str: Module names, sorted
+        """
+        return self._closure(module, lambda name: [
+            dependency for dependency, _ in self.dependencies(name)])
+
+    def transitive_dependents(self, module):
+        """
+        Return every module that depends on a module, directly or
+        indirectly.
+
+        Args:
+            module(str): Module name
+
+        Returns:
+            list of str: Module names, sorted
+        """
+        return self._closure(
+            module, lambda name: self._dependents.get(name, ()))
+
+    def build_order(self, modules=None):
+        """
+        Order modules so that each comes after the modules it depends on.
+
+        Args:
+            modules(list of str): Modules to order, with their dependencies.
+                Default is every module in the graph.
+
+        Returns:
+            list of str: Module names in the graph. Modules that can be built
+                at the same point are in alphabetical order.
+
+        Raises:
+            :class:`exceptions.ValueError`: The modules depend on each other
+                in a cycle
+        """
+        if modules is None:
+            selected = set(self.releases)
+        else:
+            selected = set()
+            for module in modules:
+                if module in self.releases:
+                    selected.add(module)
+                    selected.update(self.transitive_dependencies(module))
+            selected &= set(self.releases)
+
+        remaining = dict(
+            (module, set(dependency for dependency, _ in
+                         self.releases[module].dependencies
+                         if dependency in selected and dependency != module))
+            for module in selected)
+        order = []
+        ready = sorted(module for module, dependencies in remaining.items()
+                       if not dependencies)
+        while ready:
+            module = ready.pop(0)
+            order.append(module)
+            del remaining[module]
+            unblocked = []
+            for dependent in self._dependents.get(module, ()):
+                dependencies = remaining.get(dependent)
+                if dependencies is not None and module in dependencies:
+                    dependencies.discard(module)
+                    if not dependencies:
+                        unblocked.append(dependent)
+            ready = sorted(ready + unblocked)
+
+        if remaining:
+            raise ValueError("Modules depend on each other in a cycle: " +
+                             ", ".join(sorted(remaining)))
+        return order
+
+
+def format_releases(releases):
+    """Format (module, version) releases, one per line"""
+    return "\n".join("    {} {}".format(module, version)
+                     for module, version in releases)
+
+
+def format_prod_dependents(module, dependents):
+    """
+    Format the installed releases that use a support module.
+
+    Args:
+        module(str): Support module name
+        dependents(list of tuple): From
+            :meth:`~dls_ade.prod_index.ProdIndex.dependents`
+
+    Returns:
+        str: Releases of the module, each followed by the releases using it
+
+    """
+    by_release = {}
+    for area_dir, dependent, release, dep_release in dependents:
+        by_release.setdefault(dep_release, []).append(
+            "    {} {}".format(os.path.join(area_dir, dependent), release))
+    return "\n".join("{} {}\n{}".format(module, dep_release,
+                                        "\n".join(by_release[dep_release]))
+                     for dep_release in sorted(by_release))
+
+
+def prod_dependents(modules, release, epics_version, jobs):
+    """
+    Print the installed releases that use support modules, from the prod
+    index.
+
+    Args:
+        modules(list of str): Support module names
+        release(str): Only users of this release of the modules
+        epics_version(str): EPICS version of the prod area
+        jobs(int): Number of RELEASE files to read at the same time
+
+    Returns:
+        int: 0 if any users were found, otherwise 1
+
+    """
+    env = environment()
+    env.check_epics_version(epics_version)
+    index = prod_index.ProdIndex()
+    try:
+        dep_dir = prod_index.refresh_dependents(index, env, jobs=jobs)
+        found = False
+        for module in modules:
+            dependents = index.dependents(dep_dir, module, release)
+            if not dependents:
+                usermsg.info("No installed releases use {}{}".format(
+                    module, " " + release if release else ""))
+                continue
+            found = True
+            output.info(format_prod_dependents(module, dependents))
+    finally:
+        index.close()
+    return 0 if found else 1
+
+
+def _main():
+    parser = make_parser()
+    args = parser.parse_args()
+
+    log.info(json.dumps({'CLI': sys.argv, 'options_args': vars(args)}))
+
+    if args.area not in RELEASE_AREAS:
+        parser.error("Dependencies are only known for the {} areas".format(
+            " and ".join(RELEASE_AREAS)))
+    if args.jobs < 1:
+        parser.error("--jobs must be positive")
+    if args.prod and (not args.reverse or args.transitive or args.order or
+                      not args.modules):
+        parser.error("--prod needs -r and modules and cannot be used with "
+                     "-t or -o")
+    if args.release and not args.prod:
+        parser.error("--release can only be used with --prod")
+
+    if args.prod:
+        return prod_dependents(args.modules, args.release,
+                               args.epics_version, args.jobs)
+
+    usermsg.info("Reading the latest release of each module in the {} "
+                 "area".format(args.area))
+    cache = load_cache()
+    graph = build_graph(Server(), args.area, args.jobs, cache)
+    save_cache(cache)
+
+    for module in args.modules:
+        if module not in graph:
+            usermsg.warning("{} has not been released".format(module))
+
+    if args.order:
+        order = graph.build_order(args.modules or None)
+        output.info("\n".join(order))
+        return 0
+
+    for module in args.modules or graph.modules():
+        release = graph.releases.get(module)
+        header = module if release is None else "{} {}".format(
+            module, release.version)
+        if args.reverse and args.transitive:
+            lines = "\n".join("    " + name for name in
+                              graph.transitive_dependents(module))
+        elif args.reverse:
+            lines = format_releases(graph.dependents(module))
+        elif args.transitive:
+            lines = "\n".join("    " + name for name in
+                              graph.transitive_dependencies(module))
+        else:
+            lines = format_releases(graph.dependencies(module))
+        output.info(header + ("\n" + lines if lines else ""))
+    return 0
+
+
+def main():
+    # Catch unhandled exceptions and ensure they're logged
+    try:
+        logconfig.setup_logging(application='dls-module-dependencies.py')
+        return _main()
+    except Exception as e:
+        logging.exception(e)
+        logging.getLogger("usermessages").exception(
+            "ABORT: Unhandled exception (see trace below): {}".format(e)
+        )
+        exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
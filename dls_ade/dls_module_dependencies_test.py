@@ -0,0 +1,178 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock
+
+from dls_ade import dls_module_dependencies
+from dls_ade.dls_module_dependencies import DependencyGraph, ModuleRelease
+
+ASYN_RELEASE = """
+SUPPORT = /dls_sw/prod/R3.14.12.7/support
+EPICS_BASE = /dls_sw/epics/R3.14.12.7/base
+"""
+
+MOTOR_RELEASE = """
+SUPPORT = /dls_sw/prod/R3.14.12.7/support
+WORK = /dls_sw/work/R3.14.12.7/support
+ASYN = $(SUPPORT)/asyn/4-41
+BUSY = $(WORK)/busy
+EPICS_BASE = /dls_sw/epics/R3.14.12.7/base
+"""
+
+
+def make_graph(dependencies):
+    return DependencyGraph([
+        ModuleRelease(module, "1-0", module + "sha",
+                      [(dependency, "1-0") for dependency in depends_on])
+        for module, depends_on in dependencies.items()])
+
+
+class ReleaseDependenciesTest(unittest.TestCase):
+
+    def test_given_prod_references_then_returned(self):
+        self.assertEqual(
+            dls_module_dependencies.release_dependencies(MOTOR_RELEASE),
+            [("asyn", "4-41")])
+
+    def test_given_references_of_other_epics_version_then_found(self):
+        text = MOTOR_RELEASE.replace("R3.14.12.7", "R7.0.4")
+
+        self.assertEqual(
+            dls_module_dependencies.release_dependencies(text),
+            [("asyn", "4-41")])
+
+    def test_given_no_references_then_empty(self):
+        self.assertEqual(
+            dls_module_dependencies.release_dependencies(ASYN_RELEASE), [])
+
+
+class LatestTagTest(unittest.TestCase):
+
+    def test_given_tags_then_latest_valid_returned(self):
+        tags = [("4-9", "a"), ("4-10", "b"), ("test", "c"), ("4-9dls1", "d")]
+
+        self.assertEqual(
+            dls_module_dependencies.latest_tag(tags, "support"), ("4-10", "b"))
+
+    def test_given_no_valid_tags_then_none(self):
+        self.assertIsNone(
+            dls_module_dependencies.latest_tag([("test", "c")], "support"))
+
+
+class BuildGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MagicMock()
+        self.server.dev_area_path.return_value = "controls/support"
+        self.server.get_server_repo_list.return_value = [
+            "controls/support/asyn.git", "controls/support/motor.git",
+            "controls/support/new.git"]
+        tags = {
+            "controls/support/asyn.git": [("4-41", "asynsha")],
+            "controls/support/motor.git": [("6-9", "motorsha"),
+                                           ("6-10", "motorsha2")],
+            "controls/support/new.git": [],
+        }
+        self.server.list_tags.side_effect = lambda repo: tags[repo]
+        files = {"asynsha": ASYN_RELEASE, "motorsha2": MOTOR_RELEASE}
+        self.server.get_file_contents.side_effect = \
+            lambda repo, path, ref: files[tags[repo][-1][1]]
+
+    def test_given_modules_then_latest_releases_in_graph(self):
+        graph = dls_module_dependencies.build_graph(self.server, "support")
+
+        self.assertEqual(graph.modules(), ["asyn", "motor"])
+        self.assertEqual(graph.releases["motor"].version, "6-10")
+        self.assertEqual(graph.dependencies("motor"), [("asyn", "4-41")])
+
+    def test_given_cached_sha_then_release_file_not_read(self):
+        cache = {"motorsha2": [("asyn", "4-40")]}
+
+        graph = dls_module_dependencies.build_graph(self.server, "support",
+                                                    cache=cache)
+
+        self.assertEqual(graph.dependencies("motor"), [("asyn", "4-40")])
+        self.assertEqual(self.server.get_file_contents.call_count, 1)
+        self.assertEqual(cache["asynsha"], [])
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "cache.json")
+
+    def test_saved_cache_loaded(self):
+        cache = {"sha": [("asyn", "4-41")]}
+
+        dls_module_dependencies.save_cache(cache, self.path)
+
+        self.assertEqual(dls_module_dependencies.load_cache(self.path), cache)
+        self.assertEqual(os.listdir(self.directory), ["cache.json"])
+
+    def test_given_no_cache_then_empty(self):
+        self.assertEqual(dls_module_dependencies.load_cache(self.path), {})
+
+    def test_given_corrupt_cache_then_empty(self):
+        with open(self.path, "w") as f:
+            f.write("{")
+
+        self.assertEqual(dls_module_dependencies.load_cache(self.path), {})
+
+
+class DependencyGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = make_graph({
+            "asyn": [],
+            "busy": ["asyn"],
+            "motor": ["asyn", "busy", "base"],
+            "ioc": ["motor"],
+        })
+
+    def test_dependents(self):
+        self.assertEqual(self.graph.dependents("asyn"),
+                         [("busy", "1-0"), ("motor", "1-0")])
+
+    def test_transitive_dependencies(self):
+        self.assertEqual(self.graph.transitive_dependencies("ioc"),
+                         ["asyn", "base", "busy", "motor"])
+
+    def test_transitive_dependents(self):
+        self.assertEqual(self.graph.transitive_dependents("asyn"),
+                         ["busy", "ioc", "motor"])
+
+    def test_build_order_puts_dependencies_first(self):
+        self.assertEqual(self.graph.build_order(),
+                         ["asyn", "busy", "motor", "ioc"])
+
+    def test_build_order_of_modules_includes_their_dependencies(self):
+        self.assertEqual(self.graph.build_order(["busy"]), ["asyn", "busy"])
+
+    def test_build_order_raises_for_cycle(self):
+        graph = make_graph({"a": ["b"], "b": ["a"], "c": []})
+
+        with self.assertRaises(ValueError):
+            graph.build_order()
+
+
+class FormatProdDependentsTest(unittest.TestCase):
+
+    def test_dependents_grouped_by_release(self):
+        dependents = [("/prod/ioc", "BL01I/IOC-01", "1-0", "4-41"),
+                      ("/prod/ioc", "BL02I/IOC-01", "2-0", "4-40"),
+                      ("/prod/support", "motor", "7-0", "4-41")]
+
+        self.assertEqual(
+            dls_module_dependencies.format_prod_dependents("asyn", dependents),
+            "asyn 4-40\n    /prod/ioc/BL02I/IOC-01 2-0\n"
+            "asyn 4-41\n    /prod/ioc/BL01I/IOC-01 1-0\n"
+            "    /prod/support/motor 7-0")
+
+
+if __name__ == '__main__':
+    unittest.main()
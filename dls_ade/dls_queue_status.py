@@ -0,0 +1,449 @@
+#!/bin/env dls-python
+# This script comes from the dls_scripts python module
+"""
+Show the position of submitted build jobs in the build server queue
+"""
+
+import os
+import sys
+import time
+import json
+import select
+import logging
+import argparse
+import getpass
+
+from dls_ade import dlsbuild
+from dls_ade import logconfig
+from dls_ade import profiling
+
+try:
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    _libc.inotify_init
+    _libc.inotify_add_watch
+except (ImportError, OSError, AttributeError):
+    _libc = None
+
+# inotify event masks, from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+# Number of finished builds from the release log used to estimate durations
+DURATION_SAMPLES = 20
+
+usage = """
+Show where your build jobs are in the build server queue.
+
+Jobs are listed per build server, together with the number of jobs ahead of
+them and an estimated time until they are picked up, based on how long your
+recent builds on that server took once they had started. With -w the queue
+directory is watched (using inotify where possible, polling otherwise) and you
+are told the moment each job is picked up by a build server.
+"""
+
+
+def make_parser():
+    """
+    Takes ArgParse instance and adds
+
+    Positional Arguments:
+        * build_name
+
+    Flags:
+        * -w (wait)
+        * -i (interval)
+        * -u (user)
+
+    Returns:
+        :class:`argparse.ArgumentParser`:  ArgParse instance
+    """
+    parser = argparse.ArgumentParser(
+        description=usage,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    profiling.add_profile_arg(parser)
+    parser.add_argument(
+        "build_name", nargs="?", type=str, default=None,
+        help="Build job to report on. Default is all of your queued jobs")
+    parser.add_argument(
+        "-w", "--wait", action="store_true",
+        help="Wait until the jobs have been picked up by a build server")
+    parser.add_argument(
+        "-i", "--interval", action="store", type=float, default=5.0,
+        help="Maximum time in seconds between checks of the queue when "
+             "waiting (default is 5)")
+    parser.add_argument(
+        "-u", "--user", action="store", type=str, default=getpass.getuser(),
+        help="Report the jobs of this user (default is $USER)")
+
+    return parser
+
+
+def parse_queue_file_name(file_name):
+    """
+    Split a queue file name into its build name and build server.
+
+    Args:
+        file_name(str): File name, e.g. <build_name>.redhat7-x86_64
+
+    Returns:
+        tuple(str, str): Build name, build server. None if the file is not a
+            build job.
+    """
+    if file_name.startswith("."):
+        return None
+    build_name, _, server = file_name.rpartition(".")
+    if not build_name:
+        return None
+    return build_name, server
+
+
+def list_queue(path=dlsbuild.queue_dir):
+    """
+    List the build jobs waiting in the queue directory.
+
+    Args:
+        path(str): Queue directory
+
+    Returns:
+        dict: Build server to a list of build names, oldest first
+    """
+    jobs = []
+    for file_name in os.listdir(path):
+        parsed = parse_queue_file_name(file_name)
+        if parsed is None:
+            continue
+        try:
+            submitted = os.stat(os.path.join(path, file_name)).st_mtime
+        except OSError:
+            # Picked up between listdir and stat
+            continue
+        jobs.append((submitted, parsed[0], parsed[1]))
+
+    queue = {}
+    for _, build_name, server in sorted(jobs):
+        queue.setdefault(server, []).append(build_name)
+    return queue
+
+
+def find_job(queue, build_name):
+    """
+    Find a build job in the queue.
+
+    Args:
+        queue(dict): Queue from :func:`list_queue`
+        build_name(str): Build job to look for
+
+    Returns:
+        tuple(str, int, int): Build server, number of jobs ahead and total
+            number of jobs for that server. None if the job is not queued.
+    """
+    for server, build_names in queue.items():
+        if build_name in build_names:
+            return server, build_names.index(build_name), len(build_names)
+    return None
+
+
+def user_jobs(queue, user):
+    """
+    Return the queued build names belonging to a user.
+
+    Args:
+        queue(dict): Queue from :func:`list_queue`
+        user(str): FED-ID
+
+    Returns:
+        list of str: Build names
+    """
+    jobs = []
+    for build_names in queue.values():
+        for build_name in build_names:
+            try:
+                if dlsbuild.split_build_name(build_name)[2] == user:
+                    jobs.append(build_name)
+            except ValueError:
+                continue
+    return jobs
+
+
+def read_release_log(path=dlsbuild.release_log):
+    """
+    Read the submissions recorded by :meth:`dlsbuild.Builder.submit`.
+
+    Args:
+        path(str): Release log file
+
+    Returns:
+        list of tuple: (build_dir, module, version, build_name, server) for
+            each submission, oldest first
+    """
+    entries = []
+    if not os.path.isfile(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) == 5:
+                entries.append(tuple(fields))
+    return entries
+
+
+def build_start_time(release_dir, build_name, submitted):
+    """
+    Work out when a build server picked up a build job.
+
+    The build log is created when the build starts, so its birth time is used
+    where the file system records one. Otherwise the time comes from the
+    files in the release directory, as the clone and checkout write them when
+    the job is picked up and do not touch them again. Times before the
+    submission are left out, being from an earlier build of the release.
+
+    Args:
+        release_dir(str): Directory the release was built in
+        build_name(str): Build job name, e.g. build_20200121-160509_...
+        submitted(float): Time the job was submitted, seconds since the epoch
+
+    Returns:
+        float: Time the build started, or None if it cannot be told
+    """
+    try:
+        created = os.stat(os.path.join(
+            release_dir, build_name + ".log")).st_birthtime
+        if created >= submitted:
+            return created
+    except (OSError, AttributeError):
+        pass
+
+    start = None
+    try:
+        names = os.listdir(release_dir)
+    except OSError:
+        return None
+    for name in names:
+        if name.startswith(build_name + "."):
+            continue
+        try:
+            modified = os.lstat(os.path.join(release_dir, name)).st_mtime
+        except OSError:
+            continue
+        if modified >= submitted and (start is None or modified < start):
+            start = modified
+    return start
+
+
+def recent_build_durations(entries, server=None, limit=DURATION_SAMPLES):
+    """
+    Work out how long recent builds took from being picked up by a build
+    server to completion, so without the time spent waiting in the queue.
+
+    A build is complete when its <build_name>.sta file has been written in the
+    release directory. See :func:`build_start_time` for when it started.
+
+    Args:
+        entries(list of tuple): Entries from :func:`read_release_log`
+        server(str): Only use builds on this build server, e.g.
+            redhat7-x86_64. All servers if None.
+        limit(int): Maximum number of durations to return
+
+    Returns:
+        list of float: Durations in seconds, newest build first
+    """
+    durations = []
+    for build_dir, module, version, build_name, build_server in \
+            reversed(entries):
+        if server is not None and build_server != server:
+            continue
+        release_dir = os.path.join(build_dir, module, version)
+        try:
+            finished = os.stat(
+                os.path.join(release_dir, build_name + ".sta")).st_mtime
+            submitted = dlsbuild.build_name_time(build_name)
+        except (OSError, ValueError):
+            continue
+        started = build_start_time(release_dir, build_name, submitted)
+        if started is not None and finished >= started:
+            durations.append(finished - started)
+            if len(durations) == limit:
+                break
+    return durations
+
+
+def estimate_wait(jobs_ahead, durations):
+    """
+    Estimate how long until a job is picked up.
+
+    Args:
+        jobs_ahead(int): Number of jobs in front of it in the queue
+        durations(list of float): Recent build durations in seconds, from
+            pickup to completion, on the job's build server
+
+    Returns:
+        float: Estimated wait in seconds, or None without any durations
+    """
+    if not durations:
+        return None
+    ordered = sorted(durations)
+    median = ordered[len(ordered) // 2]
+    return jobs_ahead * median
+
+
+def format_duration(seconds):
+    """
+    Format a number of seconds as e.g. '1h 05m' or '3m 20s'.
+
+    Args:
+        seconds(float): Duration, or None
+
+    Returns:
+        str: Formatted duration
+    """
+    if seconds is None:
+        return "unknown"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return "{}h {:02d}m".format(hours, minutes)
+    return "{}m {:02d}s".format(minutes, seconds)
+
+
+class QueueWatcher(object):
+    """
+    Wait for changes to the queue directory.
+
+    inotify is used where the C library provides it, so that jobs being
+    picked up are noticed straight away. As inotify does not see changes made
+    by other NFS clients, the directory is always re-checked at least every
+    `interval` seconds as well.
+    """
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self._fd = None
+
+        if _libc is not None:
+            fd = _libc.inotify_init()
+            if fd >= 0:
+                mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+                path_arg = path.encode() if not isinstance(path, bytes) \
+                    else path
+                if _libc.inotify_add_watch(fd, path_arg, mask) >= 0:
+                    self._fd = fd
+                else:
+                    os.close(fd)
+
+    @property
+    def using_inotify(self):
+        return self._fd is not None
+
+    def wait(self):
+        """Block until the directory changes or the interval expires."""
+        if self._fd is None:
+            time.sleep(self.interval)
+            return
+
+        readable, _, _ = select.select([self._fd], [], [], self.interval)
+        if readable:
+            # Discard the events; the queue is listed again by the caller
+            os.read(self._fd, 4096)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def report_jobs(build_names, queue, entries):
+    """
+    Log the queue position of each build job.
+
+    Args:
+        build_names(list of str): Build jobs to report on
+        queue(dict): Queue from :func:`list_queue`
+        entries(list of tuple): Entries from :func:`read_release_log`, for
+            the durations of recent builds on each server
+
+    Returns:
+        list of str: The jobs that are still queued
+    """
+    output = logging.getLogger(name="output")
+
+    durations = {}
+    queued = []
+    for build_name in build_names:
+        found = find_job(queue, build_name)
+        if found is None:
+            output.info("{}: picked up by a build server".format(build_name))
+            continue
+        server, ahead, total = found
+        queued.append(build_name)
+        if server not in durations:
+            durations[server] = recent_build_durations(entries, server)
+        output.info(
+            "{build_name}: queued for {server}, {ahead} of {total} jobs "
+            "ahead, estimated start in {eta}".format(
+                build_name=build_name, server=server, ahead=ahead,
+                total=total,
+                eta=format_duration(
+                    estimate_wait(ahead, durations[server]))))
+    return queued
+
+
+def _main():
+    log = logging.getLogger(name="dls_ade")
+    usermsg = logging.getLogger(name="usermessages")
+
+    parser = make_parser()
+    args = parser.parse_args()
+
+    log.info(json.dumps({'CLI': sys.argv, 'options_args': vars(args)}))
+
+    queue = list_queue()
+    if args.build_name:
+        build_names = [args.build_name]
+    else:
+        build_names = user_jobs(queue, args.user)
+        if not build_names:
+            usermsg.info("No build jobs queued for {}".format(args.user))
+            return 0
+
+    queued = report_jobs(build_names, queue, read_release_log())
+    if not args.wait:
+        return 0
+
+    watcher = QueueWatcher(dlsbuild.queue_dir, args.interval)
+    log.debug("Watching queue with inotify: {}".format(
+        watcher.using_inotify))
+    try:
+        while queued:
+            watcher.wait()
+            queue = list_queue()
+            picked_up = [b for b in queued if find_job(queue, b) is None]
+            for build_name in picked_up:
+                usermsg.info("\a{}: picked up at {}".format(
+                    build_name, time.ctime()))
+            queued = [b for b in queued if b not in picked_up]
+    finally:
+        watcher.close()
+    return 0
+
+
+def main():
+    # Catch unhandled exceptions and ensure they're logged
+    try:
+        logconfig.setup_logging(application='dls-queue-status.py')
+        return _main()
+    except Exception as e:
+        logging.exception(e)
+        logging.getLogger("usermessages").exception(
+            "ABORT: Unhandled exception (see trace below): {}".format(e)
+        )
+        exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
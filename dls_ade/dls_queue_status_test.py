@@ -0,0 +1,217 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from mock import patch
+from argparse import _StoreTrueAction
+
+from dls_ade import dls_queue_status
+
+
+BUILD_1 = "build_20200121-160509_abc12345_support_motor_7-0"
+BUILD_2 = "build_20200121-160600_xyz98765_ioc_BL08J_BL08J-MO-IOC-01_1-2"
+BUILD_3 = "build_20200121-160700_abc12345_support_asyn_4-41"
+
+
+class MakeParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = dls_queue_status.make_parser()
+
+    def test_wait_argument_has_correct_attributes(self):
+        option = self.parser._option_string_actions['-w']
+        self.assertIsInstance(option, _StoreTrueAction)
+        self.assertEqual(option.dest, "wait")
+        self.assertIn("--wait", option.option_strings)
+
+    def test_build_name_is_optional(self):
+        args = self.parser.parse_args([])
+
+        self.assertIsNone(args.build_name)
+
+
+class ParseQueueFileNameTest(unittest.TestCase):
+
+    def test_given_queue_file_then_build_name_and_server_returned(self):
+        parsed = dls_queue_status.parse_queue_file_name(
+            BUILD_1 + ".redhat7-x86_64")
+
+        self.assertEqual(parsed, (BUILD_1, "redhat7-x86_64"))
+
+    def test_given_version_with_dots_then_split_at_last_dot(self):
+        parsed = dls_queue_status.parse_queue_file_name(
+            "build_20200121-160509_abc12345_python3_pkg_1.2.windows6-x86")
+
+        self.assertEqual(
+            parsed,
+            ("build_20200121-160509_abc12345_python3_pkg_1.2", "windows6-x86"))
+
+    def test_given_hidden_or_plain_file_then_none_returned(self):
+        self.assertIsNone(dls_queue_status.parse_queue_file_name(".tmp.x"))
+        self.assertIsNone(dls_queue_status.parse_queue_file_name("README"))
+
+
+class ListQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.queue_dir)
+
+    def add_job(self, build_name, server, submitted):
+        path = os.path.join(self.queue_dir, build_name + "." + server)
+        open(path, "w").close()
+        os.utime(path, (submitted, submitted))
+
+    def test_jobs_grouped_by_server_oldest_first(self):
+        self.add_job(BUILD_3, "redhat7-x86_64", 300)
+        self.add_job(BUILD_1, "redhat7-x86_64", 100)
+        self.add_job(BUILD_2, "windows6-x86", 200)
+
+        queue = dls_queue_status.list_queue(self.queue_dir)
+
+        self.assertEqual(queue, {"redhat7-x86_64": [BUILD_1, BUILD_3],
+                                 "windows6-x86": [BUILD_2]})
+
+
+class FindJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = {"redhat7-x86_64": [BUILD_1, BUILD_3],
+                      "windows6-x86": [BUILD_2]}
+
+    def test_given_queued_job_then_server_position_and_total_returned(self):
+        self.assertEqual(dls_queue_status.find_job(self.queue, BUILD_3),
+                         ("redhat7-x86_64", 1, 2))
+
+    def test_given_job_not_queued_then_none_returned(self):
+        self.assertIsNone(dls_queue_status.find_job(self.queue, "other"))
+
+    def test_user_jobs_returns_only_that_users_jobs(self):
+        jobs = dls_queue_status.user_jobs(self.queue, "abc12345")
+
+        self.assertEqual(sorted(jobs), sorted([BUILD_1, BUILD_3]))
+
+
+def timestamp(hour, minute, second):
+    return time.mktime((2020, 1, 21, hour, minute, second, 0, 0, -1))
+
+
+class RecentBuildDurationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.build_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.build_dir)
+
+    def touch(self, path, modified):
+        open(path, "w").close()
+        os.utime(path, (modified, modified))
+
+    def add_build(self, module, version, build_name, started, finished):
+        release_dir = os.path.join(self.build_dir, module, version)
+        os.makedirs(release_dir)
+        self.touch(os.path.join(release_dir, "Makefile"), started)
+        self.touch(os.path.join(release_dir, build_name + ".log"), finished)
+        self.touch(os.path.join(release_dir, build_name + ".sta"), finished)
+        return release_dir
+
+    def test_duration_measured_from_checkout_to_status_file(self):
+        # Submitted at 16:05:09, picked up at 16:07:09
+        self.add_build("motor", "7-0", BUILD_1,
+                       timestamp(16, 7, 9), timestamp(16, 15, 9))
+        entries = [
+            (self.build_dir, "motor", "7-0", BUILD_1, "redhat7-x86_64"),
+            (self.build_dir, "asyn", "4-41", BUILD_3, "redhat7-x86_64"),
+        ]
+
+        durations = dls_queue_status.recent_build_durations(entries)
+
+        self.assertEqual(durations, [480])
+
+    def test_given_files_from_before_submission_then_ignored(self):
+        release_dir = self.add_build("motor", "7-0", BUILD_1,
+                                     timestamp(16, 7, 9), timestamp(16, 15, 9))
+        self.touch(os.path.join(release_dir, "README"), timestamp(9, 0, 0))
+        entries = [
+            (self.build_dir, "motor", "7-0", BUILD_1, "redhat7-x86_64"),
+        ]
+
+        durations = dls_queue_status.recent_build_durations(entries)
+
+        self.assertEqual(durations, [480])
+
+    def test_given_no_checked_out_files_then_build_skipped(self):
+        release_dir = self.add_build("motor", "7-0", BUILD_1,
+                                     timestamp(16, 7, 9), timestamp(16, 15, 9))
+        os.remove(os.path.join(release_dir, "Makefile"))
+        entries = [
+            (self.build_dir, "motor", "7-0", BUILD_1, "redhat7-x86_64"),
+        ]
+
+        durations = dls_queue_status.recent_build_durations(entries)
+
+        self.assertEqual(durations, [])
+
+    def test_given_server_then_only_its_builds_used(self):
+        self.add_build("motor", "7-0", BUILD_1,
+                       timestamp(16, 7, 9), timestamp(16, 15, 9))
+        self.add_build("asyn", "4-41", BUILD_3,
+                       timestamp(16, 8, 0), timestamp(16, 9, 0))
+        entries = [
+            (self.build_dir, "motor", "7-0", BUILD_1, "redhat7-x86_64"),
+            (self.build_dir, "asyn", "4-41", BUILD_3, "redhat6-x86_64"),
+        ]
+
+        self.assertEqual(dls_queue_status.recent_build_durations(
+            entries, "redhat7-x86_64"), [480])
+        self.assertEqual(dls_queue_status.recent_build_durations(
+            entries, "redhat6-x86_64"), [60])
+        self.assertEqual(dls_queue_status.recent_build_durations(entries),
+                         [60, 480])
+
+
+class ReportJobsTest(unittest.TestCase):
+
+    @patch('dls_ade.dls_queue_status.recent_build_durations',
+           return_value=[60])
+    def test_given_queued_jobs_then_durations_of_their_server_used(
+            self, mock_durations):
+        queue = {"redhat7-x86_64": [BUILD_1, BUILD_3],
+                 "redhat6-x86_64": [BUILD_2]}
+        entries = [("/build", "motor", "7-0", BUILD_1, "redhat7-x86_64")]
+
+        queued = dls_queue_status.report_jobs([BUILD_1, BUILD_3], queue,
+                                              entries)
+
+        self.assertEqual(queued, [BUILD_1, BUILD_3])
+        mock_durations.assert_called_once_with(entries, "redhat7-x86_64")
+
+
+class EstimateWaitTest(unittest.TestCase):
+
+    def test_given_no_durations_then_none_returned(self):
+        self.assertIsNone(dls_queue_status.estimate_wait(3, []))
+
+    def test_given_durations_then_median_used_per_job_ahead(self):
+        self.assertEqual(
+            dls_queue_status.estimate_wait(2, [10, 600, 60]), 120)
+
+    def test_format_duration(self):
+        self.assertEqual(dls_queue_status.format_duration(200), "3m 20s")
+        self.assertEqual(dls_queue_status.format_duration(3900), "1h 05m")
+        self.assertEqual(dls_queue_status.format_duration(None), "unknown")
+
+
+class QueueWatcherTest(unittest.TestCase):
+
+    @patch('dls_ade.dls_queue_status._libc', None)
+    @patch('dls_ade.dls_queue_status.time.sleep')
+    def test_given_no_inotify_then_polls(self, mock_sleep):
+        watcher = dls_queue_status.QueueWatcher("/tmp", 2.5)
+
+        watcher.wait()
+
+        self.assertFalse(watcher.using_inotify)
+        mock_sleep.assert_called_once_with(2.5)
@@ -14,18 +14,25 @@ increment of the previous release. The git flag will create the release from
 the server
 """
 
+import os
 import sys
 import json
-import re
+import time
 import logging
+import platform
+import sqlite3
 
 from dls_ade import Server
+from dls_ade import configure_release
 from dls_ade import dlsbuild
+from dls_ade import dls_version
 from dls_ade import logconfig
+from dls_ade import prod_index
 from dls_ade.argument_parser import ArgParser
-from dls_ade.dls_environment import environment
+from dls_ade.constants import BUILD_SERVERS
+from dls_ade.dls_environment import environment, latest
 from dls_ade.exceptions import VCSGitError
-from dls_ade.dls_utilities import check_tag_is_valid
+from dls_ade.dls_utilities import run_concurrently
 
 usage = """Default <area> is 'support'.
  Release <module_name> at tag <release> from <area>.
@@ -39,6 +46,7 @@ usage = """Default <area> is 'support'.
 
 log = logging.getLogger(name="dls_ade")
 usermsg = logging.getLogger(name="usermessages")
+output = logging.getLogger(name="output")
 
 
 def make_parser():
@@ -58,9 +66,13 @@ def make_parser():
         * -T (test_build_only
         * -m (message)
         * -n (next_version)
-        * -r (rhel_version) or --w (windows arguments)
+        * -r (rhel_version), -w (windows arguments) or --targets
         * -g (redundant_argument)
         * -c (commit)
+        * --incremental
+        * --ccache
+        * --epics-matrix
+        * --check-dependents
 
     Returns:
         :class:`argparse.ArgumentParser`: ArgParse instance
@@ -115,6 +127,27 @@ def make_parser():
              "This option can also be used to execute only test builds "
              "at the given commit by omitting <release> and using "
              "either -T or -l. This avoids having to tag to do a test build.")
+    parser.add_argument(
+        "--incremental", action="store_true", dest="incremental",
+        help="Make the local test build in a build tree that is kept "
+             "between test builds of the module, without cleaning it, using "
+             "parallel make. Linux support and ioc modules only.")
+    parser.add_argument(
+        "--ccache", action="store_true", dest="ccache",
+        help="Compile the local test build through ccache, if installed")
+    parser.add_argument(
+        "--epics-matrix", action="store", dest="epics_matrix", nargs="?",
+        const="all", default=None, metavar="VERSIONS",
+        help="Only make local test builds, one for each of a comma "
+             "separated list of EPICS versions, at the same time. Default "
+             "is every EPICS version this machine's build server can build. "
+             "Prints a table of the results.")
+    parser.add_argument(
+        "--check-dependents", action="store_true", dest="check_dependents",
+        help="With -f, warn about the installed releases that are built "
+             "against the support module release being replaced. This "
+             "indexes the RELEASE files of prod support and ioc, which can "
+             "take minutes if the index is out of date.")
 
     title = "Build operating system arguments"
     desc = "Note: The following arguments are mutually exclusive - only use " \
@@ -142,6 +175,12 @@ def make_parser():
         "64 (windows-x64, R3.14.12.3, Server 2008), "
         "64_2012 (windows-x64, R3.14.12.7, Server 2012)"
         )
+    group.add_argument(
+        "--targets", action="store", dest="targets", type=str,
+        help="Release for several build servers at once, from a single "
+        "clone of the module. A comma separated list of the -r and -w "
+        "options or build server names, e.g. 7,64,64_2012. Local test "
+        "builds are made for the targets that match this machine.")
 
     return parser
 
@@ -177,6 +216,96 @@ def create_build_object(args):
     return build_object
 
 
+def parse_targets(targets):
+    """
+    Split the --targets argument into a list of build targets
+
+    Args:
+        targets(str): Comma separated targets
+
+    Returns:
+        list of str: Targets, in the order given without duplicates
+
+    """
+    parsed = []
+    for target in targets.split(","):
+        target = target.strip()
+        if target and target not in parsed:
+            parsed.append(target)
+    return parsed
+
+
+def matrix_epics_versions(epics_matrix):
+    """
+    Return the EPICS versions to build with for --epics-matrix
+
+    Args:
+        epics_matrix(str): 'all' or comma separated EPICS versions
+
+    Returns:
+        list of str: EPICS versions
+
+    Raises:
+        ValueError: If a version cannot be built on this machine
+
+    """
+    bld_os = "Windows" if platform.system() == "Windows" else "Linux"
+    local_versions = BUILD_SERVERS[bld_os].get(dlsbuild.default_server(), [])
+    if epics_matrix == "all":
+        return list(local_versions)
+
+    versions = []
+    for epics in epics_matrix.split(","):
+        epics = epics.strip()
+        if epics not in local_versions:
+            raise ValueError(
+                "EPICS {} cannot be built on this machine. Possible versions "
+                "are {}".format(epics, ", ".join(local_versions)))
+        if epics not in versions:
+            versions.append(epics)
+    return versions
+
+
+def create_build_objects(args):
+    """
+    Create a build object for each --targets entry or --epics-matrix version,
+    or the single build object selected by the other arguments otherwise
+
+    Each build object looks up the user's contact details, so they are
+    created concurrently.
+
+    Args:
+        args(:class:`argparse.Namespace`): Parser arguments
+
+    Returns:
+        list of :class:`~dls_ade.dlsbuild.Builder`: Build objects
+
+    Raises:
+        ValueError: If a target is not a known build server
+
+    """
+    if args.epics_matrix:
+        targets = matrix_epics_versions(args.epics_matrix)
+    elif args.targets:
+        targets = parse_targets(args.targets)
+    else:
+        return [create_build_object(args)]
+
+    def create(target):
+        if args.epics_matrix:
+            build_object = dlsbuild.default_build(target)
+        else:
+            build_object = dlsbuild.target_build(target, args.epics_version)
+        build_object.set_area(args.area)
+        build_object.set_force(args.force)
+        return build_object
+
+    build_objects, _ = run_concurrently(
+        [(target, lambda target=target: create(target))
+         for target in targets])
+    return [build_objects[target] for target in targets]
+
+
 def check_parsed_arguments_valid(args, parser):
     """
     Checks that incorrect arguments invoke parser errors
@@ -223,6 +352,20 @@ def check_parsed_arguments_valid(args, parser):
     # python3 and python3ext releases only valid for RHEL>=7
     elif args.area in {"python3", "python3ext"} and args.rhel_version == "6":
         parser.error("%s releases cannot be made for RHEL6" % args.area)
+    elif args.epics_matrix and args.area not in ("support", "ioc"):
+        parser.error("--epics-matrix is only possible for support and ioc "
+                     "modules")
+    elif args.epics_matrix and (args.windows or args.targets or
+                                args.incremental or args.skip_test or
+                                args.test_only):
+        parser.error("--epics-matrix only makes local test builds and "
+                     "cannot be used with -w, --targets, --incremental, -t "
+                     "or -T")
+    elif args.incremental and (args.windows or
+                               args.area not in dlsbuild.INCREMENTAL_AREAS):
+        parser.error("Incremental test builds are only possible for Linux "
+                     "{} modules".format(
+                         " and ".join(dlsbuild.INCREMENTAL_AREAS)))
 
 
 def format_argument_version(arg_version):
@@ -254,8 +397,7 @@ def next_version_number(releases):
     if len(releases) == 0:
         version = "0-1"
     else:
-        last_release = get_last_release(releases)
-        version = increment_version_number(last_release)
+        version = increment_version_number(get_last_release(releases))
     return version
 
 
@@ -270,7 +412,7 @@ def get_last_release(releases):
         str: Most recent release number
 
     """
-    last_release = environment().sortReleases(releases)[-1].split("/")[-1]
+    last_release = latest(releases).split("/")[-1]
     return last_release
 
 
@@ -285,14 +427,7 @@ def increment_version_number(last_release):
         str: Minimally incremented version number
 
     """
-    numre = re.compile(r"\d+|[^\d]+")
-    tokens = numre.findall(last_release)
-    for i in reversed(range(0, len(tokens))):
-        if tokens[i].isdigit():
-            tokens[i] = str(int(tokens[i]) + 1)
-            break
-    version = "".join(tokens)
-    return version
+    return dls_version.parse(last_release).increment().tag
 
 
 def construct_info_message(module, branch, area, version, build_object):
@@ -377,14 +512,54 @@ def get_module_epics_version(vcs):
 
     """
     conf_release = vcs.cat("configure/RELEASE")
-    module_epics = re.findall(
-        r"/dls_sw/epics/(R\d(?:\.\d+)+)/base", conf_release)
+    module_epics = configure_release.EPICS_BASE_RE.findall(conf_release)
     if module_epics:
         module_epics = module_epics[0]
     return module_epics
 
 
-def perform_test_build(build_object, local_build, module, version, vcs):
+def warn_installed_dependents(module, version, builds):
+    """
+    Warn about the installed releases that are built against a support
+    module release that a forced release will replace. Failing to check is
+    not an error.
+
+    Args:
+        module(str): Module to be released
+        version(str): Release version
+        builds(list of :class:`~dls_ade.dlsbuild.Builder`): Build objects,
+            for their EPICS versions
+
+    """
+    try:
+        index = prod_index.ProdIndex()
+        try:
+            checked = []
+            for build in builds:
+                env = environment(build.epics())
+                if env.epicsVerDir() in checked:
+                    continue
+                checked.append(env.epicsVerDir())
+                dep_dir = prod_index.refresh_dependents(index, env)
+                dependents = index.dependents(dep_dir, module, version)
+                if dependents:
+                    usermsg.warning(
+                        "Warning: {} {} in {} is used by {} installed "
+                        "release{}, which may need rebuilding:\n{}".format(
+                            module, version, dep_dir, len(dependents),
+                            "s" if len(dependents) > 1 else "",
+                            "\n".join("    {} {}".format(
+                                os.path.join(area_dir, dependent), release)
+                                for area_dir, dependent, release, _ in
+                                dependents)))
+        finally:
+            index.close()
+    except (sqlite3.Error, OSError) as e:
+        log.debug("Cannot check installed dependents: {}".format(e))
+
+
+def perform_test_build(build_object, local_build, module, version, vcs,
+                       incremental=False, ccache=False):
     """
     Test build the module and return whether it was successful
 
@@ -395,6 +570,8 @@ def perform_test_build(build_object, local_build, module, version, vcs):
         module(str): Specify module name
         version(str): Specify release
         vcs(:class:`~dls_ade.vcs_git.Git`): Git version control system instance
+        incremental(bool): Build in the persistent incremental test build tree
+        ccache(bool): Compile through ccache
 
     Returns:
         str, bool: Message explaining how the test build went, True or False
@@ -409,7 +586,8 @@ def perform_test_build(build_object, local_build, module, version, vcs):
         message += "same OS as build server"
     else:
         message += "Performing test build on local system"
-        if build_object.test(module, version, vcs) != 0:
+        if build_object.test(module, version, vcs, incremental=incremental,
+                             ccache=ccache) != 0:
             test_fail = True
             message += "\nTest build failed."
         else:
@@ -419,6 +597,70 @@ def perform_test_build(build_object, local_build, module, version, vcs):
     return message, test_fail
 
 
+def perform_test_builds(build_objects, local_build, module, version, vcs,
+                        incremental=False, ccache=False):
+    """
+    Test build the module for each distinct build server and EPICS version,
+    running the local test builds in parallel
+
+    Args:
+        build_objects(list of :class:`~dls_ade.dlsbuild.Builder`): Build
+            objects
+        local_build(bool): Specifier to perform test build only
+        module(str): Specify module name
+        version(str): Specify release
+        vcs(:class:`~dls_ade.vcs_git.Git`): Git version control system instance
+        incremental(bool): Build in the persistent incremental test build tree
+        ccache(bool): Compile through ccache
+
+    Returns:
+        str, bool: Messages explaining how the test builds went, True or
+            False for whether any of them failed
+
+    """
+    tasks = []
+    for build_object in build_objects:
+        name = "{} {}".format(build_object.get_server(), build_object.epics())
+        if name not in [task[0] for task in tasks]:
+            tasks.append((name, lambda build_object=build_object:
+                          perform_test_build(build_object, local_build,
+                                             module, version, vcs,
+                                             incremental, ccache)))
+
+    results, _ = run_concurrently(tasks)
+    if len(tasks) == 1:
+        return results[tasks[0][0]]
+
+    messages = []
+    test_fail = False
+    for name, _ in tasks:
+        message, failed = results[name]
+        messages.append("{}: {}".format(name, message))
+        test_fail = test_fail or failed
+    return "\n".join(messages), test_fail
+
+
+def format_matrix(results):
+    """
+    Format the results of an EPICS matrix test build as a table
+
+    Args:
+        results(list of :class:`~dls_ade.dlsbuild.MatrixResult`): Results
+
+    Returns:
+        str: Table with a row per EPICS version
+
+    """
+    width = max([len("EPICS")] + [len(result.epics) for result in results])
+    row = "{:<%d}  {:<6}  {:>7}  {}" % width
+    lines = [row.format("EPICS", "Result", "Time", "Error log")]
+    for result in results:
+        lines.append(row.format(
+            result.epics, "pass" if result.status == 0 else "FAIL",
+            "{:.0f}s".format(result.duration), result.error_log or "-"))
+    return "\n".join(lines)
+
+
 def determine_version_to_release(release, area, next_version, releases,
                                  commit=None):
     """Determine version that will be released and commit to tag if necessary.
@@ -488,7 +730,7 @@ def normalise_release(release, area):
 
     """
     new_release = release
-    if release is not None and not check_tag_is_valid(release, area):
+    if release is not None and not dls_version.parse(release, area).valid:
         usermsg.warning("Warning: release {} does not conform to "
                         "convention.".format(release))
         new_release = format_argument_version(release)
@@ -496,13 +738,82 @@ def normalise_release(release, area):
             usermsg.warning("Release {} contains \'.\' which will"
                             " be replaced by \'-\' to: \'{}\'"
                             .format(release, new_release))
-        if not check_tag_is_valid(new_release, area):
+        if not dls_version.parse(new_release, area).valid:
             raise ValueError(
                 "Release {} could not be made valid.".format(release)
             )
     return new_release
 
 
+def check_remote_exists(server, source):
+    """
+    Check that the module's repository exists on the server
+
+    Args:
+        server(:class:`~dls_ade.gitserver.GitServer`): Git server
+        source(str): Server path of the repository
+
+    Raises:
+        ValueError: If the repository does not exist
+
+    """
+    if not server.is_server_repo(source):
+        raise ValueError("Repository does not contain " + source)
+
+
+def clone_and_resolve_version(server, source, args):
+    """
+    Clone the module and work out the version that will be released
+
+    The epics version of the release is read as well when the release tag
+    already exists, so that all reads from the clone happen in one go.
+
+    Args:
+        server(:class:`~dls_ade.gitserver.GitServer`): Git server
+        source(str): Server path of the repository
+        args(:class:`argparse.Namespace`): Parser arguments
+
+    Returns:
+        tuple: (vcs, version, commit_to_tag, module_epics). module_epics is
+            None if it has not been read.
+
+    """
+    vcs = server.temp_clone(source, verify=False)
+
+    if args.branch:
+        vcs.set_branch(args.branch)
+
+    releases = vcs.list_releases()
+    version, commit_to_tag = determine_version_to_release(
+        args.release, args.area, args.next_version, releases, args.commit
+    )
+
+    module_epics = None
+    if commit_to_tag is None:
+        vcs.set_version(version)
+        if args.area in ["ioc", "support"]:
+            module_epics = get_module_epics_version(vcs)
+
+    return vcs, version, commit_to_tag, module_epics
+
+
+def format_timings(total, timings):
+    """
+    Format a timing breakdown for the user
+
+    Args:
+        total(float): Elapsed time in seconds
+        timings(dict): Phase name to the time it took in seconds
+
+    Returns:
+        str: e.g. 2.1s (build object 1.2s, clone 2.1s)
+
+    """
+    phases = ", ".join("{} {:.1f}s".format(name, timings[name])
+                       for name in sorted(timings))
+    return "{:.1f}s ({})".format(total, phases)
+
+
 def _main():
 
     parser = make_parser()
@@ -513,50 +824,84 @@ def _main():
     check_parsed_arguments_valid(args, parser)
     module = args.module_name
 
-    build = create_build_object(args)
+    # The build object needs an LDAP lookup and the repository checks need
+    # the git server, so run these network waits at the same time.
+    tasks = [("build objects", lambda: create_build_objects(args))]
 
     # python3ext releases don't have any source code
     if args.area == "python3ext":
         vcs = None
         version = args.release
+        module_epics = None
     else:
         server = Server()
         source = server.dev_module_path(module, args.area)
-        vcs = server.temp_clone(source)
+        tasks.append(
+            ("remote check", lambda: check_remote_exists(server, source)))
+        tasks.append(
+            ("clone", lambda: clone_and_resolve_version(server, source, args)))
+
+        if args.release is None:
+            usermsg.info("No release specified; able to test "
+                         "build at {} only.".format(args.commit))
+
+    start = time.time()
+    try:
+        results, timings = run_concurrently(tasks)
+    except (VCSGitError, ValueError) as err:
+        log.exception(err)
+        usermsg.error("Aborting: {msg}".format(msg=err))
+        sys.exit(1)
+    elapsed = time.time() - start
+
+    usermsg.info("Pre-flight checks took {}".format(
+        format_timings(elapsed, timings)))
+    log.info(json.dumps({'preflight_timings': timings}))
+
+    builds = results["build objects"]
 
+    if args.area != "python3ext":
+        vcs, version, commit_to_tag, module_epics = results["clone"]
         try:
-            release = args.release
-            if release is None:
-                usermsg.info("No release specified; able to test "
-                             "build at {} only.".format(args.commit))
-            if args.branch:
-                vcs.set_branch(args.branch)
-
-            releases = vcs.list_releases()
-            version, commit_to_tag = determine_version_to_release(
-                release, args.area, args.next_version, releases, args.commit
-            )
             if commit_to_tag is not None:  # Make Release if repo required
                 usermsg.info("Making tag {} at {}".format(version, commit_to_tag))
                 vcs.create_new_tag_and_push(version, commit_to_tag, args.message)
-            vcs.set_version(version)
+                vcs.set_version(version)
+                if args.area in ["ioc", "support"]:
+                    module_epics = get_module_epics_version(vcs)
         except (VCSGitError, ValueError) as err:
             log.exception(err)
             usermsg.error("Aborting: {msg}".format(msg=err))
             sys.exit(1)
 
-    if args.area in ["ioc", "support"]:
-        module_epics = get_module_epics_version(vcs)
-        if module_epics:
+    if args.epics_matrix:
+        usermsg.info("Test building with EPICS {}".format(
+            ", ".join(build.epics() for build in builds)))
+        results = dlsbuild.test_matrix(builds, module, version, vcs)
+        output.info(format_matrix(results))
+        if any(result.status != 0 for result in results):
+            usermsg.error("Local test build failed for EPICS {}".format(
+                ", ".join(result.epics for result in results
+                          if result.status != 0)))
+            sys.exit(1)
+        sys.exit(0)
+
+    if module_epics:
+        build_epics = []
+        for build in builds:
+            if build.epics() not in build_epics:
+                build_epics.append(build.epics())
+        for epics in build_epics:
             sure = check_epics_version_consistent(
-                module_epics, args.epics_version, build.epics())
+                module_epics, args.epics_version, epics)
             if not sure:
                 usermsg.info("Cancelling: EPICS version not consistent")
                 sys.exit(0)
 
     if not args.skip_test:
-        test_build_message, test_build_fail = perform_test_build(
-            build, args.local_build, module, version, vcs)
+        test_build_message, test_build_fail = perform_test_builds(
+            builds, args.local_build, module, version, vcs,
+            incremental=args.incremental, ccache=args.ccache)
         usermsg.info(test_build_message)
         if test_build_fail:
             usermsg.error("Aborting: local test build failed")
@@ -569,18 +914,23 @@ def _main():
     assert version is not None, ("Version is None; argument checking should "
                                  "have prevented this")
 
-    msg_build_job = "test-release" if args.test_only else "Release"
-    msg_create_build_job = "Creating {buildjob} job for {info_msg}".format(
-        buildjob=msg_build_job,
-        info_msg=construct_info_message(module, args.branch, args.area,
-                                        version, build))
-    usermsg.info(msg_create_build_job)
+    if (args.check_dependents and args.force and args.area == "support" and
+            not args.test_only):
+        warn_installed_dependents(module, version, builds)
 
-    build.submit(module, version, vcs, test=args.test_only)
+    msg_build_job = "test-release" if args.test_only else "Release"
+    for build in builds:
+        msg_create_build_job = "Creating {buildjob} job for {info_msg}".format(
+            buildjob=msg_build_job,
+            info_msg=construct_info_message(module, args.branch, args.area,
+                                            version, build))
+        usermsg.info(msg_create_build_job)
+
+    dlsbuild.submit_all(builds, module, version, vcs, test=args.test_only)
     usermsg.info(
-        "{build_job} job for {area}-module: \'{module}\' {version} "
+        "{build_job} job{plural} for {area}-module: \'{module}\' {version} "
         "submitted to build server queue".format(
-            build_job=msg_build_job,
+            build_job=msg_build_job, plural="s" if len(builds) > 1 else "",
             area=args.area, module=module, version=str(version)
         )
     )
@@ -0,0 +1,349 @@
+#!/bin/env dls-python
+# This script comes from the dls_scripts python module
+"""
+List releases submitted to the build server, from an index of the release
+logs written by dls-release.py
+"""
+
+import os
+import sys
+import time
+import json
+import logging
+import argparse
+
+from dls_ade import dlsbuild
+from dls_ade import local_store
+from dls_ade import logconfig
+from dls_ade import profiling
+
+# An optional release log shared between users, in the same format as
+# ~/.dls-release-log
+SHARED_RELEASE_LOG = os.getenv("DLS_ADE_SHARED_RELEASE_LOG")
+
+HISTORY_DB = "release_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS builds (
+    build_name TEXT NOT NULL,
+    server TEXT NOT NULL,
+    build_dir TEXT NOT NULL,
+    module TEXT NOT NULL,
+    version TEXT NOT NULL,
+    area TEXT NOT NULL,
+    user TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    PRIMARY KEY (build_name, server)
+);
+CREATE INDEX IF NOT EXISTS builds_module ON builds (module, submitted);
+CREATE INDEX IF NOT EXISTS builds_version ON builds (version);
+CREATE INDEX IF NOT EXISTS builds_server ON builds (server, submitted);
+CREATE INDEX IF NOT EXISTS builds_submitted ON builds (submitted);
+"""
+
+# Order of the columns returned by ReleaseHistory queries
+COLUMNS = ("submitted", "module", "version", "server", "area", "user",
+           "build_dir", "build_name")
+
+usage = """
+List the releases you (or everybody, with a shared release log) have
+submitted to the build server. The release logs are indexed incrementally, so
+only entries added since the last run are read.
+e.g. %(prog)s -d 7 lists the releases made in the last week.
+"""
+
+
+class ReleaseHistory(object):
+    """
+    Index of one or more release logs, as written by
+    :meth:`dls_ade.dlsbuild.Builder.submit`.
+
+    Each log is read from where the previous update stopped. A log that has
+    been replaced or truncated is read again from the start.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = local_store.cache_path(HISTORY_DB)
+        self.connection = local_store.connect(path, SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, log_path):
+        """
+        Add new entries of a release log to the index.
+
+        Args:
+            log_path(str): Release log file
+
+        Returns:
+            int: Number of entries read
+        """
+        try:
+            stat = os.stat(log_path)
+        except OSError:
+            return 0
+
+        row = self.connection.execute(
+            "SELECT inode, offset FROM sources WHERE path = ?",
+            (log_path,)).fetchone()
+        offset = 0
+        if row is not None and row[0] == stat.st_ino \
+                and row[1] <= stat.st_size:
+            offset = row[1]
+        if offset == stat.st_size:
+            return 0
+
+        with open(log_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Leave any partly written last line for the next update
+        complete = data[:data.rfind(b"\n") + 1]
+
+        builds = []
+        for line in complete.decode("utf-8", "replace").splitlines():
+            build = self._parse_line(line)
+            if build is not None:
+                builds.append(build)
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO builds (build_name, server, build_dir, "
+                "module, version, area, user, submitted) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", builds)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources (path, inode, offset) "
+                "VALUES (?, ?, ?)",
+                (log_path, stat.st_ino, offset + len(complete)))
+        return len(builds)
+
+    @staticmethod
+    def _parse_line(line):
+        fields = line.split("\t")
+        if len(fields) != 5:
+            return None
+        build_dir, module, version, build_name, server = fields
+        try:
+            _, _, user, area, _ = dlsbuild.split_build_name(build_name)
+            submitted = dlsbuild.build_name_time(build_name)
+        except ValueError:
+            return None
+        return (build_name, server, build_dir, module, version, area, user,
+                submitted)
+
+    def _query(self, where, params, limit=None):
+        sql = "SELECT {} FROM builds".format(", ".join(COLUMNS))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY submitted DESC"
+        if limit is not None:
+            sql += " LIMIT {:d}".format(limit)
+        return self.connection.execute(sql, params).fetchall()
+
+    def builds(self, module=None, version=None, server=None, user=None,
+               since=None, limit=None):
+        """
+        Return the indexed builds matching all of the given criteria.
+
+        Args:
+            module(str): Module name
+            version(str): Released version
+            server(str): Build server
+            user(str): FED-ID of the user who submitted the build
+            since(float): Only builds submitted after this time (seconds
+                since the epoch)
+            limit(int): Maximum number of builds
+
+        Returns:
+            list of tuple: Builds, newest first, with fields as in `COLUMNS`
+        """
+        where = []
+        params = []
+        for column, value in (("module", module), ("version", version),
+                              ("server", server), ("user", user)):
+            if value is not None:
+                where.append("{} = ?".format(column))
+                params.append(value)
+        if since is not None:
+            where.append("submitted >= ?")
+            params.append(since)
+        return self._query(where, params, limit)
+
+    def latest_build_name(self, module, user=None):
+        """
+        Return the name of the most recent build of a module.
+
+        Args:
+            module(str): Module name
+            user(str): Only consider builds submitted by this FED-ID
+
+        Returns:
+            str: Build name, or None if the module has not been built
+        """
+        builds = self.builds(module=module, user=user, limit=1)
+        if not builds:
+            return None
+        return builds[0][COLUMNS.index("build_name")]
+
+
+def release_logs(shared=SHARED_RELEASE_LOG):
+    """
+    Return the release logs to index.
+
+    Args:
+        shared(str): Path of a shared release log, or None
+
+    Returns:
+        list of str: Release log paths
+    """
+    logs = [dlsbuild.release_log]
+    if shared:
+        logs.append(shared)
+    return logs
+
+
+def open_history(shared=SHARED_RELEASE_LOG):
+    """
+    Open the release history and bring it up to date with the release logs.
+
+    Args:
+        shared(str): Path of a shared release log, or None
+
+    Returns:
+        :class:`ReleaseHistory`: Updated history
+    """
+    history = ReleaseHistory()
+    for log_path in release_logs(shared):
+        history.update(log_path)
+    return history
+
+
+def make_parser():
+    """
+    Takes ArgParse instance and adds
+
+    Flags:
+        * -m (module)
+        * -v (version)
+        * -s (server)
+        * -u (user)
+        * -d (days)
+        * -n (nresults)
+        * -l (latest)
+        * --shared
+
+    Returns:
+        :class:`argparse.ArgumentParser`:  ArgParse instance
+    """
+    parser = argparse.ArgumentParser(
+        description=usage,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    profiling.add_profile_arg(parser)
+    parser.add_argument(
+        "-m", "--module", action="store", type=str,
+        help="Only list builds of this module")
+    parser.add_argument(
+        "-v", "--version", action="store", type=str,
+        help="Only list builds of this version")
+    parser.add_argument(
+        "-s", "--server", action="store", type=str,
+        help="Only list builds for this build server")
+    parser.add_argument(
+        "-u", "--user", action="store", type=str,
+        help="Only list builds submitted by this FED-ID")
+    parser.add_argument(
+        "-d", "--days", action="store", type=float,
+        help="Only list builds from the last DAYS days")
+    parser.add_argument(
+        "-n", "--nresults", action="store", type=int,
+        help="Maximum number of builds to list")
+    parser.add_argument(
+        "-l", "--latest", action="store_true",
+        help="Only print the name of the latest build of --module")
+    parser.add_argument(
+        "--shared", action="store", type=str, default=SHARED_RELEASE_LOG,
+        help="Also index this shared release log "
+             "(default is $DLS_ADE_SHARED_RELEASE_LOG)")
+
+    return parser
+
+
+def format_build(build):
+    """
+    Format a build returned by :meth:`ReleaseHistory.builds` for output.
+
+    Args:
+        build(tuple): Build, with fields as in `COLUMNS`
+
+    Returns:
+        str: One line description of the build
+    """
+    fields = dict(zip(COLUMNS, build))
+    fields["submitted"] = time.strftime(
+        "%Y-%m-%d %H:%M:%S", time.localtime(fields["submitted"]))
+    return ("{submitted} {module} {version} {server} {build_name}"
+            .format(**fields))
+
+
+def _main():
+    log = logging.getLogger(name="dls_ade")
+    usermsg = logging.getLogger(name="usermessages")
+    output = logging.getLogger(name="output")
+
+    parser = make_parser()
+    args = parser.parse_args()
+
+    log.info(json.dumps({'CLI': sys.argv, 'options_args': vars(args)}))
+
+    if args.latest and not args.module:
+        parser.error("--latest requires --module")
+
+    history = open_history(args.shared)
+    try:
+        if args.latest:
+            build_name = history.latest_build_name(args.module, args.user)
+            if build_name is None:
+                usermsg.info("No builds of {} found".format(args.module))
+                return 1
+            output.info(build_name)
+            return 0
+
+        since = None
+        if args.days is not None:
+            since = time.time() - args.days * 24 * 60 * 60
+        builds = history.builds(module=args.module, version=args.version,
+                                server=args.server, user=args.user,
+                                since=since, limit=args.nresults)
+    finally:
+        history.close()
+
+    if not builds:
+        usermsg.info("No builds found")
+        return 1
+    for build in builds:
+        output.info(format_build(build))
+    return 0
+
+
+def main():
+    # Catch unhandled exceptions and ensure they're logged
+    try:
+        logconfig.setup_logging(application='dls-release-history.py')
+        return _main()
+    except Exception as e:
+        logging.exception(e)
+        logging.getLogger("usermessages").exception(
+            "ABORT: Unhandled exception (see trace below): {}".format(e)
+        )
+        exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from dls_ade import dls_release_history
+
+
+BUILD_1 = "build_20200121-160509_abc12345_support_motor_7-0"
+BUILD_2 = "build_20200122-090000_xyz98765_ioc_BL08J_BL08J-MO-IOC-01_1-2"
+BUILD_3 = "build_20200123-120000_abc12345_support_motor_7-1"
+
+
+def log_line(build_dir, module, version, build_name, server):
+    return "\t".join([build_dir, module, version, build_name, server]) + "\n"
+
+
+class ReleaseHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.log_path = os.path.join(self.tmp_dir, "release-log")
+        self.history = dls_release_history.ReleaseHistory(":memory:")
+        self.addCleanup(self.history.close)
+
+    def append(self, *lines):
+        with open(self.log_path, "a") as f:
+            f.writelines(lines)
+
+    def test_update_indexes_all_entries(self):
+        self.append(
+            log_line("/prod/support", "motor", "7-0", BUILD_1,
+                     "redhat7-x86_64"),
+            log_line("/prod/ioc", "BL08J/BL08J-MO-IOC-01", "1-2", BUILD_2,
+                     "redhat7-x86_64"))
+
+        self.assertEqual(self.history.update(self.log_path), 2)
+        self.assertEqual(len(self.history.builds()), 2)
+
+    def test_update_only_reads_new_entries(self):
+        self.append(log_line("/prod/support", "motor", "7-0", BUILD_1,
+                             "redhat7-x86_64"))
+        self.history.update(self.log_path)
+        self.append(log_line("/prod/support", "motor", "7-1", BUILD_3,
+                             "redhat7-x86_64"))
+
+        self.assertEqual(self.history.update(self.log_path), 1)
+        self.assertEqual(self.history.update(self.log_path), 0)
+        self.assertEqual(len(self.history.builds()), 2)
+
+    def test_partial_last_line_left_for_next_update(self):
+        line = log_line("/prod/support", "motor", "7-0", BUILD_1,
+                        "redhat7-x86_64")
+        self.append(line[:10])
+
+        self.assertEqual(self.history.update(self.log_path), 0)
+        self.append(line[10:])
+        self.assertEqual(self.history.update(self.log_path), 1)
+
+    def test_given_truncated_log_then_read_from_start(self):
+        self.append(
+            log_line("/prod/support", "motor", "7-0", BUILD_1,
+                     "redhat7-x86_64"),
+            log_line("/prod/support", "motor", "7-1", BUILD_3,
+                     "redhat7-x86_64"))
+        self.history.update(self.log_path)
+        os.remove(self.log_path)
+        self.append(log_line("/prod/ioc", "BL08J/BL08J-MO-IOC-01", "1-2",
+                             BUILD_2, "windows6-x86"))
+
+        self.assertEqual(self.history.update(self.log_path), 1)
+
+    def test_given_missing_log_then_nothing_read(self):
+        self.assertEqual(
+            self.history.update(os.path.join(self.tmp_dir, "missing")), 0)
+
+    def test_malformed_lines_are_skipped(self):
+        self.append("not a log line\n",
+                    log_line("/prod", "motor", "7-0", "bad_name", "server"))
+
+        self.assertEqual(self.history.update(self.log_path), 0)
+
+    def test_builds_filtered_and_newest_first(self):
+        self.append(
+            log_line("/prod/support", "motor", "7-0", BUILD_1,
+                     "redhat7-x86_64"),
+            log_line("/prod/ioc", "BL08J/BL08J-MO-IOC-01", "1-2", BUILD_2,
+                     "redhat7-x86_64"),
+            log_line("/prod/support", "motor", "7-1", BUILD_3,
+                     "redhat7-x86_64"))
+        self.history.update(self.log_path)
+        build_name = dls_release_history.COLUMNS.index("build_name")
+
+        builds = self.history.builds(module="motor")
+        self.assertEqual([b[build_name] for b in builds], [BUILD_3, BUILD_1])
+
+        builds = self.history.builds(user="xyz98765")
+        self.assertEqual([b[build_name] for b in builds], [BUILD_2])
+
+        since = time.mktime((2020, 1, 22, 0, 0, 0, 0, 0, -1))
+        builds = self.history.builds(since=since, limit=1)
+        self.assertEqual([b[build_name] for b in builds], [BUILD_3])
+
+    def test_latest_build_name(self):
+        self.append(
+            log_line("/prod/support", "motor", "7-0", BUILD_1,
+                     "redhat7-x86_64"),
+            log_line("/prod/support", "motor", "7-1", BUILD_3,
+                     "redhat7-x86_64"))
+        self.history.update(self.log_path)
+
+        self.assertEqual(self.history.latest_build_name("motor"), BUILD_3)
+        self.assertIsNone(self.history.latest_build_name("asyn"))
+
+
+class MakeParserTest(unittest.TestCase):
+
+    def test_latest_requires_no_positional_arguments(self):
+        parser = dls_release_history.make_parser()
+
+        args = parser.parse_args(["-l", "-m", "motor"])
+
+        self.assertTrue(args.latest)
+        self.assertEqual(args.module, "motor")
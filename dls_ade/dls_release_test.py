@@ -117,6 +117,14 @@ class ParserTest(unittest.TestCase):
         self.assertIsNotNone(option)
         self.assertIn("--windows", option.option_strings)
 
+    def test_check_dependents_off_by_default(self):
+        args = self.parser.parse_args(["module", "1-0", "-f"])
+        self.assertFalse(args.check_dependents)
+
+        args = self.parser.parse_args(
+            ["module", "1-0", "-f", "--check-dependents"])
+        self.assertTrue(args.check_dependents)
+
 
 class TestCreateBuildObject(unittest.TestCase):
 
@@ -230,6 +238,33 @@ class TestCheckParsedOptionsValid(unittest.TestCase):
         self.args.module_name = ""
         self.args.release = ""
         self.args.next_version = False
+        self.args.incremental = False
+        self.args.epics_matrix = None
+
+    def test_given_incremental_and_python_area_then_parser_error(self):
+        self.args.module_name = "dummy"
+        self.args.release = "1-0"
+        self.args.area = "python"
+        self.args.rhel_version = "7"
+        self.args.windows = None
+        self.args.incremental = True
+
+        dls_release.check_parsed_arguments_valid(self.args, self.parser)
+
+        self.mock_error.assert_called_once_with(
+            "Incremental test builds are only possible for Linux support "
+            "and ioc modules")
+
+    def test_given_incremental_and_support_area_then_no_error(self):
+        self.args.module_name = "dummy"
+        self.args.release = "1-0"
+        self.args.area = "support"
+        self.args.windows = None
+        self.args.incremental = True
+
+        dls_release.check_parsed_arguments_valid(self.args, self.parser)
+
+        self.assertFalse(self.mock_error.called)
 
     def test_given_no_module_name_then_parser_error_specifying_no_module_name(self):
         expected_error_msg = 'Module name not specified'
@@ -694,6 +729,40 @@ class TestGetModuleEpicsVersion(unittest.TestCase):
         self.assertFalse(len(module_epics))
 
 
+class TestWarnInstalledDependents(unittest.TestCase):
+
+    @patch('dls_ade.dls_release.prod_index')
+    def test_given_dependents_then_warning(self, mock_prod_index):
+        build = MagicMock()
+        build.epics.return_value = "R3.14.12.7"
+        index = mock_prod_index.ProdIndex.return_value
+        mock_prod_index.refresh_dependents.return_value = "/prod/support"
+        index.dependents.return_value = [("/prod/ioc", "BL01I/IOC", "1-0",
+                                          "4-41")]
+
+        with patch.object(dls_release.usermsg, 'warning') as mock_warning:
+            dls_release.warn_installed_dependents("asyn", "4-41",
+                                                  [build, build])
+
+        self.assertEqual(mock_prod_index.refresh_dependents.call_count, 1)
+        index.dependents.assert_called_once_with("/prod/support", "asyn",
+                                                 "4-41")
+        self.assertIn("/prod/ioc/BL01I/IOC 1-0",
+                      mock_warning.call_args[0][0])
+        index.close.assert_called_once_with()
+
+    @patch('dls_ade.dls_release.prod_index.ProdIndex',
+           side_effect=OSError("no cache directory"))
+    def test_given_index_error_then_no_warning(self, _1):
+        build = MagicMock()
+        build.epics.return_value = "R3.14.12.7"
+
+        with patch.object(dls_release.usermsg, 'warning') as mock_warning:
+            dls_release.warn_installed_dependents("asyn", "4-41", [build])
+
+        self.assertFalse(mock_warning.called)
+
+
 class TestPerformTestBuild(unittest.TestCase):
 
     def setUp(self):
@@ -757,7 +826,19 @@ class TestPerformTestBuild(unittest.TestCase):
 
         dls_release.perform_test_build(self.fake_build, local_build, module, version, vcs)
 
-        self.fake_build.test.assert_called_once_with(module, version, vcs)
+        self.fake_build.test.assert_called_once_with(
+            module, version, vcs, incremental=False, ccache=False)
+
+    def test_given_incremental_then_passed_to_test_build(self):
+
+        vcs = FakeVcs(version='0-1')
+
+        dls_release.perform_test_build(
+            self.fake_build, False, 'test', '0-1', vcs, incremental=True,
+            ccache=True)
+
+        self.fake_build.test.assert_called_once_with(
+            'test', '0-1', vcs, incremental=True, ccache=True)
 
     def test_given_test_possible_and_build_works_then_return_test_not_failed_and_message_ends_with_specific_string(self):
 
@@ -934,6 +1015,140 @@ class FakeVcs(object):
         return file_contents
 
 
+class CloneAndResolveVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MagicMock()
+        self.vcs = self.server.temp_clone.return_value
+        self.vcs.list_releases.return_value = ["1-0"]
+        self.args = MagicMock(branch=None, release="1-0", area="support",
+                              next_version=False, commit=None)
+
+    @patch('dls_ade.dls_release.get_module_epics_version')
+    def test_given_existing_release_then_version_set_and_epics_read(
+            self, mock_epics):
+        mock_epics.return_value = "R3.14.12.7"
+
+        result = dls_release.clone_and_resolve_version(
+            self.server, "controls/support/dummy", self.args)
+
+        self.server.temp_clone.assert_called_once_with(
+            "controls/support/dummy", verify=False)
+        self.vcs.set_version.assert_called_once_with("1-0")
+        self.assertEqual(result, (self.vcs, "1-0", None, "R3.14.12.7"))
+
+    @patch('dls_ade.dls_release.get_module_epics_version')
+    def test_given_new_release_then_epics_not_read(self, mock_epics):
+        self.args.release = "1-1"
+        self.args.commit = "abc123"
+
+        result = dls_release.clone_and_resolve_version(
+            self.server, "controls/support/dummy", self.args)
+
+        self.assertFalse(mock_epics.called)
+        self.assertFalse(self.vcs.set_version.called)
+        self.assertEqual(result, (self.vcs, "1-1", "abc123", None))
+
+    def test_format_timings(self):
+        self.assertEqual(
+            dls_release.format_timings(2.04, {"clone": 2.0, "build": 1.23}),
+            "2.0s (build 1.2s, clone 2.0s)")
+
+
+class CreateBuildObjectsTest(unittest.TestCase):
+
+    def test_parse_targets_removes_blanks_and_duplicates(self):
+        self.assertEqual(dls_release.parse_targets("7, 64,,7,64_2012"),
+                         ["7", "64", "64_2012"])
+
+    @patch('dls_ade.dls_release.create_build_object')
+    def test_given_no_targets_then_single_build_object(self, mock_create):
+        args = MagicMock(targets=None, epics_matrix=None)
+
+        builds = dls_release.create_build_objects(args)
+
+        self.assertEqual(builds, [mock_create.return_value])
+
+    @patch('dls_ade.dls_release.dlsbuild.target_build')
+    def test_given_targets_then_build_object_per_target_in_order(
+            self, mock_target_build):
+        mock_target_build.side_effect = \
+            lambda target, epics: MagicMock(name=target)
+        args = MagicMock(targets="7,64", epics_version=None,
+                         epics_matrix=None)
+
+        builds = dls_release.create_build_objects(args)
+
+        self.assertEqual(len(builds), 2)
+        mock_target_build.assert_any_call("7", None)
+        mock_target_build.assert_any_call("64", None)
+        for build in builds:
+            build.set_area.assert_called_once_with(args.area)
+
+
+class PerformTestBuildsTest(unittest.TestCase):
+
+    def fake_build(self, server, epics, status):
+        build = MagicMock()
+        build.get_server.return_value = server
+        build.epics.return_value = epics
+        build.test.return_value = status
+        return build
+
+    def test_given_single_build_then_message_unchanged(self):
+        build = self.fake_build("redhat7-x86_64", "R3.14.12.7", 0)
+
+        self.assertEqual(
+            dls_release.perform_test_builds([build], True, "m", "1-0", None),
+            dls_release.perform_test_build(build, True, "m", "1-0", None))
+
+    def test_given_builds_then_each_tested_and_any_failure_reported(self):
+        builds = [self.fake_build("redhat7-x86_64", "R3.14.12.7", 0),
+                  self.fake_build("redhat6-x86_64", "R3.14.12.3", 2)]
+
+        message, test_fail = dls_release.perform_test_builds(
+            builds, True, "m", "1-0", None)
+
+        self.assertTrue(test_fail)
+        self.assertIn("redhat6-x86_64 R3.14.12.3: ", message)
+        for build in builds:
+            self.assertEqual(build.test.call_count, 1)
+
+
+class EpicsMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        server_patch = patch('dls_ade.dls_release.dlsbuild.default_server',
+                             return_value="redhat7-x86_64")
+        server_patch.start()
+        self.addCleanup(server_patch.stop)
+        platform_patch = patch('dls_ade.dls_release.platform.system',
+                               return_value="Linux")
+        platform_patch.start()
+        self.addCleanup(platform_patch.stop)
+
+    def test_given_all_then_versions_of_local_server_returned(self):
+        self.assertEqual(dls_release.matrix_epics_versions("all"),
+                         ["R3.14.12.7"])
+
+    def test_given_version_not_built_locally_then_value_error(self):
+        with self.assertRaises(ValueError):
+            dls_release.matrix_epics_versions("R3.14.12.7,R3.14.12.3")
+
+    def test_format_matrix_has_row_per_version(self):
+        results = [
+            dls_release.dlsbuild.MatrixResult("R3.14.12.7", 0, 61.2, None),
+            dls_release.dlsbuild.MatrixResult(
+                "R7.0.5", 2, 5.0, "/test/local.err")]
+
+        table = dls_release.format_matrix(results).splitlines()
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table[1].split(), ["R3.14.12.7", "pass", "61s", "-"])
+        self.assertEqual(table[2].split(),
+                         ["R7.0.5", "FAIL", "5s", "/test/local.err"])
+
+
 if __name__ == '__main__':
 
     # buffer option suppresses stdout generated from tested code
@@ -14,12 +14,21 @@ import sys
 import json
 import logging
 import argparse
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 from dls_ade.argument_parser import ArgParser
 from dls_ade.get_module_creator import get_module_creator
 from dls_ade import logconfig, Server
 from dls_ade.dls_utilities import remove_git_at_end
 from dls_ade.exceptions import VerificationError, ParsingError
 
+SUPPORTED_AREAS = ["support", "ioc", "python", "python3", "tools"]
+
+# Module creators of the batch being created, shared with the worker
+# processes that create the local modules
+_batch_creators = []
+
 usage = ("""Default <area> is 'support'.
 Start a new Diamond module of a particular type, using a template appropriate
 for the chosen area. In the case of 'support' or 'ioc' modules, makeBaseApp is
@@ -42,7 +51,15 @@ Beamline CSS UI modules:
 Beamline EDM UI modules:
     With the --ioc flag and a name of the form BLxxI/BL, a special template is
     used, to create a top level module for a beamline with an EDM synoptic.
-    e.g. BL02I/BL""")
+    e.g. BL02I/BL
+
+Batches of modules:
+    With the --manifest flag, <module_name> is a file listing the modules to
+    create, one per line, each optionally followed by its area, e.g.
+        BL02I/BL02I-VA-IOC-01 ioc
+        BL02I/BL02I-MO-IOC-01 ioc
+    The local modules are created concurrently and the remote repositories
+    are pushed in parallel. Use --dry-run to check a manifest first.""")
 
 
 def make_parser():
@@ -54,14 +71,16 @@ def make_parser():
 
     Flags:
         * -n (no-import)
-        * -f (fullname)
+        * -e (empty)
+        * -q (ignore_existing)
+        * -m (manifest)
+        * --dry-run
+        * -j (jobs)
 
     Returns:
         :class:`argparse.ArgumentParser`:  ArgParse instance
     """
-    supported_areas = ["support", "ioc", "python", "python3", "tools"]
-
-    parser = ArgParser(usage, supported_areas)
+    parser = ArgParser(usage, SUPPORTED_AREAS)
     parser.add_module_name_arg()
     parser.formatter_class = argparse.RawDescriptionHelpFormatter
 
@@ -85,6 +104,24 @@ def make_parser():
              "already exists on the server."
     )
 
+    parser.add_argument(
+        "-m", "--manifest", action="store_true", dest="manifest",
+        help="Create the modules listed in the file given as module_name. "
+             "Each line is a module name, optionally followed by its area."
+    )
+
+    parser.add_argument(
+        "--dry-run", action="store_true", dest="dry_run",
+        help="With --manifest, check the modules can be created and list "
+             "them, without creating anything."
+    )
+
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, default=8, dest="jobs",
+        help="With --manifest, the number of modules to create or push at "
+             "once. Default is 8."
+    )
+
     return parser
 
 
@@ -93,6 +130,16 @@ def verify_args(args):
         raise VerificationError(
             "--ignore_existing can only be used with --empty"
         )
+    if args.manifest and args.empty:
+        raise VerificationError(
+            "--manifest cannot be used with --empty"
+        )
+    if args.dry_run and not args.manifest:
+        raise VerificationError(
+            "--dry-run can only be used with --manifest"
+        )
+    if args.jobs < 1:
+        raise VerificationError("--jobs must be at least 1")
 
 
 def _main():
@@ -115,6 +162,19 @@ def _main():
     create_empty_remote_only = args.empty
     export_to_server = not args.no_import
 
+    if args.manifest:
+        try:
+            modules = read_manifest(module_name, area)
+        except (IOError, ParsingError) as e:
+            usermsg.error(str(e))
+            return 1
+        errors = create_modules(modules, export_to_server, args.dry_run,
+                                args.jobs)
+        if errors:
+            usermsg.error(format_errors(errors, len(modules)))
+            return 1
+        return 0
+
     if create_empty_remote_only:
         try:
             create_empty_remote(area, module_name)
@@ -163,6 +223,194 @@ def create_empty_remote(area, module_name):
     server.create_remote_repo(module_path)
 
 
+def read_manifest(path, default_area="support"):
+    """Read the list of modules to create in a batch.
+
+    Each line of the file is a module name, optionally followed by its area.
+    Blank lines and text after a # are ignored.
+
+    Args:
+        path(str): Manifest file
+        default_area(str): Area of the modules without one
+
+    Returns:
+        list of tuple(str, str): Module name and area, in file order
+
+    Raises:
+        :class:`~dls_ade.exceptions.ParsingError`: If a line has too many \
+            fields, an unsupported area or a module listed twice
+        IOError: If the file cannot be read
+    """
+    modules = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) > 2:
+                raise ParsingError(
+                    "{}:{}: Expected a module name and an optional area, "
+                    "got: {}".format(path, line_number, line.strip()))
+            module = (fields[0], fields[1] if len(fields) == 2
+                      else default_area)
+            if module[1] not in SUPPORTED_AREAS:
+                raise ParsingError("{}:{}: Unsupported area {}".format(
+                    path, line_number, module[1]))
+            if module in modules:
+                raise ParsingError("{}:{}: {} is listed twice".format(
+                    path, line_number, module[0]))
+            modules.append(module)
+    return modules
+
+
+def _process_pool(processes):
+    """Return a pool of processes that inherit _batch_creators."""
+    try:
+        context = multiprocessing.get_context("fork")
+    except AttributeError:  # Python 2 always forks
+        context = multiprocessing
+    return context.Pool(processes)
+
+
+def _create_local_module(index):
+    """Create the local module of a batch, returning an error message if it
+    fails. Run in a worker process, as creating a module changes the working
+    directory."""
+    try:
+        _batch_creators[index].create_local_module()
+    except Exception as e:
+        logging.getLogger(name="dls_ade").debug(
+            "Creating local module failed", exc_info=True)
+        return str(e) or e.__class__.__name__
+    return None
+
+
+def _run_each(function, items, jobs):
+    """Call function for each item in threads, returning the error message
+    for each item that fails, or None."""
+    def run(item):
+        try:
+            function(item)
+        except Exception as e:
+            logging.getLogger(name="dls_ade").debug(
+                "Batch step failed", exc_info=True)
+            return str(e) or e.__class__.__name__
+        return None
+
+    if jobs == 1 or len(items) < 2:
+        return [run(item) for item in items]
+    pool = ThreadPool(min(jobs, len(items)))
+    try:
+        return pool.map(run, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def create_modules(modules, export_to_server=True, dry_run=False, jobs=8):
+    """Create a batch of modules.
+
+    The modules are verified, then the local modules are created in
+    parallel processes. The server repositories are created one after the
+    other with a shared server connection, so each GitLab group is looked up
+    once, and then the modules are pushed in parallel.
+
+    A module that fails at any step is left out of the later steps; the
+    others carry on.
+
+    Args:
+        modules(list of tuple(str, str)): Module name and area of each module
+        export_to_server(bool): Create the server repositories and push
+        dry_run(bool): Only verify and list the modules
+        jobs(int): Number of modules to create or push at once
+
+    Returns:
+        :class:`collections.OrderedDict`: Error message for each module that
+            could not be created, by area/module name
+    """
+    global _batch_creators
+    usermsg = logging.getLogger("usermessages")
+    errors = OrderedDict()
+    server = Server()
+
+    creators = []
+    for module_name, area in modules:
+        key = "{}/{}".format(area, module_name)
+        try:
+            creator = get_module_creator(module_name, area, False)
+        except Exception as e:
+            errors[key] = str(e)
+            continue
+        creator.server = server
+        creators.append((key, creator))
+
+    def verify(creator):
+        if export_to_server:
+            creator.verify_remote_repo()
+        creator.verify_can_create_local_module()
+
+    def carry_on(results, step):
+        valid = []
+        for (key, creator), error in zip(creators, results):
+            if error is None:
+                valid.append((key, creator))
+            else:
+                errors[key] = "{}: {}".format(step, error)
+        return valid
+
+    creators = carry_on(
+        _run_each(verify, [c for _, c in creators], jobs), "Verification")
+
+    if dry_run:
+        for key, creator in creators:
+            if export_to_server:
+                usermsg.info("Would create %s and push it to %s", key,
+                             creator._server_repo_path)
+            else:
+                usermsg.info("Would create %s", key)
+        return errors
+
+    _batch_creators = [creator for _, creator in creators]
+    try:
+        if jobs == 1 or len(creators) < 2:
+            results = [_create_local_module(i) for i in range(len(creators))]
+        else:
+            pool = _process_pool(min(jobs, len(creators)))
+            try:
+                results = pool.map(_create_local_module,
+                                   range(len(creators)))
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        _batch_creators = []
+    creators = carry_on(results, "Creating local module")
+
+    if export_to_server:
+        creators = carry_on(
+            _run_each(lambda creator: creator.create_remote_repo(),
+                      [c for _, c in creators], 1),
+            "Creating server repository")
+        creators = carry_on(
+            _run_each(
+                lambda creator: creator.push_repo_to_remote(
+                    create_remote=False),
+                [c for _, c in creators], jobs),
+            "Pushing")
+
+    for key, _ in creators:
+        usermsg.info("Created %s", key)
+    return errors
+
+
+def format_errors(errors, total):
+    """Format the errors from :func:`create_modules` as a report."""
+    lines = ["Failed to create {} of {} modules:".format(len(errors), total)]
+    for key, error in errors.items():
+        lines.append("    {}: {}".format(key, error))
+    return "\n".join(lines)
+
+
 def main():
     # Catch unhandled exceptions and ensure they're logged
     try:
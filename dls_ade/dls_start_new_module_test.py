@@ -1,10 +1,13 @@
 #!/bin/env dls-python
 
+import os
+import shutil
+import tempfile
 import unittest
 import dls_ade.dls_start_new_module
 from argparse import _StoreTrueAction
-from mock import patch
-from dls_ade.exceptions import VerificationError
+from mock import patch, MagicMock
+from dls_ade.exceptions import VerificationError, ParsingError
 
 
 class MakeParserTest(unittest.TestCase):
@@ -57,6 +60,143 @@ class MakeParserTest(unittest.TestCase):
         pass
 
 
+class VerifyArgsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = dls_ade.dls_start_new_module.make_parser()
+
+    def test_given_dry_run_without_manifest_then_error(self):
+        args = self.parser.parse_args(["--dry-run", "test_module"])
+        with self.assertRaises(VerificationError):
+            dls_ade.dls_start_new_module.verify_args(args)
+
+    def test_given_manifest_with_empty_then_error(self):
+        args = self.parser.parse_args(["-m", "-e", "modules.txt"])
+        with self.assertRaises(VerificationError):
+            dls_ade.dls_start_new_module.verify_args(args)
+
+    def test_given_manifest_and_dry_run_then_no_error(self):
+        args = self.parser.parse_args(["-m", "--dry-run", "modules.txt"])
+        dls_ade.dls_start_new_module.verify_args(args)
+
+
+class ReadManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.path = os.path.join(self.folder, "modules.txt")
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+
+    def test_given_modules_then_names_and_areas_returned_in_order(self):
+        self.write("# Beamline IOCs\n"
+                   "BL99P/BL99P-MO-IOC-01 ioc\n"
+                   "\n"
+                   "test_support  # default area\n")
+
+        modules = dls_ade.dls_start_new_module.read_manifest(self.path,
+                                                             "support")
+
+        self.assertEqual(modules, [("BL99P/BL99P-MO-IOC-01", "ioc"),
+                                   ("test_support", "support")])
+
+    def test_given_unsupported_area_then_error_names_line(self):
+        self.write("test_module matlab\n")
+
+        with self.assertRaises(ParsingError) as e:
+            dls_ade.dls_start_new_module.read_manifest(self.path)
+
+        self.assertIn(":1: Unsupported area matlab", str(e.exception))
+
+    def test_given_module_listed_twice_then_error(self):
+        self.write("test_module\ntest_module support\n")
+
+        with self.assertRaises(ParsingError):
+            dls_ade.dls_start_new_module.read_manifest(self.path)
+
+
+class CreateModulesTest(unittest.TestCase):
+
+    def setUp(self):
+        patch_server = patch("dls_ade.dls_start_new_module.Server")
+        self.mock_server = patch_server.start()
+        self.addCleanup(patch_server.stop)
+        patch_get = patch("dls_ade.dls_start_new_module.get_module_creator")
+        self.mock_get_module_creator = patch_get.start()
+        self.addCleanup(patch_get.stop)
+
+        self.creators = {}
+
+        def get_module_creator(module_name, area, fullname):
+            creator = MagicMock()
+            creator._server_repo_path = "controls/{}/{}.git".format(
+                area, module_name)
+            self.creators[module_name] = creator
+            return creator
+        self.mock_get_module_creator.side_effect = get_module_creator
+
+    def test_given_modules_then_all_created_with_shared_server_and_pushed(self):
+        errors = dls_ade.dls_start_new_module.create_modules(
+            [("module1", "support"), ("module2", "support")], jobs=1)
+
+        self.assertEqual(errors, {})
+        for creator in self.creators.values():
+            self.assertIs(creator.server, self.mock_server.return_value)
+            creator.verify_remote_repo.assert_called_once_with()
+            creator.create_local_module.assert_called_once_with()
+            creator.create_remote_repo.assert_called_once_with()
+            creator.push_repo_to_remote.assert_called_once_with(
+                create_remote=False)
+
+    def test_given_verification_fails_then_module_skipped_and_reported(self):
+        def get_module_creator(module_name, area, fullname):
+            creator = MagicMock()
+            if module_name == "module1":
+                creator.verify_remote_repo.side_effect = VerificationError(
+                    "Already exists")
+            self.creators[module_name] = creator
+            return creator
+        self.mock_get_module_creator.side_effect = get_module_creator
+
+        errors = dls_ade.dls_start_new_module.create_modules(
+            [("module1", "support"), ("module2", "support")], jobs=2)
+
+        self.assertEqual(
+            errors, {"support/module1": "Verification: Already exists"})
+        self.assertFalse(self.creators["module1"].create_local_module.called)
+        self.creators["module2"].push_repo_to_remote.assert_called_once_with(
+            create_remote=False)
+
+    def test_given_dry_run_then_nothing_created(self):
+        errors = dls_ade.dls_start_new_module.create_modules(
+            [("module1", "support")], dry_run=True)
+
+        self.assertEqual(errors, {})
+        creator = self.creators["module1"]
+        creator.verify_can_create_local_module.assert_called_once_with()
+        self.assertFalse(creator.create_local_module.called)
+        self.assertFalse(creator.create_remote_repo.called)
+
+    def test_given_no_import_then_nothing_pushed(self):
+        dls_ade.dls_start_new_module.create_modules(
+            [("module1", "support")], export_to_server=False)
+
+        creator = self.creators["module1"]
+        self.assertFalse(creator.verify_remote_repo.called)
+        creator.create_local_module.assert_called_once_with()
+        self.assertFalse(creator.push_repo_to_remote.called)
+
+    def test_format_errors(self):
+        report = dls_ade.dls_start_new_module.format_errors(
+            {"support/module1": "Pushing: Failed"}, 3)
+
+        self.assertEqual(report, "Failed to create 1 of 3 modules:\n"
+                                 "    support/module1: Pushing: Failed")
+
+
 if __name__ == '__main__':
 
     # buffer option suppresses stdout generated from tested code
@@ -3,7 +3,8 @@
 This script removes all O.* directories from a release of a module and tars it
 up before deleting the release directory.
 <module_name>/<module_release> will be stored as
-<module_name>/<module_release>.tar.gz. Running the script with the -u flag will
+<module_name>/<module_release>.tar.gz (or .tar.zst with -c zstd), next to a
+manifest of checksums. Running the script with the -u flag will
 untar the module and remove the archive (reversing the original process)
 """
 
@@ -25,8 +26,11 @@ USAGE = """
 Default <area> is 'support'.
 This script removes all O.* directories from a release of a module and
 tars it up before deleting the release directory. <module_name>/<module_release>
-will be stored as <module_name>/<module_release>.tar.gz. Running the script with
-a -u flag will untar the module and remove the archive (reversing the original process)
+will be stored as <module_name>/<module_release>.tar.gz, or .tar.zst with
+-c zstd. Running the script with a -u flag will untar the module and remove
+the archive (reversing the original process); the codec is detected from the
+archive. The checksums of the unpacked files are checked against a manifest
+written when the module was archived.
 """
 
 # Don't support areas epics (risky), etc (non-standard) and
@@ -45,6 +49,8 @@ def make_parser():
     Flags:
         * -u: `untar`
         * -e: `epics_version`
+        * -c: `codec`
+        * --level
 
     Returns:
         :class:`argparse.ArgumentParser`: ArgParse instance
@@ -60,6 +66,16 @@ def make_parser():
     parser.add_argument(
         "-u", "--untar", action="store_true", dest="untar",
         help="Untar archive created with dls-tar-module.py")
+    parser.add_argument(
+        "-c", "--codec", action="store", dest="codec",
+        choices=[codec for codec, _ in dlsbuild.ARCHIVE_CODECS],
+        default=dlsbuild.ARCHIVE_CODECS[0][0],
+        help="Compression to archive with. gzip uses pigz where the build "
+             "server has it, zstd is faster. Ignored with -u, where the "
+             "codec is detected from the archive. Default is gzip")
+    parser.add_argument(
+        "--level", action="store", type=int, dest="level",
+        help="Compression level. Default is the compressor's default")
 
     return parser
 
@@ -80,6 +96,40 @@ def check_area_archivable(area):
         raise ValueError("Modules in area " + area + " cannot be archived")
 
 
+def archive_path(release_dir, codec):
+    """
+    Returns the path of the archive of a release
+
+    Args:
+        release_dir(str): Release directory
+        codec(str): One of :data:`dls_ade.dlsbuild.ARCHIVE_CODECS`
+
+    Returns:
+        str: Archive path
+
+    """
+    return release_dir + dict(dlsbuild.ARCHIVE_CODECS)[codec]
+
+
+def find_archive(release_dir):
+    """
+    Finds the archive of a release, whichever codec it was made with
+
+    Args:
+        release_dir(str): Release directory
+
+    Returns:
+        tuple(str, str): Codec and archive path, or None if the release has
+            not been archived
+
+    """
+    for codec, _ in dlsbuild.ARCHIVE_CODECS:
+        archive = archive_path(release_dir, codec)
+        if os.path.isfile(archive):
+            return codec, archive
+    return None
+
+
 def check_file_paths(release_dir, archive, untar):
     """
     Checks if the file to untar exists and the directory to build it a does not
@@ -131,12 +181,20 @@ def _main():
     # Check for the existence of release of this module/IOC
     w_dir = os.path.join(env.prodArea(args.area), args.module_name)
     release_dir = os.path.join(w_dir, args.release)
-    archive = release_dir + ".tar.gz"
+    codec = args.codec
+    found = find_archive(release_dir)
+    if found is not None:
+        # Unarchive with the codec it was archived with. An existing archive
+        # of any codec stops the release being archived again.
+        codec, archive = found
+    else:
+        archive = archive_path(release_dir, codec)
 
     check_file_paths(release_dir, archive, args.untar)
 
     # Create build object for release
-    build = dlsbuild.ArchiveBuild(args.rhel_version, args.epics_version, args.untar)
+    build = dlsbuild.ArchiveBuild(args.rhel_version, args.epics_version,
+                                  args.untar, codec, args.level)
 
     if args.epics_version:
         build.set_epics(args.epics_version)
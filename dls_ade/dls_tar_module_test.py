@@ -39,6 +39,29 @@ class MakeParserTest(unittest.TestCase):
         self.assertEqual(option.dest, "epics_version")
         self.assertIn("--epics_version", option.option_strings)
 
+    def test_codec_defaults_to_gzip(self):
+        args = dls_tar_module.make_parser().parse_args(["dummy", "1-0"])
+
+        self.assertEqual(args.codec, "gzip")
+        self.assertIsNone(args.level)
+
+
+class FindArchiveTest(unittest.TestCase):
+
+    @patch('dls_ade.dls_tar_module.os.path.isfile',
+           side_effect=lambda path: path.endswith(".tar.zst"))
+    def test_given_zstd_archive_then_codec_detected(self, _):
+        self.assertEqual(dls_tar_module.find_archive("/prod/dummy/1-0"),
+                         ("zstd", "/prod/dummy/1-0.tar.zst"))
+
+    @patch('dls_ade.dls_tar_module.os.path.isfile', return_value=False)
+    def test_given_no_archive_then_none_returned(self, _):
+        self.assertIsNone(dls_tar_module.find_archive("/prod/dummy/1-0"))
+
+    def test_archive_path_uses_codec_extension(self):
+        self.assertEqual(dls_tar_module.archive_path("/prod/dummy/1-0", "gzip"),
+                         "/prod/dummy/1-0.tar.gz")
+
 
 class CheckFilePaths(unittest.TestCase):
 
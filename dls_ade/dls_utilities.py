@@ -1,10 +1,13 @@
-import ldap
 import logging
 import os
-import re
+import sys
+import threading
+import time
 
-from packaging import version
+import six
 
+from dls_ade import dls_version, lazy_import
+from dls_ade import profiling
 from dls_ade.constants import LDAP_SERVER_URL
 from dls_ade.exceptions import FedIdError, ParsingError
 
@@ -13,6 +16,8 @@ from dls_ade.exceptions import FedIdError, ParsingError
 GIT_ROOT_DIR = os.getenv('GIT_ROOT_DIR', "controls")
 log = logging.getLogger(__name__)
 
+ldap = lazy_import("ldap")
+
 
 def remove_end_slash(path_string):
 
@@ -66,29 +71,10 @@ def check_tag_is_valid(tag, area=None):
         bool: True if tag is valid, False if not
 
     """
-    if area == 'python3':
-        # VERBOSE allows you to ignore the comments in VERSION_PATTERN.
-        check = re.compile(r"^{}$".format(version.VERSION_PATTERN), re.VERBOSE)
-        result = check.search(tag)
-    else:
-        number = "[0-9]+"
-        optional_number = "[0-9]*"
-
-        regex_pieces = dict(
-            u_v_w = "{u}\-{v}(\-{w})?".format(u=number, v=number, w=number),
-            dls_x_y = "(dls{x}(\-{y})?)?".format(x=number, y=number),
-            alpha_beta_z = "((alpha|beta){z})?".format(z=optional_number)
-        )
-        pattern = '^{u_v_w}{dls_x_y}{alpha_beta_z}$'.format(**regex_pieces)
-        check = re.compile(pattern)
-        result = check.match(tag)
-
-    if result is None:
-        return False
-
-    return True
+    return dls_version.parse(tag, area).valid
 
 
+@profiling.timed("ldap")
 def lookup_contact_details(fed_id):
     """
     Perform an LDAP search to find details corresponding to a FED-ID.
@@ -136,3 +122,49 @@ def lookup_contact_details(fed_id):
     # name_info_dict: {'givenName': ['<FirstName>'], 'sn': ['<Surname>']}
 
     return '{} {}'.format(first_name, surname), email_address
+
+
+def run_concurrently(tasks):
+    """
+    Run a number of independent tasks, each in its own thread, and wait for
+    all of them to finish.
+
+    Args:
+        tasks(list of tuple(str, callable)): Task names and the functions to
+            call, without arguments
+
+    Returns:
+        tuple(dict, dict): Task name to the value it returned, and task name
+            to the time it took in seconds
+
+    Raises:
+        The exception raised by the first failing task, in the order given,
+        once every task has finished
+
+    """
+    results = {}
+    errors = {}
+    timings = {}
+
+    def run(name, task):
+        start = time.time()
+        try:
+            with profiling.span(name):
+                results[name] = task()
+        except Exception:
+            errors[name] = sys.exc_info()
+        finally:
+            timings[name] = time.time() - start
+
+    threads = [threading.Thread(target=run, args=(name, task), name=name)
+               for name, task in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, _ in tasks:
+        if name in errors:
+            six.reraise(*errors[name])
+
+    return results, timings
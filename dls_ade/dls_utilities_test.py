@@ -81,3 +81,35 @@ class CheckTechnicalAreaValidTest(unittest.TestCase):
             dls_utilities.check_technical_area(area, module)
         except ParsingError as error:
             self.assertEqual(str(error), expected_error_msg)
+
+
+class RunConcurrentlyTest(unittest.TestCase):
+
+    def test_results_and_timings_returned_by_task_name(self):
+        results, timings = dls_utilities.run_concurrently(
+            [("a", lambda: 1), ("b", lambda: "two")])
+
+        self.assertEqual(results, {"a": 1, "b": "two"})
+        self.assertEqual(sorted(timings), ["a", "b"])
+
+    def test_given_failing_tasks_then_first_in_order_raised(self):
+        def fail(error):
+            raise error
+
+        with self.assertRaises(ValueError):
+            dls_utilities.run_concurrently(
+                [("ok", lambda: 1),
+                 ("first", lambda: fail(ValueError("first"))),
+                 ("second", lambda: fail(KeyError("second")))])
+
+    def test_all_tasks_run_when_one_fails(self):
+        ran = []
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            dls_utilities.run_concurrently(
+                [("fail", fail), ("other", lambda: ran.append(True))])
+
+        self.assertEqual(ran, [True])
@@ -0,0 +1,256 @@
+"""
+Release versions (tags) of modules.
+
+Two schemes are in use: the traditional Diamond X-Y[-Z][dlsA[-B]] for most
+areas and, for python3 modules, any version permitted by PEP 440
+(https://www.python.org/dev/peps/pep-0440/). Versions of both schemes are
+ordered the same way, by :func:`release_key`, which is how releases have
+always been sorted.
+"""
+
+import re
+try:
+    from functools import lru_cache
+except ImportError:  # Python 2
+    lru_cache = None
+import functools
+
+DLS_SCHEME = "dls"
+PEP440_SCHEME = "pep440"
+SCHEMES = (DLS_SCHEME, PEP440_SCHEME)
+
+# Patterns that a tag must match to be valid, by scheme. The PEP 440 one is
+# added by scheme_pattern, so packaging is only imported if it is needed.
+SCHEME_PATTERNS = {
+    DLS_SCHEME: re.compile(
+        r"^[0-9]+-[0-9]+(-[0-9]+)?(dls[0-9]+(-[0-9]+)?)?((alpha|beta)[0-9]*)?$"
+    ),
+}
+
+DIGITS_RE = re.compile(r"\d+")
+# Runs of digits and of anything else, for incrementing versions
+TOKEN_RE = re.compile(r"\d+|[^\d]+")
+
+# Number of parsed versions and release keys to remember
+CACHE_SIZE = 4096
+
+
+def _bounded_cache(maxsize):
+    """Memoise a function, forgetting every result when more than maxsize
+    are stored. Used where functools.lru_cache is missing."""
+    def decorator(function):
+        cache = {}
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            try:
+                return cache[args]
+            except KeyError:
+                pass
+            if len(cache) >= maxsize:
+                cache.clear()
+            result = cache[args] = function(*args)
+            return result
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def _memoise(function):
+    if lru_cache is not None:
+        return lru_cache(maxsize=CACHE_SIZE)(function)
+    return _bounded_cache(CACHE_SIZE)(function)
+
+
+def scheme_pattern(scheme):
+    """
+    Return the pattern that valid tags of a scheme match.
+
+    Args:
+        scheme(str): DLS_SCHEME or PEP440_SCHEME
+
+    Returns:
+        :class:`re.Pattern`: Compiled pattern
+
+    """
+    try:
+        return SCHEME_PATTERNS[scheme]
+    except KeyError:
+        if scheme != PEP440_SCHEME:
+            raise
+    from packaging import version as pep440
+    # VERBOSE allows you to ignore the comments in VERSION_PATTERN.
+    pattern = SCHEME_PATTERNS[scheme] = re.compile(
+        r"^{}$".format(pep440.VERSION_PATTERN), re.VERBOSE)
+    return pattern
+
+
+def scheme_for_area(area):
+    """
+    Return the versioning scheme of an area.
+
+    Args:
+        area(str): Area, e.g. support
+
+    Returns:
+        str: PEP440_SCHEME for python3, otherwise DLS_SCHEME
+
+    """
+    return PEP440_SCHEME if area == "python3" else DLS_SCHEME
+
+
+class ReleaseKey(tuple):
+    """
+    Sortable key of a release tag, the components from
+    :func:`release_key` as a tuple. Keys can be used in sets and as
+    dictionary keys.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return "ReleaseKey({})".format(tuple.__repr__(self))
+
+
+@_memoise
+def release_key(release):
+    """
+    Format release tag into a sortable key. Results are cached, so sorting
+    the same releases again is cheap.
+
+    Example: 4-5beta2dls1-3 => (4,'z',5,'beta2',0,'',1,'z',3,'z',0,'')
+    Note: The z allows us to sort alpha, beta and release candidates before
+    release numbers without a text suffix
+
+    Args:
+        release(str): Release tag
+
+    Returns:
+        :class:`ReleaseKey`: Component parts of release tag
+
+    """
+    components = []
+    # first split by dls: 4-5beta2dls1-3 --> 4-5beta2 and 1-3
+    for part in release.split("dls", 1):
+        # rejig separators
+        part = part.replace(".", "-").replace("_", "-")
+        # allow up to 3 -'s: 4-5beta2 --> 4, 5 and beta2
+        for subpart in part.split("-", 3):
+            match = DIGITS_RE.match(subpart)
+            if match:
+                # turn the digit to an int so it sorts properly
+                components.append(int(match.group()))
+                components.append(subpart[match.end():] or 'z')
+            else:
+                # just add the string part
+                components.append(0)
+                components.append(subpart)
+        # pad to 6 elements
+        components += [0, ''] * int((6-len(components))/2)
+    # pad to 12 elements
+    components += [0, ''] * int((12-len(components))/2)
+    return ReleaseKey(components)
+
+
+@functools.total_ordering
+class Version(object):
+    """
+    A release version of a module. Use :func:`parse` rather than creating
+    Versions directly, so that each tag is only parsed once.
+
+    Versions are ordered by :func:`release_key`, then by tag, whatever their
+    scheme.
+
+    Variables
+        * tag(str): The tag, e.g. 4-5dls1
+        * scheme(str): DLS_SCHEME or PEP440_SCHEME
+        * key(:class:`ReleaseKey`): Sort key of the tag
+        * valid(bool): Whether the tag conforms to the scheme
+
+    """
+    __slots__ = ("tag", "scheme", "key", "valid")
+
+    def __init__(self, tag, scheme=DLS_SCHEME):
+        if scheme not in SCHEMES:
+            raise ValueError("Unknown versioning scheme: {}".format(scheme))
+        self.tag = tag
+        self.scheme = scheme
+        self.key = release_key(tag)
+        self.valid = scheme_pattern(scheme).match(tag) is not None
+
+    def validate(self):
+        """
+        Check that the tag conforms to the scheme.
+
+        Returns:
+            :class:`Version`: self
+
+        Raises:
+            :class:`exceptions.ValueError`: The tag is not valid
+
+        """
+        if not self.valid:
+            raise ValueError("Release {} does not conform to the {} "
+                             "convention".format(self.tag, self.scheme))
+        return self
+
+    def increment(self):
+        """
+        Increment the most minor part of the version number, e.g. 4-5dls12
+        to 4-5dls13 or 1.2rc1 to 1.2rc2.
+
+        Returns:
+            :class:`Version`: Incremented version
+
+        """
+        tokens = TOKEN_RE.findall(self.tag)
+        for i in reversed(range(0, len(tokens))):
+            if tokens[i].isdigit():
+                tokens[i] = str(int(tokens[i]) + 1)
+                break
+        return _parse("".join(tokens), self.scheme)
+
+    def _compare_key(self):
+        return self.key, self.tag
+
+    def __eq__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._compare_key() == other._compare_key()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._compare_key() < other._compare_key()
+
+    def __hash__(self):
+        return hash(self._compare_key())
+
+    def __str__(self):
+        return self.tag
+
+    def __repr__(self):
+        return "Version({!r}, {!r})".format(self.tag, self.scheme)
+
+
+@_memoise
+def _parse(tag, scheme):
+    return Version(tag, scheme)
+
+
+def parse(tag, area=None):
+    """
+    Parse a tag, or return the version already parsed from it.
+
+    Args:
+        tag(str): Tag, e.g. 4-5dls1
+        area(str): Area of the module, which decides the versioning scheme
+
+    Returns:
+        :class:`Version`: Parsed version
+
+    """
+    return _parse(tag, scheme_for_area(area))
@@ -0,0 +1,78 @@
+import unittest
+
+from dls_ade import dls_version
+from dls_ade.dls_version import Version, parse
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_given_same_tag_then_same_version_returned(self):
+        self.assertIs(parse("4-5dls1"), parse("4-5dls1"))
+
+    def test_given_area_then_scheme_set(self):
+        self.assertEqual(parse("1.2").scheme, dls_version.DLS_SCHEME)
+        self.assertEqual(parse("1.2", "python3").scheme,
+                         dls_version.PEP440_SCHEME)
+
+    def test_given_valid_dls_tags_then_valid(self):
+        for tag in ["2-51", "21-5-3", "2-5dls2-3", "1-2-3dls4-5beta"]:
+            self.assertTrue(parse(tag, "support").valid)
+
+    def test_given_invalid_dls_tags_then_not_valid(self):
+        for tag in ["2-5a", "1", "8-5-", "1.2"]:
+            self.assertFalse(parse(tag, "support").valid)
+
+    def test_given_python3_tags_then_pep440_validity(self):
+        self.assertTrue(parse("1.2.3rc4", "python3").valid)
+        self.assertTrue(parse("1.2+dls3", "python3").valid)
+        self.assertFalse(parse("1.2dls3", "python3").valid)
+
+    def test_given_unknown_scheme_then_error(self):
+        with self.assertRaises(ValueError):
+            Version("1-2", "semver")
+
+
+class VersionTest(unittest.TestCase):
+
+    def test_validate_returns_valid_version(self):
+        version = parse("1-2")
+        self.assertIs(version.validate(), version)
+
+    def test_validate_raises_for_invalid_version(self):
+        with self.assertRaises(ValueError):
+            parse("aaa").validate()
+
+    def test_increment_increments_most_minor_number(self):
+        self.assertEqual(parse("4-5dls12").increment().tag, "4-5dls13")
+        self.assertEqual(parse("1.2rc1", "python3").increment().tag,
+                         "1.2rc2")
+
+    def test_increment_keeps_scheme(self):
+        self.assertEqual(parse("1.2", "python3").increment().scheme,
+                         dls_version.PEP440_SCHEME)
+
+    def test_versions_ordered_by_release_key(self):
+        tags = ["4-5", "4-5beta2dls1-3", "4-10", "4-5dls1", "4-5beta1"]
+        ordered = sorted(parse(tag) for tag in tags)
+
+        self.assertEqual([version.tag for version in ordered],
+                         ["4-5beta1", "4-5beta2dls1-3", "4-5", "4-5dls1",
+                          "4-10"])
+
+    def test_versions_with_equal_keys_ordered_by_tag(self):
+        self.assertLess(parse("4-5"), parse("4.5"))
+        self.assertNotEqual(parse("4-5"), parse("4.5"))
+
+    def test_versions_are_hashable(self):
+        self.assertEqual(len({parse("1-2"), parse("1-2"), parse("1-3")}), 2)
+
+
+class ReleaseKeyTest(unittest.TestCase):
+
+    def test_normalises_4_5_beta2_dls_1_3(self):
+        self.assertEqual(dls_version.release_key("4-5beta2dls1-3"),
+                         (4, 'z', 5, 'beta2', 0, '', 1, 'z', 3, 'z', 0, ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
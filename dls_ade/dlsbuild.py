@@ -6,9 +6,12 @@ import subprocess
 import tempfile
 import stat
 import shutil
-import ldap
 import logging
+import multiprocessing
+from collections import namedtuple
 
+import dls_ade
+from dls_ade import profiling
 from dls_ade.constants import BUILD_SERVERS, SERVER_SHORTCUT, DLSBUILD_ROOT_DIR, DLSBUILD_WIN_ROOT_DIR, LDAP_SERVER_URL, SYSLOG_SERVER, SYSLOG_SERVER_PORT
 from dls_ade.dls_environment import environment
 from dls_ade.dls_utilities import lookup_contact_details
@@ -19,10 +22,76 @@ log = logging.getLogger(__name__)
 usermsg = logging.getLogger("usermessages")
 
 build_scripts = os.path.join(
-    os.path.dirname(os.path.realpath(__file__)), "dlsbuild_scripts")
+    dls_ade.DATA_DIR or os.path.dirname(os.path.realpath(__file__)),
+    "dlsbuild_scripts")
+# Build servers pick up jobs from this directory
+queue_dir = os.path.join(DLSBUILD_ROOT_DIR, "work", "etc", "build", "queue")
+# Every submission is recorded here (tab separated: build dir, module,
+# version, build name, server)
+release_log = os.path.expanduser(os.path.join("~", ".dls-release-log"))
+
+# Local test builds are made in here. Incremental test builds keep a
+# persistent tree per user and epics version under test_dir/incremental
+test_dir = os.path.join(DLSBUILD_ROOT_DIR, "work", "etc", "build", "test")
+# Areas whose build scripts support incremental test builds
+INCREMENTAL_AREAS = ("support", "ioc")
+# Written in the module directory of an incremental tree after each
+# successful build, so the next build can be compared against it
+BUILD_TIME_FILE = ".test_build_time"
+
+BUILD_NAME_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+# Compression codecs of archive.sh and the archive file extension of each.
+# The first is the default.
+ARCHIVE_CODECS = (("gzip", ".tar.gz"), ("zstd", ".tar.zst"))
+# Per-file checksums of an archived release are kept in <release>.sha256
+MANIFEST_EXTENSION = ".sha256"
+
+# The parts of a version control system instance that the build scripts use.
+# Unlike the instance itself this can be passed to another process.
+VcsInfo = namedtuple("VcsInfo", ["vcs_type", "release_repo"])
+# Result of one test build in a matrix: the EPICS version, build script exit
+# status, time taken in seconds and the error log, if it was kept
+MatrixResult = namedtuple(
+    "MatrixResult", ["epics", "status", "duration", "error_log"])
+
 os_list = set(os.listdir(build_scripts))
 os_list -= set([".svn"])
 
+# Script bodies (everything after the #! line) keyed by (os, script name).
+# Loaded once per process as the package is often installed on NFS.
+_script_templates = {}
+
+
+def load_script_template(bld_os, script_name):
+    """Return the body of a build script, reading it on first use only.
+
+    Args:
+        bld_os(str): Build operating system, i.e. a directory in
+            dlsbuild_scripts
+        script_name(str): File name of the script, e.g. support.sh
+
+    Returns:
+        str: The script without its first (#!) line, or None if the script
+            does not exist
+
+    """
+    key = (bld_os, script_name)
+    try:
+        return _script_templates[key]
+    except KeyError:
+        pass
+
+    try:
+        with open(os.path.join(build_scripts, bld_os, script_name), 'r') as f:
+            # skip the first line with the bin/bash
+            body = "".join(f.readlines()[1:])
+    except IOError:
+        body = None
+
+    _script_templates[key] = body
+    return body
+
 
 def epics_servers(os, epics):
     """Return list of servers that can build a version of epics"""
@@ -40,6 +109,112 @@ def default_build(epics):
         return RedhatBuild(None, epics)
 
 
+def target_build(target, epics=None):
+    """Return the build object for a build server or server shortcut.
+
+    Args:
+        target(str): Build server name, or one of the SERVER_SHORTCUT keys
+            e.g. 7 or 64_2012
+        epics(str): EPICS version, or None for the default of the server
+
+    Returns:
+        :class:`Builder`: Red Hat or Windows build object
+
+    Raises:
+        ValueError: If there is no such build server
+
+    """
+    server = SERVER_SHORTCUT.get(target, target)
+    for bld_os, servers in BUILD_SERVERS.items():
+        if server in servers:
+            if bld_os == "Windows":
+                return WindowsBuild(target, epics)
+            return RedhatBuild(target, epics)
+    raise ValueError("Unknown build target {}. Use a build server or one "
+                     "of {}".format(target, ", ".join(sorted(SERVER_SHORTCUT))))
+
+
+def submit_all(builds, module, version, vcs, test=False):
+    """Submit the same module version to several build servers together.
+
+    Args:
+        builds(list of :class:`Builder`): One build object per build server
+        module(str): Module name
+        version(str): Version to build
+        vcs: Version control system instance, as for :meth:`Builder.submit`
+        test(bool): Build in the test directory instead of prod
+
+    Returns:
+        list of str: Build names, in the same order as `builds`
+
+    """
+    return submit_jobs(
+        [(build, module, version, vcs) for build in builds], test)
+
+
+def submit_jobs(jobs, test=False):
+    """Queue a batch of build jobs together.
+
+    Jobs for the same module version get build names a second apart, so that
+    builds sharing a release directory do not overwrite each other's logs.
+    The queue files are written under hidden temporary names first and only
+    renamed into place once all of them have been written, so either every
+    job is queued or none is.
+
+    Args:
+        jobs(list of tuple): (build object, module, version, vcs) for each
+            job. A build object can be used for more than one job.
+        test(bool): Build in the test directory instead of prod
+
+    Returns:
+        list of str: Build names, in the same order as `jobs`
+
+    """
+    submitted = time.time()
+    seen = {}
+    prepared = []
+    for build, module, version, vcs in jobs:
+        # Build names only resolve to the second
+        offset = seen.get((module, version), 0)
+        seen[(module, version)] = offset + 1
+        build_name = build.build_name(
+            "build", module, version, when=submitted + offset)
+        prepared.append(build.prepare_submission(
+            build_name, module, version, vcs, test))
+
+    written = []
+    try:
+        for build, params, filename, script in prepared:
+            log.info("Build server job parameters: {}".format(params))
+            path = os.path.join(queue_dir, filename)
+            temp_path = os.path.join(
+                queue_dir, ".{}.{}.tmp".format(filename, os.getpid()))
+            # Open as the original submissions did, so the umask applies
+            with open(temp_path, "w") as f:
+                written.append((temp_path, path))
+                f.write(script)
+    except (IOError, OSError):
+        for temp_path, _ in written:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+
+    for temp_path, path in written:
+        os.rename(temp_path, path)
+
+    # Create a log of the builds
+    with open(release_log, "a") as f:
+        f.write("".join("\t".join([
+            params["build_dir"], params["module"], params["version"],
+            params["build_name"], build.server]) + "\n"
+            for build, params, _, _ in prepared))
+
+    for _, _, filename, _ in prepared:
+        usermsg.info("Build request file: {fname}\nCreated in : {dirname}"
+                     .format(fname=filename, dirname=queue_dir))
+    return [params["build_name"] for _, params, _, _ in prepared]
+
+
 def default_server():
     """Return the default server for this machine"""
     os = platform.system()
@@ -53,6 +228,133 @@ def default_server():
     return server
 
 
+def default_make_jobs():
+    """Return the number of parallel make jobs to use on this machine"""
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def read_build_time(path):
+    """Return the duration in seconds recorded in a build time file.
+
+    Args:
+        path(str): File written by :func:`write_build_time`
+
+    Returns:
+        float: Duration, or None if no valid duration has been recorded
+
+    """
+    try:
+        with open(path, "r") as f:
+            return float(f.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_build_time(path, duration):
+    """Record the duration in seconds of a build in a build time file"""
+    try:
+        with open(path, "w") as f:
+            f.write("{:.1f}\n".format(duration))
+    except (IOError, OSError) as e:
+        log.warning("Could not record build time in {}: {}".format(path, e))
+
+
+def vcs_info(vcs):
+    """Return the :class:`VcsInfo` of a version control system instance"""
+    if vcs is None:
+        return None
+    return VcsInfo(vcs.vcs_type, vcs.release_repo)
+
+
+def _matrix_test_build(job):
+    """Make one test build of a matrix; run in a pool worker process"""
+    build, module, version, info, make_jobs = job
+    build_name = "{}_{}".format(
+        build.build_name("local", module, version), build.epics())
+    start = time.time()
+    status = build.test(module, version, info, make_jobs=make_jobs,
+                        build_name=build_name)
+    duration = time.time() - start
+
+    error_log = os.path.join(
+        test_dir, build_name, module, version, build_name + ".err")
+    if not os.path.isfile(error_log):
+        error_log = None
+    return MatrixResult(build.epics(), status, duration, error_log)
+
+
+def test_matrix(builds, module, version, vcs, cpus=None):
+    """Test build a module with several EPICS versions at the same time.
+
+    Each build runs in its own process and its own build directory. The CPUs
+    are shared out between the builds as parallel make jobs.
+
+    Args:
+        builds(list of :class:`Builder`): One local build object per EPICS
+            version
+        module(str): Module name
+        version(str): Version or commit to build
+        vcs: Version control system instance, as for :meth:`Builder.test`
+        cpus(int): Number of CPUs to use, default is all of them
+
+    Returns:
+        list of :class:`MatrixResult`: Results, in the same order as `builds`
+
+    """
+    if cpus is None:
+        cpus = default_make_jobs()
+    make_jobs = max(1, cpus // len(builds))
+    info = vcs_info(vcs)
+    jobs = [(build, module, version, info, make_jobs) for build in builds]
+
+    pool = multiprocessing.Pool(len(jobs))
+    try:
+        return pool.map(_matrix_test_build, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def split_build_name(build_name):
+    """Split a build name into the fields it was made from.
+
+    Args:
+        build_name(str): Name created by :meth:`Builder.build_name`
+
+    Returns:
+        tuple(str, str, str, str, str): Build type ('build' or 'local'),
+            time stamp, user, area and the remaining '<module>_<version>'
+
+    Raises:
+        ValueError: If the name does not have enough fields
+
+    """
+    fields = build_name.split("_", 4)
+    if len(fields) != 5:
+        raise ValueError("Not a build name: {}".format(build_name))
+    return tuple(fields)
+
+
+def build_name_time(build_name):
+    """Return the submission time encoded in a build name.
+
+    Args:
+        build_name(str): Name created by :meth:`Builder.build_name`
+
+    Returns:
+        float: Seconds since the epoch
+
+    Raises:
+        ValueError: If the name does not contain a valid time stamp
+
+    """
+    stamp = split_build_name(build_name)[1]
+    return time.mktime(time.strptime(stamp, BUILD_NAME_TIME_FORMAT))
+
+
 class Builder:
     "Base class for Diamond build server submissions"
 
@@ -151,28 +453,60 @@ class Builder:
 
     def _script(self, params, header, format):
         """Returns the build script with headers and variables defined"""
-        script = header+"\n\n"
-
-        for name in params.keys():
-            script += format % ("_" + name, params[name]+"\n")
-
-        try:
-            with open(self.script_utils_template_file(), 'r') as f:
-                # skip the first line with the bin/bash
-                script += "".join(f.readlines()[1:])
-        except IOError:
+        utils_template = load_script_template(
+            self.os, os.path.basename(self.script_utils_template_file()))
+        if utils_template is None:
             # No all platforms have a utils_template and thats ok...
-            log.debug("No utils_template script found in: {}".format(self.script_utils_template_file()))
-
-        with open(self.script_file(), 'r') as f:
-            # skip the first line with the bin/bash
-            script += "".join(f.readlines()[1:])
-
-        return script
-
-    def build_name(self, build, module, version):
+            log.debug("No utils_template script found in: {}".format(
+                self.script_utils_template_file()))
+            utils_template = ""
+
+        script_body = load_script_template(
+            self.os, os.path.basename(self.script_file()))
+        if script_body is None:
+            raise IOError("Build script {} not found".format(
+                self.script_file()))
+
+        parts = [header, "\n\n"]
+        parts.extend(format % ("_" + name, params[name] + "\n")
+                     for name in params.keys())
+        parts.append(utils_template)
+        parts.append(script_body)
+        return "".join(parts)
+
+    def render_many(self, params_list):
+        """Returns a build script for each parameter dictionary given.
+
+        The script templates are only read once, so this is the cheapest way
+        to prepare a batch of submissions.
+
+        Args:
+            params_list(list of dict): Parameters from :meth:`build_params`
+
+        Returns:
+            list of str: Build scripts, in the same order as `params_list`
+
+        """
+        return [self.build_script(params) for params in params_list]
+
+    def build_name(self, build, module, version, when=None):
+        """Returns a name for a build job, made from its submission time.
+
+        Args:
+            build(str): 'build' for a build server job, 'local' for a local
+                test build
+            module(str): Module name
+            version(str): Version to build
+            when(float): Submission time, default is now
+
+        Returns:
+            str: Build name, as split by :func:`split_build_name`
+
+        """
+        if when is None:
+            when = time.time()
         return "_".join([
-            build, time.strftime("%Y%m%d-%H%M%S"),
+            build, time.strftime(BUILD_NAME_TIME_FORMAT, time.localtime(when)),
             self.user, self.area, module.replace("/", "_"), version])
 
     def build_params(self, build_dir, module, version, vcs, build_name):
@@ -202,18 +536,59 @@ class Builder:
         remote = self.get_server()
         return local == remote
 
-    def test(self, module, version, vcs):
-        """Builds module version on the local system using the code in the
-        src_dir directory of subversion."""
+    def incremental_test_dir(self):
+        """Returns the persistent directory for incremental test builds"""
+        return os.path.join(test_dir, "incremental", self.user, self.epics())
 
-        build_name = self.build_name("local", module, version)
-        build_dir = os.path.join(
-            DLSBUILD_ROOT_DIR, "work", "etc", "build", "test", build_name)
+    @profiling.timed("test build")
+    def test(self, module, version, vcs, incremental=False, make_jobs=None,
+             ccache=False, build_name=None):
+        """Builds module version on the local system using the code in the
+        src_dir directory of subversion.
+
+        Args:
+            module(str): Module name
+            version(str): Version or commit to build
+            vcs: Version control system instance, as for :meth:`submit`
+            incremental(bool): Build in a tree that is kept between test
+                builds of the module, without cleaning it first. The tree is
+                kept after a successful build.
+            make_jobs(int): Number of parallel make jobs. Default is serial
+                for a normal test build and the number of CPUs for an
+                incremental one.
+            ccache(bool): Compile through ccache, if it is installed
+            build_name(str): Name for the build, default is from
+                :meth:`build_name`
+
+        Returns:
+            int: Exit status of the build script
+
+        """
+        if incremental:
+            if self.os != "Linux" or self.area not in INCREMENTAL_AREAS:
+                raise ValueError(
+                    "Incremental test builds are only possible for Linux {} "
+                    "modules".format(" and ".join(INCREMENTAL_AREAS)))
+            if make_jobs is None:
+                make_jobs = default_make_jobs()
+
+        if build_name is None:
+            build_name = self.build_name("local", module, version)
+        if incremental:
+            build_dir = self.incremental_test_dir()
+        else:
+            build_dir = os.path.join(test_dir, build_name)
 
         usermsg.info("Test build of module in {}".format(build_dir))
 
         params = self.build_params(
             build_dir, module, version, vcs, build_name)
+        if incremental:
+            params["incremental"] = "true"
+        if make_jobs is not None:
+            params["make_jobs"] = str(make_jobs)
+        if ccache:
+            params["ccache"] = "true"
 
         dirname = tempfile.mkdtemp(suffix="_" + module.replace("/", "_"))
         filename = os.path.join(dirname, build_name+self.exten)
@@ -234,47 +609,61 @@ class Builder:
         for k in keys:  # Ensure SSH environment variables are passed to call
             command += "%s='%s' " % (k, os.environ[k])
         command += filename
+        start = time.time()
         status = subprocess.call(command, shell=True)
+        duration = time.time() - start
 
         if status != 0:
             usermsg.info("Local test build failed. Results are in {}".format(build_dir))
+        elif incremental:
+            time_file = os.path.join(build_dir, module, BUILD_TIME_FILE)
+            previous = read_build_time(time_file)
+            if previous is None:
+                usermsg.info("Local test build succeeded in {:.0f}s".format(
+                    duration))
+            else:
+                usermsg.info(
+                    "Local test build succeeded in {:.0f}s ({:+.0f}s compared "
+                    "to the previous incremental build)".format(
+                        duration, duration - previous))
+            write_build_time(time_file, duration)
         else:
-            usermsg.info("Local test build succeeded")
+            usermsg.info("Local test build succeeded in {:.0f}s".format(
+                duration))
             shutil.rmtree(build_dir)
         return status
 
-    def submit(self, module, version, vcs, test=False):
-        """Submit a job to the build queue to build module version using the
-        code in the src_dir directory of subversion. If test is anything
-        that evaluates to True it is built in the test directory. Otherwise it
-        is a normal production build."""
+    def prepare_submission(self, build_name, module, version, vcs,
+                           test=False):
+        """Returns everything needed to queue a build job.
+
+        Args:
+            build_name(str): Name from :meth:`build_name`
+            module(str): Module name
+            version(str): Version to build
+            vcs: Version control system instance
+            test(bool): Build in the test directory instead of prod
 
-        build_name = self.build_name("build", module, version)
+        Returns:
+            tuple: (self, params, queue file name, build script)
+
+        """
         if test:
-            build_dir = os.path.join(
-                DLSBUILD_ROOT_DIR, "work", "etc", "build", "test", build_name)
+            build_dir = os.path.join(test_dir, build_name)
         else:
             build_dir = self.dls_env.prodArea(self.area)
 
         params = self.build_params(
             build_dir, module, version, vcs, build_name)
-
-        # generate the filename
-        pathname = os.path.join(DLSBUILD_ROOT_DIR, "work", "etc", "build", "queue")
         filename = "%s.%s" % (params["build_name"], self.server)
+        return self, params, filename, self.build_script(params)
 
-        # Submit the build script
-        log.info("Build server job parameters: {}".format(params))
-        with open(os.path.join(pathname, filename), "w") as f:
-            f.write(self.build_script(params))
-
-        # Create a log of the build
-        with open(os.path.expanduser(os.path.join("~", ".dls-release-log")), "a") as f:
-            f.write("\t".join([
-                params["build_dir"], params["module"], params["version"],
-                params["build_name"], self.server]) + "\n")
-
-        usermsg.info("Build request file: {fname}\nCreated in : {dirname}".format(fname=filename, dirname=pathname))
+    def submit(self, module, version, vcs, test=False):
+        """Submit a job to the build queue to build module version using the
+        code in the src_dir directory of subversion. If test is anything
+        that evaluates to True it is built in the test directory. Otherwise it
+        is a normal production build."""
+        submit_all([self], module, version, vcs, test)
 
 
 class WindowsBuild(Builder):
@@ -305,16 +694,25 @@ class RedhatBuild(Builder):
 class ArchiveBuild(RedhatBuild):
     """Implements the build class for archiving or de-archiving modules. The
     constructor takes a single parameter which, if true, dearchives, otherwise
-    the module will be archived."""
-    def __init__(self, server, epics, untar):
+    the module will be archived. The archive is compressed with `codec`, one
+    of ARCHIVE_CODECS, at compression `level` (default is the compressor's
+    own default)."""
+    def __init__(self, server, epics, untar, codec=ARCHIVE_CODECS[0][0],
+                 level=None):
         RedhatBuild.__init__(self, server, epics)
+        assert codec in dict(ARCHIVE_CODECS), \
+            "Archive codec %s is not supported" % codec
         self.exten = ".sh"
         self.action = "unarchive" if untar else "archive"
+        self.codec = codec
+        self.level = level
 
     def build_script(self, params):
         params["action"] = self.action
+        params["codec"] = self.codec
+        if self.level is not None:
+            params["level"] = str(self.level)
         return Builder._script(self, params, "#!/bin/bash", "%s=%s")
 
     def script_file(self):
         return os.path.join(build_scripts, self.os, "archive.sh")
-
@@ -19,6 +19,13 @@
 #   _area      : The build area
 #   _force     : Force the build (i.e. rebuild even if already exists)
 #   _build_name: The base name to use for log files etc.
+#   _action    : archive or unarchive
+#   _codec     : Compression, gzip (default) or zstd. gzip uses pigz if it
+#                is installed; both compress with every CPU.
+#   _level     : Compression level, default is the compressor's default
+#
+# A manifest of the SHA-256 checksum of every archived file is written next
+# to the archive and checked after unpacking.
 #
 
 __run_job()
@@ -31,20 +38,50 @@ __run_job()
     set -o errexit
 
     {
+        set -o pipefail
         release_dir=${_build_dir}/${_module}
-        archive=${_build_dir}/${_module}/${_version}.tar.gz
+        manifest=${release_dir}/${_version}.sha256
+        level=${_level:+-${_level}}
+
+        case "${_codec:-gzip}" in
+        zstd)
+            archive=${release_dir}/${_version}.tar.zst
+            compress="zstd -q -T0 ${level}"
+            decompress="zstd -q -d -c"
+            ;;
+        gzip)
+            archive=${release_dir}/${_version}.tar.gz
+            if command -v pigz >/dev/null 2>&1 ; then
+                compress="pigz ${level}"
+                decompress="pigz -d -c"
+            else
+                compress="gzip ${level}"
+                decompress="gzip -d -c"
+            fi
+            ;;
+        *)
+            ReportFailure "Unknown archive codec: ${_codec}"
+            ;;
+        esac
 
         if [ "${_action}" == "archive" ] ; then
-            find ${release_dir}/${_version} -name O.\* -prune -exec rm -rf {} \;
-            SysLog info "Archiving: ${release_dir}/${_version} to ${archive}"
-            tar -czf  $archive -C  $release_dir ${_version} || ReportFailure "Archiving failed"
+            find ${release_dir}/${_version} -name O.\* -prune -exec rm -rf {} +
+            SysLog info "Writing manifest: ${manifest}"
+            ( cd $release_dir && find ${_version} -type f -print0 | sort -z | xargs -0 -r sha256sum ) > ${manifest}.tmp || ReportFailure "Writing manifest failed"
+            SysLog info "Archiving: ${release_dir}/${_version} to ${archive} with ${compress}"
+            tar -cf - -C $release_dir ${_version} | $compress > ${archive}.tmp || ReportFailure "Archiving failed"
+            mv ${archive}.tmp ${archive} && mv ${manifest}.tmp ${manifest} || ReportFailure "Archiving failed"
             SysLog info "Removing release: ${_version}"
             rm -rf ${release_dir}/${_version} || ReportFailure "Unable to remove archived release dir"
         else
             SysLog info "Unpacking from archive: ${archive} into ${release_dir} ${_version}"
-            tar -xzpf $archive -C  $release_dir ${_version} || ReportFailure "Unarchiving failed"
+            $decompress $archive | tar -xpf - -C $release_dir ${_version} || ReportFailure "Unarchiving failed"
+            if [ -f ${manifest} ] ; then
+                SysLog info "Verifying against manifest: ${manifest}"
+                ( cd $release_dir && sha256sum --quiet -c ${manifest} ) || ReportFailure "Unpacked files do not match ${manifest}"
+            fi
             SysLog info "Removing archive: ${archive}"
-            rm -rf ${archive} || ReportFailure "Unable to remove archive"
+            rm -f ${archive} ${manifest} || ReportFailure "Unable to remove archive"
         fi
     } > "$TEMP_LOG" 2>&1
 }
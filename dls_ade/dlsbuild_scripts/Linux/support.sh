@@ -20,6 +20,9 @@
 #   _force     : Force the build (i.e. rebuild even if already exists)
 #   _build_name: The base name to use for log files etc.
 #
+# and optionally, for local test builds, _incremental, _make_jobs and _ccache
+# (see RunMake in utils_template.sh)
+#
 
 # don't let standard input block the script execution
 exec 0</dev/null
@@ -41,7 +44,9 @@ fi
 SysLog debug "version dir: " ${PWD}/$_version
 
 
-if [ ! -d $_version ]; then
+if [ "$_incremental" == "true" ] ; then
+    PrepareIncrementalTree
+elif [ ! -d $_version ]; then
     CloneRepo
 elif [ "$_force" == "true" ] ; then
     SysLog info "Force: removing previous version: ${PWD}/$_version"
@@ -81,7 +86,7 @@ build_log=${_build_name}.log
 SysLog info "Starting build. Build log: ${PWD}/${build_log} errors: ${PWD}/${error_log}"
 {
     {
-        make clean && make
+        RunMake
         echo $? >${_build_name}.sta
     } 4>&1 1>&3 2>&4 |
     tee $error_log
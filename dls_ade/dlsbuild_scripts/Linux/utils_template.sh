@@ -90,3 +90,49 @@ CloneRepo()
         ( cd $_version && ( git fetch --depth=1 origin tag $_version || git fetch origin tag $_version ) && git checkout $_version ) || ReportFailure "Can not checkout $_version"
     fi
 }
+
+# Optional pre-defined variables for local test builds are:
+#  _incremental : "true" to build in a tree kept from the previous test build
+#  _make_jobs   : Number of parallel make jobs
+#  _ccache      : "true" to compile through ccache, if it is installed
+
+# Make $_version a link to a clone that is kept between incremental test
+# builds, checked out at $_version. Build products from the previous build
+# are left in place so that make only rebuilds what has changed.
+PrepareIncrementalTree()
+{
+    local tree=.incremental
+    if [ ! -d $tree ] ; then
+        SysLog info "Cloning repo for incremental builds: $_git_dir"
+        git clone $_git_dir $tree || ReportFailure "Can not clone $_git_dir"
+    else
+        SysLog info "Fetching repo for incremental build: $_git_dir"
+        ( cd $tree && git remote set-url origin $_git_dir && git fetch --tags origin ) || ReportFailure "Can not fetch $_git_dir"
+    fi
+    SysLog info "Checking out: $_version"
+    ( cd $tree && git checkout --force $_version ) || ReportFailure "Can not checkout $_version"
+    rm -f $_version
+    ln -s $tree $_version || ReportFailure "Can not link $_version to $tree"
+}
+
+# Run make for the module in the current directory. The tree is cleaned first
+# unless this is an incremental build.
+RunMake()
+{
+    local make_args=()
+    if [ -n "$_make_jobs" ] ; then
+        make_args+=(-j$_make_jobs)
+    fi
+    if [ "$_ccache" == "true" ] ; then
+        if command -v ccache >/dev/null 2>&1 ; then
+            make_args+=(CC="ccache gcc" CCC="ccache g++")
+        else
+            SysLog warn "ccache not found: building without it"
+        fi
+    fi
+    if [ "$_incremental" == "true" ] ; then
+        make "${make_args[@]}"
+    else
+        make clean && make "${make_args[@]}"
+    fi
+}
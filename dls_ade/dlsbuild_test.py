@@ -0,0 +1,271 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch, mock_open, MagicMock
+
+from dls_ade import dlsbuild
+
+
+def set_up_mock(self, path):
+
+    patch_obj = patch(path)
+    self.addCleanup(patch_obj.stop)
+    mock_obj = patch_obj.start()
+
+    return mock_obj
+
+
+class LoadScriptTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(dlsbuild._script_templates.clear)
+        dlsbuild._script_templates.clear()
+
+    def test_given_script_then_first_line_skipped(self):
+        with patch('dls_ade.dlsbuild.open',
+                   mock_open(read_data="#!/bin/bash\necho a\necho b\n"),
+                   create=True):
+            body = dlsbuild.load_script_template("Linux", "support.sh")
+
+        self.assertEqual(body, "echo a\necho b\n")
+
+    def test_given_script_loaded_twice_then_file_read_once(self):
+        m = mock_open(read_data="#!/bin/bash\necho a\n")
+        with patch('dls_ade.dlsbuild.open', m, create=True):
+            dlsbuild.load_script_template("Linux", "support.sh")
+            dlsbuild.load_script_template("Linux", "support.sh")
+
+        m.assert_called_once_with(
+            os.path.join(dlsbuild.build_scripts, "Linux", "support.sh"), 'r')
+
+    def test_given_missing_script_then_none_returned(self):
+        self.assertIsNone(
+            dlsbuild.load_script_template("Linux", "not_a_script.sh"))
+
+
+class ScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        mock_lookup = set_up_mock(
+            self, 'dls_ade.dlsbuild.lookup_contact_details')
+        mock_lookup.return_value = ("Test User", "test.user@diamond.ac.uk")
+        mock_server = set_up_mock(self, 'dls_ade.dlsbuild.default_server')
+        mock_server.return_value = "redhat7-x86_64"
+
+        self.build = dlsbuild.RedhatBuild(None, "R3.14.12.7")
+        self.build.set_area("support")
+
+    def test_script_has_header_variables_utils_and_body_in_order(self):
+        script = self.build.build_script({"module": "dummy"})
+
+        utils = dlsbuild.load_script_template("Linux", "utils_template.sh")
+        body = dlsbuild.load_script_template("Linux", "support.sh")
+        self.assertEqual(
+            script, "#!/bin/bash\n\n_module=dummy\n" + utils + body)
+
+    def test_render_many_returns_one_script_per_params(self):
+        scripts = self.build.render_many(
+            [{"module": "first"}, {"module": "second"}])
+
+        self.assertEqual(len(scripts), 2)
+        self.assertIn("_module=first\n", scripts[0])
+        self.assertIn("_module=second\n", scripts[1])
+
+    def test_archive_build_sets_codec_and_level(self):
+        build = dlsbuild.ArchiveBuild(None, "R3.14.12.7", True, "zstd", 19)
+        build.set_area("support")
+
+        script = build.build_script({"module": "dummy"})
+
+        self.assertIn("_action=unarchive\n", script)
+        self.assertIn("_codec=zstd\n", script)
+        self.assertIn("_level=19\n", script)
+
+    def test_archive_build_uses_archive_script(self):
+        build = dlsbuild.ArchiveBuild(None, "R3.14.12.7", False)
+        build.set_area("support")
+
+        script = build.build_script({"module": "dummy"})
+
+        self.assertIn("_action=archive\n", script)
+        self.assertIn("_codec=gzip\n", script)
+        self.assertNotIn("_level=", script)
+        self.assertTrue(script.endswith(
+            dlsbuild.load_script_template("Linux", "archive.sh")))
+
+
+class TestBuildTest(unittest.TestCase):
+
+    def setUp(self):
+        mock_lookup = set_up_mock(
+            self, 'dls_ade.dlsbuild.lookup_contact_details')
+        mock_lookup.return_value = ("Test User", "test.user@diamond.ac.uk")
+        mock_server = set_up_mock(self, 'dls_ade.dlsbuild.default_server')
+        mock_server.return_value = "redhat7-x86_64"
+        self.mock_call = set_up_mock(self, 'dls_ade.dlsbuild.subprocess.call')
+        self.mock_call.return_value = 0
+        self.mock_rmtree = set_up_mock(self, 'dls_ade.dlsbuild.shutil.rmtree')
+
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        test_dir_patch = patch('dls_ade.dlsbuild.test_dir', self.test_dir)
+        test_dir_patch.start()
+        self.addCleanup(test_dir_patch.stop)
+
+        self.build = dlsbuild.RedhatBuild(None, "R3.14.12.7")
+        self.build.set_area("support")
+
+    def script(self):
+        command = self.mock_call.call_args[0][0]
+        with open(command.split()[-1]) as f:
+            return f.read()
+
+    def test_given_normal_build_then_serial_and_tree_removed(self):
+        status = self.build.test("dummy", "1-0", None)
+
+        self.assertEqual(status, 0)
+        self.assertNotIn("_incremental=", self.script())
+        self.assertNotIn("_make_jobs=", self.script())
+        self.assertEqual(self.mock_rmtree.call_count, 1)
+
+    @patch('dls_ade.dlsbuild.default_make_jobs', return_value=8)
+    def test_given_incremental_then_persistent_tree_kept(self, _):
+        self.build.test("dummy", "1-0", None, incremental=True)
+
+        script = self.script()
+        self.assertIn("_incremental=true\n", script)
+        self.assertIn("_make_jobs=8\n", script)
+        self.assertIn("_build_dir={}\n".format(
+            self.build.incremental_test_dir()), script)
+        self.assertFalse(self.mock_rmtree.called)
+
+    def test_given_incremental_success_then_build_time_recorded(self):
+        module_dir = os.path.join(self.build.incremental_test_dir(), "dummy")
+        os.makedirs(module_dir)
+
+        self.build.test("dummy", "1-0", None, incremental=True)
+
+        self.assertIsNotNone(dlsbuild.read_build_time(
+            os.path.join(module_dir, dlsbuild.BUILD_TIME_FILE)))
+
+    def test_given_incremental_python_module_then_error(self):
+        self.build.set_area("python")
+
+        with self.assertRaises(ValueError):
+            self.build.test("dummy", "1-0", None, incremental=True)
+
+
+class TargetBuildTest(unittest.TestCase):
+
+    def setUp(self):
+        mock_lookup = set_up_mock(
+            self, 'dls_ade.dlsbuild.lookup_contact_details')
+        mock_lookup.return_value = ("Test User", "test.user@diamond.ac.uk")
+
+    def test_given_windows_shortcut_then_windows_build(self):
+        build = dlsbuild.target_build("64_2012")
+
+        self.assertIsInstance(build, dlsbuild.WindowsBuild)
+        self.assertEqual(build.get_server(), "windows6_3-AMD64")
+
+    def test_given_server_name_then_redhat_build(self):
+        build = dlsbuild.target_build("redhat7-x86_64")
+
+        self.assertIsInstance(build, dlsbuild.RedhatBuild)
+        self.assertEqual(build.epics(), "R3.14.12.7")
+
+    def test_given_unknown_target_then_value_error(self):
+        with self.assertRaises(ValueError):
+            dlsbuild.target_build("solaris")
+
+
+class SubmitAllTest(unittest.TestCase):
+
+    def setUp(self):
+        mock_lookup = set_up_mock(
+            self, 'dls_ade.dlsbuild.lookup_contact_details')
+        mock_lookup.return_value = ("Test User", "test.user@diamond.ac.uk")
+
+        self.queue_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.queue_dir)
+        for name, value in (
+                ('queue_dir', self.queue_dir),
+                ('release_log', os.path.join(self.queue_dir, ".log"))):
+            patch_obj = patch('dls_ade.dlsbuild.' + name, value)
+            patch_obj.start()
+            self.addCleanup(patch_obj.stop)
+
+        self.builds = [dlsbuild.target_build("7"),
+                       dlsbuild.target_build("64_2012")]
+        for build in self.builds:
+            build.set_area("support")
+
+    def test_one_queue_file_per_build_with_unique_build_names(self):
+        build_names = dlsbuild.submit_all(
+            self.builds, "dummy", "1-0", None, test=True)
+
+        self.assertEqual(len(set(build_names)), 2)
+        self.assertEqual(sorted(os.listdir(self.queue_dir)), sorted(
+            [".log", build_names[0] + ".redhat7-x86_64",
+             build_names[1] + ".windows6_3-AMD64"]))
+        with open(os.path.join(self.queue_dir, ".log")) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_given_second_queue_file_fails_then_nothing_queued(self):
+        real_open = open
+        opened = []
+
+        def failing_open(path, mode="r"):
+            if path.startswith(self.queue_dir):
+                opened.append(path)
+            if len(opened) == 2:
+                raise IOError("No space left on device")
+            return real_open(path, mode)
+
+        with patch('dls_ade.dlsbuild.open', failing_open, create=True):
+            with self.assertRaises(IOError):
+                dlsbuild.submit_all(self.builds, "dummy", "1-0", None)
+
+        self.assertEqual(os.listdir(self.queue_dir), [])
+
+
+class TestMatrixTest(unittest.TestCase):
+
+    @patch('dls_ade.dlsbuild.multiprocessing.Pool')
+    def test_cpus_shared_between_builds(self, mock_pool):
+        builds = ["first", "second", "third"]
+        vcs = mock_pool.vcs
+
+        dlsbuild.test_matrix(builds, "dummy", "1-0", vcs, cpus=8)
+
+        mock_pool.assert_called_once_with(3)
+        jobs = mock_pool.return_value.map.call_args[0][1]
+        self.assertEqual([job[4] for job in jobs], [2, 2, 2])
+        self.assertEqual(jobs[0][3], dlsbuild.VcsInfo(
+            vcs.vcs_type, vcs.release_repo))
+
+    def test_matrix_build_has_unique_build_name_and_error_log(self):
+        build = MagicMock()
+        build.epics.return_value = "R3.14.12.7"
+        build.build_name.return_value = "local_20200121-160509_abc_support_" \
+                                        "dummy_1-0"
+        build.test.return_value = 2
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        build_name = build.build_name.return_value + "_R3.14.12.7"
+        error_dir = os.path.join(test_dir, build_name, "dummy", "1-0")
+        os.makedirs(error_dir)
+        open(os.path.join(error_dir, build_name + ".err"), "w").close()
+
+        with patch('dls_ade.dlsbuild.test_dir', test_dir):
+            result = dlsbuild._matrix_test_build(
+                (build, "dummy", "1-0", None, 4))
+
+        build.test.assert_called_once_with(
+            "dummy", "1-0", None, make_jobs=4, build_name=build_name)
+        self.assertEqual(result.status, 2)
+        self.assertEqual(result.error_log,
+                         os.path.join(error_dir, build_name + ".err"))
@@ -1,8 +1,7 @@
 import os
 import logging
 
-import gitlab
-
+from dls_ade import bytes_to_string, lazy_import
 from dls_ade.gitserver import GitServer
 from dls_ade.dls_utilities import GIT_ROOT_DIR
 
@@ -46,6 +45,8 @@ GITLAB_DEFAULT_GROUP_ATTRIBUTES = {
 
 log = logging.getLogger(__name__)
 
+gitlab = lazy_import("gitlab")
+
 
 class GitlabServer(GitServer):
 
@@ -61,6 +62,12 @@ class GitlabServer(GitServer):
             per_page=GITLAB_PER_PAGE
         )
         self._private_gitlab_handle = None
+        # Group path to id, for the groups known to exist, so that creating
+        # several repositories looks each group up once
+        self._group_ids = {}
+        # Number of GitLab API calls made to find and create groups and
+        # projects, for logging
+        self._api_calls = 0
 
     def _setup_private_gitlab_handle(self):
         if self._private_gitlab_handle:
@@ -140,6 +147,80 @@ class GitlabServer(GitServer):
 
         return repos
 
+    def list_tags(self, server_repo_path):
+        """
+        List the tags of a repository on the server.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+
+        Returns:
+            list of tuple(str, str): Name and commit sha of each tag
+        """
+        if server_repo_path.endswith(".git"):
+            server_repo_path = server_repo_path[:-4]
+        project = self._anon_gitlab_handle.projects.get(server_repo_path)
+        return sorted((tag.name, tag.commit["id"])
+                      for tag in project.tags.list(all=True))
+
+    def get_file_contents(self, server_repo_path, file_path, ref):
+        """
+        Read a file of a repository on the server at a given ref.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+            file_path(str): Path of the file in the repository
+            ref(str): Tag, branch or commit sha
+
+        Returns:
+            str: Contents of the file, or None if it does not exist at ref
+        """
+        if server_repo_path.endswith(".git"):
+            server_repo_path = server_repo_path[:-4]
+        project = self._anon_gitlab_handle.projects.get(server_repo_path,
+                                                        lazy=True)
+        try:
+            contents = project.files.get(file_path=file_path, ref=ref)
+        except gitlab.exceptions.GitlabGetError as e:
+            if e.response_code == HTTP_NOT_FOUND:
+                return None
+            raise
+        return bytes_to_string(contents.decode())
+
+    def list_tree(self, server_repo_path, ref=None, subdir=""):
+        """
+        List a directory of a repository on the server, with one request
+        per page of entries.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+            ref(str): Branch, tag or commit sha. Default is the default
+                branch.
+            subdir(str): Directory to list. Default is the top level.
+
+        Returns:
+            list of tuple(str, str): Name and type ('tree' for directories,
+                'blob' for files) of each entry
+
+        Raises:
+            ValueError: If the repository, ref or directory does not exist
+        """
+        if server_repo_path.endswith(".git"):
+            server_repo_path = server_repo_path[:-4]
+        project = self._anon_gitlab_handle.projects.get(server_repo_path,
+                                                        lazy=True)
+        tree_kwargs = {"path": subdir.rstrip("/"), "all": True}
+        if ref is not None:
+            tree_kwargs["ref"] = ref
+        try:
+            entries = project.repository_tree(**tree_kwargs)
+        except gitlab.exceptions.GitlabGetError as e:
+            if e.response_code == HTTP_NOT_FOUND:
+                raise ValueError("Cannot list {} of {}: {}".format(
+                    subdir or "top level", server_repo_path, e))
+            raise
+        return [(entry["name"], entry["type"]) for entry in entries]
+
     def create_remote_repo(self, dest):
         """
         Create a git repository on the given gitlab server path.
@@ -153,6 +234,7 @@ class GitlabServer(GitServer):
         """
 
         self._setup_private_gitlab_handle()
+        api_calls = self._api_calls
 
         path, repo_name = dest.rsplit('/', 1)
 
@@ -160,39 +242,68 @@ class GitlabServer(GitServer):
             repo_name = repo_name[:-4]
 
         self._create_groups_in_path(path)
-        group_id = self._private_gitlab_handle.groups.get(path).id
+        group_id = self._get_group_id(path)
 
         project_data = dict(GITLAB_DEFAULT_PROJECT_ATTRIBUTES)
         project_data["name"] = repo_name
         self._private_gitlab_handle.projects.create(project_data,
                                                     namespace_id=group_id)
+        self._api_calls += 1
+        log.debug("Created %s with %d GitLab API calls", dest,
+                  self._api_calls - api_calls)
 
     def _is_group(self, path):
+        if path in self._group_ids:
+            return True
+        self._api_calls += 1
         try:
-            self._anon_gitlab_handle.groups.get(path)
+            group = self._anon_gitlab_handle.groups.get(path)
         except gitlab.exceptions.GitlabGetError as e:
             if e.response_code == HTTP_NOT_FOUND:
                 return False
             else:
                 raise
+        self._group_ids[path] = group.id
         return True
 
+    def _get_group_id(self, path):
+        if path not in self._group_ids:
+            self._api_calls += 1
+            self._group_ids[path] = \
+                self._private_gitlab_handle.groups.get(path).id
+        return self._group_ids[path]
+
     def _create_groups_in_path(self, path):
+        """
+        Create the groups in a path that do not exist yet, e.g. controls/ioc
+        and controls/ioc/BL99P for controls/ioc/BL99P if only controls exists.
+
+        The deepest existing group is found by a binary search on the path,
+        as every parent of an existing group exists too, and only the groups
+        below it are created.
+
+        Args:
+            path(str): Group path
+        """
         if self._is_group(path):
             return
         parts = path.split('/')
-        for i in range(1, len(parts)):
-            semi_path = "/".join(parts[:i])
-            if not self._is_group(semi_path):
-                self._create_group(semi_path)
-        self._create_group(path)
+        # Number of leading parts that are known to be, or not to be, groups
+        existing, missing = 0, len(parts)
+        while missing - existing > 1:
+            middle = (existing + missing) // 2
+            if self._is_group("/".join(parts[:middle])):
+                existing = middle
+            else:
+                missing = middle
+        for i in range(existing + 1, len(parts) + 1):
+            self._create_group("/".join(parts[:i]))
 
     def _create_group(self, path):
         if "/" not in path:
             parent_id = None
         else:
-            parent_id = self._private_gitlab_handle.groups.get(
-                os.path.dirname(path)).id
+            parent_id = self._get_group_id(os.path.dirname(path))
         group_name = os.path.basename(path)
         group_data = dict(GITLAB_DEFAULT_GROUP_ATTRIBUTES)
         group_data.update({
@@ -200,7 +311,9 @@ class GitlabServer(GitServer):
             'path': group_name,
             'parent_id': parent_id
         })
-        self._private_gitlab_handle.groups.create(group_data)
+        group = self._private_gitlab_handle.groups.create(group_data)
+        self._api_calls += 1
+        self._group_ids[path] = group.id
 
     @staticmethod
     def dev_area_path(area="support"):
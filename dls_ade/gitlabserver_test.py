@@ -1,6 +1,7 @@
 import os
 import unittest
 from mock import patch, MagicMock
+import gitlab
 from collections import namedtuple
 
 from dls_ade.gitlabserver import GitlabServer
@@ -66,6 +67,64 @@ class CreateRemoteRepoTest(unittest.TestCase):
             gl.create_remote_repo('controls/support/support_module')
 
 
+class CreateGroupsInPathTest(unittest.TestCase):
+
+    @patch('dls_ade.gitlabserver.gitlab.Gitlab')
+    def setUp(self, mock_gitlab):
+        self.gl = GitlabServer()
+        self.gl._private_gitlab_handle = MagicMock()
+        self.existing = {"controls": 1, "controls/ioc": 2}
+        self.looked_up = []
+        self.created = []
+
+        def get(path):
+            self.looked_up.append(path)
+            if path not in self.existing:
+                raise gitlab.exceptions.GitlabGetError(response_code=404)
+            return MagicMock(id=self.existing[path])
+
+        def create(data):
+            self.created.append((data["name"], data["parent_id"]))
+            return MagicMock(id=len(self.created) + 100)
+
+        self.gl._anon_gitlab_handle.groups.get.side_effect = get
+        self.gl._private_gitlab_handle.groups.create.side_effect = create
+
+    def test_given_path_exists_then_one_lookup(self):
+        self.gl._create_groups_in_path("controls/ioc")
+
+        self.assertEqual(self.looked_up, ["controls/ioc"])
+        self.assertEqual(self.created, [])
+
+    def test_given_missing_suffix_then_only_missing_groups_created(self):
+        self.gl._create_groups_in_path("controls/ioc/BL99P/sub1/sub2")
+
+        self.assertEqual(self.created,
+                         [("BL99P", 2), ("sub1", 101), ("sub2", 102)])
+        self.assertFalse(self.gl._private_gitlab_handle.groups.get.called)
+        # Full path, then a binary search instead of every prefix
+        self.assertEqual(self.looked_up,
+                         ["controls/ioc/BL99P/sub1/sub2", "controls/ioc",
+                          "controls/ioc/BL99P"])
+
+    def test_given_no_groups_then_all_created_from_top(self):
+        self.existing = {}
+
+        self.gl._create_groups_in_path("controls/ioc")
+
+        self.assertEqual(self.created, [("controls", None), ("ioc", 101)])
+
+    def test_given_groups_created_then_repo_created_in_last_group(self):
+        with patch.object(self.gl, "_setup_private_gitlab_handle"):
+            self.gl.create_remote_repo("controls/ioc/BL99P/BL99P-MO-IOC-01.git")
+
+        self.gl._private_gitlab_handle.projects.create.assert_called_once()
+        self.assertEqual(self.gl._private_gitlab_handle.projects.create
+                         .call_args[1]["namespace_id"], 101)
+        # Three lookups, one group and one project created
+        self.assertEqual(self.gl._api_calls, 5)
+
+
 class DevAreaPathTest(unittest.TestCase):
 
     def test_returns_correct_paths(self):
@@ -82,3 +141,61 @@ class GetClonePathTest(unittest.TestCase):
     def test_returns_correct_path(self):
         path = GitlabServer.get_clone_path("controls/support/mysupport")
         self.assertEqual("controls/support/mysupport", path)
+
+
+class ListTagsTest(unittest.TestCase):
+    @patch('dls_ade.gitlabserver.gitlab.Gitlab')
+    def test_returns_names_and_shas(self, mock_gitlab):
+        gl = GitlabServer()
+        tag = MagicMock(commit={"id": "abc"})
+        tag.name = "1-0"
+        project = gl._anon_gitlab_handle.projects.get.return_value
+        project.tags.list.return_value = [tag]
+
+        self.assertEqual(gl.list_tags("controls/support/asyn.git"),
+                         [("1-0", "abc")])
+        gl._anon_gitlab_handle.projects.get.assert_called_once_with(
+            "controls/support/asyn")
+
+
+class GetFileContentsTest(unittest.TestCase):
+    @patch('dls_ade.gitlabserver.gitlab.Gitlab')
+    def test_returns_decoded_contents(self, mock_gitlab):
+        gl = GitlabServer()
+        project = gl._anon_gitlab_handle.projects.get.return_value
+        project.files.get.return_value.decode.return_value = b"A = 1\n"
+
+        self.assertEqual(
+            gl.get_file_contents("controls/support/asyn", "configure/RELEASE",
+                                 "1-0"), "A = 1\n")
+        project.files.get.assert_called_once_with(
+            file_path="configure/RELEASE", ref="1-0")
+
+
+class ListTreeTest(unittest.TestCase):
+    @patch('dls_ade.gitlabserver.gitlab.Gitlab')
+    def test_returns_names_and_types(self, mock_gitlab):
+        gl = GitlabServer()
+        project = gl._anon_gitlab_handle.projects.get.return_value
+        project.repository_tree.return_value = [
+            {"name": "exampleApp", "type": "tree"},
+            {"name": "Makefile", "type": "blob"}]
+
+        entries = gl.list_tree("controls/ioc/BL01I/BL01I-EA-IOC-01.git")
+
+        self.assertEqual(entries, [("exampleApp", "tree"),
+                                   ("Makefile", "blob")])
+        gl._anon_gitlab_handle.projects.get.assert_called_once_with(
+            "controls/ioc/BL01I/BL01I-EA-IOC-01", lazy=True)
+        project.repository_tree.assert_called_once_with(path="", all=True)
+
+    @patch('dls_ade.gitlabserver.gitlab.Gitlab')
+    def test_given_missing_repo_then_value_error(self, mock_gitlab):
+        gl = GitlabServer()
+        project = gl._anon_gitlab_handle.projects.get.return_value
+        project.repository_tree.side_effect = \
+            gitlab.exceptions.GitlabGetError("404 Not Found",
+                                             response_code=404)
+
+        with self.assertRaises(ValueError):
+            gl.list_tree("controls/ioc/missing", "master", "etc")
@@ -1,4 +1,5 @@
 import os
+import shutil
 import tempfile
 import logging
 
@@ -6,6 +7,7 @@ from dls_ade.dls_utilities import remove_git_at_end
 from dls_ade.vcs_git import Git, git
 
 from dls_ade import dls_utilities as dls_util
+from dls_ade import profiling
 
 log = logging.getLogger(__name__)
 usermsg = logging.getLogger("usermessages")
@@ -72,10 +74,11 @@ class GitServer(object):
             local_repo_path(str): local repository path
             origin(str): name to be assigned to remote on clone
         """
-        repo = git.Repo.clone_from(
-            os.path.join(self.clone_url,
-                         self.get_clone_path(server_repo_path)),
-            os.path.join("./", local_repo_path), origin=origin)
+        with profiling.span("git clone"):
+            repo = git.Repo.clone_from(
+                os.path.join(self.clone_url,
+                             self.get_clone_path(server_repo_path)),
+                os.path.join("./", local_repo_path), origin=origin)
 
         return repo
 
@@ -113,12 +116,15 @@ class GitServer(object):
 
         return git_inst
 
-    def temp_clone(self, source, depth=None):
+    def temp_clone(self, source, depth=None, verify=True):
         """
         Clones repo to /tmp directory and returns the relevant git.Repo object.
 
         Args:
             source(str): server repository path to clone
+            depth(int): create a shallow clone with this many commits
+            verify(bool): check that the repository exists before cloning.
+                Callers that have checked this separately can skip it.
 
         Returns:
             :class:`~git.repo.base.Repo`: Repository instance
@@ -126,7 +132,7 @@ class GitServer(object):
 
         dls_util.remove_end_slash(source)
 
-        if not self.is_server_repo(source):
+        if verify and not self.is_server_repo(source):
             raise ValueError("Repository does not contain " + source)
 
         # Area is second section of path
@@ -143,9 +149,10 @@ class GitServer(object):
         if depth is not None:
             clone_kwargs = {"depth": depth}
 
-        repo = git.Repo.clone_from(os.path.join(self.clone_url,
-                                                self.get_clone_path(source)),
-                                   repo_dir, **clone_kwargs)
+        with profiling.span("git clone"):
+            repo = git.Repo.clone_from(
+                os.path.join(self.clone_url, self.get_clone_path(source)),
+                repo_dir, **clone_kwargs)
 
         git_inst = Git(module, area, self, repo)
 
@@ -174,13 +181,109 @@ class GitServer(object):
 
                 if module not in os.listdir("./"):
                     usermsg.info("Cloning: {}".format(path))
-                    git.Repo.clone_from(
-                        os.path.join(self.clone_url,
-                                     self.get_clone_path(path)),
-                        os.path.join("./", module))
+                    with profiling.span("git clone"):
+                        git.Repo.clone_from(
+                            os.path.join(self.clone_url,
+                                         self.get_clone_path(path)),
+                            os.path.join("./", module))
                 else:
                     usermsg.info(module + " already exists in current directory")
 
+    def list_tags(self, server_repo_path):
+        """
+        List the tags of a repository on the server, without cloning it.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+
+        Returns:
+            list of tuple(str, str): Name and commit sha of each tag
+        """
+        url = os.path.join(self.clone_url,
+                           self.get_clone_path(server_repo_path))
+        output = git.cmd.Git().ls_remote("--tags", url)
+        tags = {}
+        for line in output.splitlines():
+            sha, ref = line.split("\t")
+            name = ref[len("refs/tags/"):]
+            # Annotated tags are listed twice, the ^{} entry is the commit
+            if name.endswith("^{}"):
+                tags[name[:-3]] = sha
+            else:
+                tags.setdefault(name, sha)
+        return sorted(tags.items())
+
+    def get_file_contents(self, server_repo_path, file_path, ref):
+        """
+        Read a file of a repository on the server at a given ref.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+            file_path(str): Path of the file in the repository
+            ref(str): Tag or branch
+
+        Returns:
+            str: Contents of the file, or None if it does not exist at ref
+        """
+        repo_dir = tempfile.mkdtemp(suffix="_contents")
+        try:
+            repo = git.Repo.clone_from(
+                os.path.join(self.clone_url,
+                             self.get_clone_path(server_repo_path)),
+                repo_dir, depth=1, branch=ref, no_checkout=True)
+            try:
+                return repo.git.show("{}:{}".format(ref, file_path))
+            except git.exc.GitCommandError:
+                return None
+        finally:
+            shutil.rmtree(repo_dir, ignore_errors=True)
+
+    def list_tree(self, server_repo_path, ref=None, subdir=""):
+        """
+        List a directory of a repository on the server, from a shallow bare
+        clone rather than a full one.
+
+        Args:
+            server_repo_path(str): Server path of the repository
+            ref(str): Branch or tag. Default is the default branch.
+            subdir(str): Directory to list. Default is the top level.
+
+        Returns:
+            list of tuple(str, str): Name and type ('tree' for directories,
+                'blob' for files) of each entry
+
+        Raises:
+            ValueError: If the repository, ref or directory does not exist
+        """
+        repo_dir = tempfile.mkdtemp(suffix="_tree")
+        clone_kwargs = {"bare": True, "depth": 1}
+        if ref is not None:
+            clone_kwargs["branch"] = ref
+        try:
+            try:
+                repo = git.Repo.clone_from(
+                    os.path.join(self.clone_url,
+                                 self.get_clone_path(server_repo_path)),
+                    repo_dir, **clone_kwargs)
+                args = ["HEAD"]
+                if subdir:
+                    args.append(subdir.rstrip("/") + "/")
+                listing = repo.git.ls_tree(*args)
+            except git.exc.GitCommandError as e:
+                raise ValueError("Cannot list {} of {}: {}".format(
+                    subdir or "top level", server_repo_path, e))
+        finally:
+            shutil.rmtree(repo_dir, ignore_errors=True)
+
+        if subdir and not listing:
+            raise ValueError("{} does not contain {}".format(
+                server_repo_path, subdir))
+        entries = []
+        for line in listing.splitlines():
+            info, path = line.split("\t", 1)
+            entries.append((path.rstrip("/").split("/")[-1], info.split()[1]))
+        return entries
+
     def create_remote_repo(self, dest):
         """
         Create a git repository on the given server path.
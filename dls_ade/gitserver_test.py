@@ -1,4 +1,9 @@
+import os
+import shutil
+import tempfile
 import unittest
+
+import git
 from mock import ANY, patch, MagicMock  # @UnresolvedImport
 
 from dls_ade.gitserver import GitServer
@@ -251,3 +256,37 @@ class CloneMultiTest(unittest.TestCase):
 
         mock_clone_from.assert_called_once_with(
             "test@clone-url.ac.uk/controls/ioc/BL/module", "./BL/module")
+
+
+class ListTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        repo = git.Repo.init(os.path.join(self.root, "ioc"))
+        os.makedirs(os.path.join(self.root, "ioc", "exampleApp", "src"))
+        for path in ["Makefile", "exampleApp/src/Makefile"]:
+            with open(os.path.join(self.root, "ioc", path), "w") as f:
+                f.write("TOP = .\n")
+        repo.index.add(["Makefile", "exampleApp/src/Makefile"])
+        repo.index.commit("Initial commit")
+
+        self.server = GitServer("file://" + self.root, "file://" + self.root,
+                                "file://" + self.root)
+        self.server.get_clone_path = lambda path: path
+
+    def test_top_level_listed(self):
+        self.assertEqual(sorted(self.server.list_tree("ioc")),
+                         [("Makefile", "blob"), ("exampleApp", "tree")])
+
+    def test_subdir_listed(self):
+        self.assertEqual(self.server.list_tree("ioc", subdir="exampleApp"),
+                         [("src", "tree")])
+
+    def test_given_missing_subdir_then_value_error(self):
+        with self.assertRaises(ValueError):
+            self.server.list_tree("ioc", subdir="missingApp")
+
+    def test_given_missing_repo_then_value_error(self):
+        with self.assertRaises(ValueError):
+            self.server.list_tree("missing")
@@ -0,0 +1,50 @@
+"""
+Location and setup of the small local databases the dls-* tools use to avoid
+repeating slow file system or network queries.
+"""
+
+import os
+import sqlite3
+import logging
+
+log = logging.getLogger(__name__)
+
+# Override with DLS_ADE_CACHE_DIR, e.g. to share a store between users
+CACHE_DIR = os.getenv(
+    "DLS_ADE_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME",
+                           os.path.join(os.path.expanduser("~"), ".cache")),
+                 "dls_ade"))
+
+
+def cache_path(name):
+    """
+    Return the path of a file in the dls_ade cache directory, creating the
+    directory if necessary.
+
+    Args:
+        name(str): File name
+
+    Returns:
+        str: Absolute path of the file
+    """
+    if not os.path.isdir(CACHE_DIR):
+        os.makedirs(CACHE_DIR)
+    return os.path.join(CACHE_DIR, name)
+
+
+def connect(path, schema):
+    """
+    Open an SQLite database, creating any missing tables and indexes.
+
+    Args:
+        path(str): Database file, or ':memory:'
+        schema(str): SQL script of CREATE ... IF NOT EXISTS statements
+
+    Returns:
+        :class:`sqlite3.Connection`: Open connection
+    """
+    log.debug("Opening local store {}".format(path))
+    connection = sqlite3.connect(path)
+    connection.executescript(schema)
+    return connection
@@ -10,8 +10,12 @@ import os.path
 import json
 import logging
 import logging.config
+import logging.handlers
 import getpass
 import threading
+
+from six.moves import queue
+
 from dls_ade.constants import GELFLOG_SERVER, GELFLOG_SERVER_PORT
 
 default_config = {
@@ -105,6 +109,10 @@ default_config = {
     }
 }
 
+# Handlers of the root logger that setup_logging moves to a background thread,
+# so that a slow disk or Graylog server does not hold up the tools
+QUEUED_HANDLERS = ("local_file_handler", "graylog_gelf")
+
 
 class ThreadContextFilter(logging.Filter):
     """A logging context filter to add thread name and ID."""
@@ -114,6 +122,160 @@ class ThreadContextFilter(logging.Filter):
         return True
 
 
+class QueuedHandler(logging.Handler):
+    """
+    A handler which passes records to other handlers on a background thread.
+
+    Records are put on a bounded queue and :meth:`emit` never blocks: if the
+    queue is full the record is dropped and counted in :attr:`dropped`. The
+    thread hands records to the target handlers in batches, and sends each
+    batch to a stream socket handler (e.g. pygelf.GelfTcpHandler) in a single
+    write.
+
+    :meth:`close`, which logging calls at exit, waits up to
+    :attr:`flush_timeout` seconds for the queue to empty.
+    """
+
+    def __init__(self, handlers, max_size=1000, batch_size=100,
+                 flush_timeout=2.0):
+        """
+        Args:
+            handlers(list of :class:`logging.Handler`): Target handlers
+            max_size(int): Maximum number of records waiting to be handled
+            batch_size(int): Maximum number of records handled at a time
+            flush_timeout(float): Seconds to wait for the queue to empty on
+                close
+
+        """
+        logging.Handler.__init__(self)
+        self.handlers = list(handlers)
+        self.queue = queue.Queue(max_size)
+        self.batch_size = batch_size
+        self.flush_timeout = flush_timeout
+        self.dropped = 0
+        self._thread = None
+        self._pid = None
+        self._closing = threading.Event()
+
+    def _start(self):
+        # Also after a fork, as the thread is not copied to the child. The
+        # records queued in the parent are left to the parent.
+        if self._pid is not None:
+            self.queue = queue.Queue(self.queue.maxsize)
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run,
+                                        name="QueuedHandler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def prepare(self, record):
+        """Merge the arguments into the message, so that later changes to them
+        are not logged."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _run(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_timeout)
+            except queue.Empty:
+                if self._closing.is_set():
+                    return
+                continue
+            records = []
+            while record is not None:
+                records.append(record)
+                if len(records) == self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if records:
+                self.handle_batch(records)
+            # No end marker if the queue was full when closed
+            if record is None or (self._closing.is_set() and
+                                  self.queue.empty()):
+                return
+
+    def handle_batch(self, records):
+        """Pass records to each target handler that accepts them."""
+        for handler in self.handlers:
+            accepted = [r for r in records
+                        if r.levelno >= handler.level and handler.filter(r)]
+            if not accepted:
+                continue
+            handler.acquire()
+            try:
+                if (isinstance(handler, logging.handlers.SocketHandler) and
+                        not isinstance(handler,
+                                       logging.handlers.DatagramHandler)):
+                    try:
+                        handler.send(b"".join(handler.makePickle(r)
+                                              for r in accepted))
+                    except Exception:
+                        handler.handleError(accepted[0])
+                else:
+                    for r in accepted:
+                        handler.emit(r)
+            finally:
+                handler.release()
+
+    def close(self):
+        """Wait for the queued records to be handled, for at most
+        flush_timeout seconds, and log how many were dropped."""
+        self._closing.set()
+        if self._thread is not None and self._pid == os.getpid():
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._thread.join(self.flush_timeout)
+            if not self._thread.is_alive() and self.dropped:
+                record = logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    "%d log records dropped as the queue was full",
+                    (self.dropped,), None)
+                self.handle_batch([record])
+            self._thread = None
+        logging.Handler.close(self)
+
+
+def queue_handlers(logger, names=QUEUED_HANDLERS):
+    """
+    Replace the handlers of a logger which have one of the given names with a
+    :class:`QueuedHandler` passing records to them.
+
+    Args:
+        logger(:class:`logging.Logger`): Logger to change
+        names(tuple of str): Names of the handlers in the logging configuration
+
+    Returns:
+        :class:`QueuedHandler`: The new handler, or None if the logger had no
+            handler with one of the names
+
+    """
+    targets = [h for h in logger.handlers if h.get_name() in names]
+    if not targets:
+        return None
+    for handler in targets:
+        logger.removeHandler(handler)
+    queued = QueuedHandler(targets)
+    logger.addHandler(queued)
+    return queued
+
+
 def setup_logging(
     default_log_config=None,
     default_level=logging.INFO,
@@ -132,6 +294,9 @@ def setup_logging(
        3. Default log configuration found in the `logconfig.default_config` dict.
        4. If all of the above fails: basicConfig is called with the `default_level` argument.
 
+    The root logger handlers named in `QUEUED_HANDLERS` are then moved to a
+    background thread by a :class:`QueuedHandler`.
+
     Args:
         default_log_config (Optional[str]): Path to log configuration file.
         env_key (Optional[str]): Environment variable that can optionally contain
@@ -165,6 +330,7 @@ def setup_logging(
             except KeyError:
                 pass
         logging.config.dictConfig(dict_config)
+        queue_handlers(logging.getLogger())
     else:
         logging.basicConfig(level=default_level)
 
@@ -0,0 +1,146 @@
+import time
+import logging
+import logging.handlers
+import threading
+import unittest
+
+from mock import MagicMock
+
+from dls_ade import logconfig
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self, level=logging.NOTSET, block=None):
+        logging.Handler.__init__(self, level)
+        self.records = []
+        self.block = block
+
+    def emit(self, record):
+        if self.block is not None:
+            self.block.wait()
+        self.records.append(record)
+
+
+class StreamSocketHandler(logging.handlers.SocketHandler):
+
+    def makePickle(self, record):
+        return record.getMessage().encode() + b"\x00"
+
+
+def make_record(message, level=logging.INFO, args=None):
+    return logging.LogRecord("test", level, __file__, 1, message, args, None)
+
+
+class QueuedHandlerTest(unittest.TestCase):
+
+    def test_given_records_then_target_gets_them_by_close(self):
+        target = RecordingHandler()
+        handler = logconfig.QueuedHandler([target])
+
+        for i in range(5):
+            handler.handle(make_record("message %d", args=(i,)))
+        handler.close()
+
+        self.assertEqual([r.getMessage() for r in target.records],
+                         ["message %d" % i for i in range(5)])
+
+    def test_given_slow_target_then_emit_does_not_block(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        handler = logconfig.QueuedHandler([RecordingHandler(block=release)])
+
+        start = time.time()
+        for i in range(100):
+            handler.handle(make_record("message"))
+
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_given_queue_full_then_records_dropped_and_counted(self):
+        release = threading.Event()
+        target = RecordingHandler(block=release)
+        handler = logconfig.QueuedHandler([target], max_size=2)
+
+        for i in range(10):
+            handler.handle(make_record("message"))
+        release.set()
+        handler.close()
+
+        self.assertGreater(handler.dropped, 0)
+        self.assertEqual(len(target.records), 10 - handler.dropped + 1)
+        self.assertEqual(target.records[-1].getMessage(),
+                         "{} log records dropped as the queue was "
+                         "full".format(handler.dropped))
+
+    def test_given_target_never_finishes_then_close_returns_after_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        handler = logconfig.QueuedHandler([RecordingHandler(block=release)],
+                                          flush_timeout=0.1)
+        handler.handle(make_record("message"))
+
+        start = time.time()
+        handler.close()
+
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_given_arguments_changed_after_logging_then_original_logged(self):
+        target = RecordingHandler()
+        handler = logconfig.QueuedHandler([target])
+        values = [1]
+
+        handler.handle(make_record("values %s", args=(values,)))
+        values.append(2)
+        handler.close()
+
+        self.assertEqual(target.records[0].getMessage(), "values [1]")
+
+    def test_given_target_level_then_lower_records_not_passed(self):
+        target = RecordingHandler(level=logging.WARNING)
+        handler = logconfig.QueuedHandler([target])
+
+        handler.handle(make_record("info"))
+        handler.handle(make_record("warning", level=logging.WARNING))
+        handler.close()
+
+        self.assertEqual([r.getMessage() for r in target.records],
+                         ["warning"])
+
+    def test_given_stream_socket_handler_then_batch_sent_at_once(self):
+        target = StreamSocketHandler("localhost", 0)
+        target.send = MagicMock()
+        handler = logconfig.QueuedHandler([target])
+
+        handler.handle_batch([make_record("one"), make_record("two")])
+
+        target.send.assert_called_once_with(b"one\x00two\x00")
+
+
+class QueueHandlersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("dls_ade.logconfig_test")
+        self.addCleanup(setattr, self.logger, "handlers", [])
+        self.graylog = RecordingHandler()
+        self.graylog.set_name("graylog_gelf")
+        self.console = RecordingHandler()
+        self.console.set_name("console")
+        self.logger.addHandler(self.graylog)
+        self.logger.addHandler(self.console)
+
+    def test_given_named_handlers_then_replaced_by_queued_handler(self):
+        queued = logconfig.queue_handlers(self.logger)
+        self.addCleanup(queued.close)
+
+        self.assertEqual(self.logger.handlers, [self.console, queued])
+        self.assertEqual(queued.handlers, [self.graylog])
+
+    def test_given_no_named_handlers_then_not_changed(self):
+        queued = logconfig.queue_handlers(self.logger, names=("other",))
+
+        self.assertIsNone(queued)
+        self.assertEqual(self.logger.handlers, [self.graylog, self.console])
+
+
+if __name__ == '__main__':
+    unittest.main()
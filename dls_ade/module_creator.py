@@ -1,5 +1,4 @@
 import os
-import shutil
 import logging
 from getpass import getuser
 
@@ -241,7 +240,16 @@ class ModuleCreator(object):
         """Prints a message to detail the user's next steps."""
         return self._module_template.get_print_message()
 
-    def push_repo_to_remote(self):
+    def create_remote_repo(self):
+        """Creates the empty repository for the module on the server.
+
+        Only needed when the repository is created separately from the push,
+        see :meth:`push_repo_to_remote`.
+
+        """
+        self.server.create_remote_repo(self._server_repo_path)
+
+    def push_repo_to_remote(self, create_remote=True):
         """Pushes the local repo to the remote server.
 
         Note:
@@ -249,6 +257,10 @@ class ModuleCreator(object):
             False in order to prevent the user calling this method twice in
             succession.
 
+        Args:
+            create_remote(bool): Create the repository on the server. False
+                if :meth:`create_remote_repo` has been called already.
+
         Raises:
             :class:`~dls_ade.exceptions.VerificationError`: Local repository \
                 cannot be pushed to remote.
@@ -263,7 +275,8 @@ class ModuleCreator(object):
 
         vcs = self.server.create_new_local_repo(self._module_name, self._area,
                                                 self.abs_module_path)
-        vcs.add_new_remote_and_push(self._server_repo_path)
+        vcs.add_new_remote_and_push(self._server_repo_path,
+                                    create_remote=create_remote)
 
 
 class ModuleCreatorWithApps(ModuleCreator):
@@ -386,36 +399,20 @@ class ModuleCreatorAddAppToModule(ModuleCreatorWithApps):
             :class:`~dls_ade.exceptions.RemoteRepoError`: If given repo path \
                 does not exist on server.
                 This should never be raised. There is a bug if it is!
-            :class:`~dls_ade.exceptions.VCSGitError`: Issue with the vcs_git \
-                function calls.
         """
 
-        if not self.server.is_server_repo(remote_repo_path):
+        try:
+            entries = self.server.list_tree(remote_repo_path)
+        except ValueError:
             # This should never get raised!
             err_message = ("Remote repo {repo:s} does not exist. Cannot "
-                           "clone to determine if there is an app_name "
+                           "list it to determine if there is an app_name "
                            "conflict with {app_name:s}")
             err_message = err_message.format(repo=remote_repo_path,
                                              app_name=self._app_name)
             raise RemoteRepoError(err_message)
 
-        temp_dir = ""
-        exists = False
-        try:
-            repo = self.server.temp_clone(remote_repo_path).repo
-            temp_dir = repo.working_tree_dir
-
-            if os.path.exists(os.path.join(temp_dir, self._app_name + "App")):
-                exists = True
-
-        finally:
-            try:
-                if temp_dir:
-                    shutil.rmtree(temp_dir)
-            except OSError:
-                pass
-
-        return exists
+        return any(name == self._app_name + "App" for name, _ in entries)
 
     def create_local_module(self):
         """Creates the folder structure and files in a cloned git repository.
@@ -450,12 +447,19 @@ class ModuleCreatorAddAppToModule(ModuleCreatorWithApps):
 
         vcs_git.stage_all_files_and_commit(vcs.repo, commit_message)
 
-    def push_repo_to_remote(self):
+    def create_remote_repo(self):
+        """Does nothing, as the repository already exists on the server."""
+        pass
+
+    def push_repo_to_remote(self, create_remote=True):
         """Pushes the local repo to the remote server using remote 'origin'.
         :class:`~dls_ade.exceptions.VCSGitError`
         This will push the master branch of the local repository to the remote
         server it was cloned from.
 
+        Args:
+            create_remote(bool): Ignored, the repository already exists.
+
         Raises:
             :class:`~dls_ade.exceptions.VerificationError`: From \
                 :meth:`.verify_can_push_repo_to_remote`.
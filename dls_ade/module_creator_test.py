@@ -372,7 +372,14 @@ class ModuleCreatorPushRepoToRemoteTest(ModuleCreatorTest):
         self.server_mock.create_new_local_repo.assert_called_once_with(
             "test_module", "test_area", self.nmc_obj.abs_module_path)
         self.vcs_mock.add_new_remote_and_push.assert_called_with(
-            self.nmc_obj._server_repo_path)
+            self.nmc_obj._server_repo_path, create_remote=True)
+
+    def test_given_create_remote_false_then_passed_to_add_new_remote_and_push(self):
+
+        self.nmc_obj.push_repo_to_remote(create_remote=False)
+
+        self.vcs_mock.add_new_remote_and_push.assert_called_with(
+            self.nmc_obj._server_repo_path, create_remote=False)
 
     def test_given_verify_can_push_repo_to_remote_fails_then_exception_raised_with_correct_message(self):
 
@@ -484,15 +491,6 @@ class ModuleCreatorAddAppToModuleCheckIfRemoteRepoHasApp(ModuleCreatorTest):
         super(ModuleCreatorAddAppToModuleCheckIfRemoteRepoHasApp, self).setUp()
 
         self.mock_server = set_up_mock(self, 'dls_ade.module_creator.Server')
-        self.mock_exists = set_up_mock(self, 'dls_ade.module_creator.os.path.exists')
-        self.mock_rmtree = set_up_mock(self, 'dls_ade.module_creator.shutil.rmtree')
-
-        self.mock_repo = MagicMock()
-        self.mock_repo2 = MagicMock()
-        self.mock_repo2.repo.working_tree_dir = "tempdir"
-        self.mock_repo.parent = self.mock_server
-        self.mock_server.return_value.create_new_local_repo.return_value = self.mock_repo
-        self.mock_server.temp_clone.return_value = self.mock_repo2
 
         self.nmc_obj = mc.ModuleCreatorAddAppToModule(
             "test_module", "test_area", MagicMock(), app_name="test_app")
@@ -500,14 +498,13 @@ class ModuleCreatorAddAppToModuleCheckIfRemoteRepoHasApp(ModuleCreatorTest):
 
     def tearDown(self):
         self.mock_server.reset_mock()
-        self.mock_exists.reset_mock()
 
     def test_given_remote_repo_path_is_not_on_server_then_exception_raised_with_correct_message(self):
 
-        self.mock_repo.parent.is_server_repo.return_value = False
+        self.mock_server.list_tree.side_effect = ValueError("not found")
 
         comp_message = ("Remote repo {repo:s} does not exist. Cannot "
-                        "clone to determine if there is an app_name "
+                        "list it to determine if there is an app_name "
                         "conflict with {app_name:s}".format(repo="test_repo_path", app_name="test_app"))
 
         with self.assertRaises(mc.RemoteRepoError) as e:
@@ -515,63 +512,28 @@ class ModuleCreatorAddAppToModuleCheckIfRemoteRepoHasApp(ModuleCreatorTest):
 
         self.assertEqual(str(e.exception), comp_message)
 
-    def test_given_remote_repo_exists_on_server_then_temp_clone_called_correctly(self):
+    def test_given_remote_repo_then_top_level_listed_without_clone(self):
 
-        self.mock_repo.parent.is_server_repo.return_value = True
+        self.mock_server.list_tree.return_value = []
 
-        try:
-            self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
-        except:
-            pass
+        self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
 
-        self.mock_server.temp_clone.assert_called_once_with("test_repo_path")
+        self.mock_server.list_tree.assert_called_once_with("test_repo_path")
+        self.assertFalse(self.mock_server.temp_clone.called)
+        self.assertFalse(self.mock_server.is_server_repo.called)
 
-    def test_given_app_exists_then_return_value_is_true(self):
+    def test_given_app_exists_then_true_returned(self):
 
-        self.mock_repo.parent.is_server_repo.return_value = True
-        self.mock_exists.return_value = True
+        self.mock_server.list_tree.return_value = [
+            ("configure", "tree"), ("test_appApp", "tree"), ("Makefile", "blob")]
 
         exists = self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
 
         self.assertTrue(exists)
-        self.mock_exists.assert_called_once_with("tempdir/test_appApp")
-
-    def test_given_app_does_not_exist_then_return_value_is_false(self):
-
-        self.mock_server.is_server_repo.return_value = True
-        self.mock_exists.return_value = False
-
-        exists = self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
-
-        self.assertFalse(exists)
-        self.mock_exists.assert_any_call("tempdir/test_appApp")
-
-    def test_given_exception_raised_in_temp_clone_then_rmtree_not_called(self):
-
-        self.mock_server.temp_clone.side_effect = Exception("test_exception")
-        self.mock_repo.parent.is_server_repo.return_value = True
-
-        with self.assertRaises(Exception) as e:
-            self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
-
-        self.assertEqual(str(e.exception), "test_exception")
-        self.assertFalse(self.mock_rmtree.called)
-
-    def test_given_exception_raised_after_mkdtemp_then_rmtree_called(self):
 
-        self.mock_exists.side_effect = Exception("test_exception")
-        self.mock_repo.parent.is_server_repo.return_value = True
+    def test_given_app_file_exists_then_true_returned(self):
 
-        with self.assertRaises(Exception) as e:
-            self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
-
-        self.assertEqual(str(e.exception), "test_exception")
-        self.mock_rmtree.assert_called_once_with("tempdir")
-
-    def test_given_app_exists_then_true_returned(self):
-
-        self.mock_exists.return_value = True
-        self.mock_repo.parent.is_server_repo.return_value = True
+        self.mock_server.list_tree.return_value = [("test_appApp", "blob")]
 
         exists = self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
 
@@ -579,8 +541,8 @@ class ModuleCreatorAddAppToModuleCheckIfRemoteRepoHasApp(ModuleCreatorTest):
 
     def test_given_app_does_not_exist_then_false_returned(self):
 
-        self.mock_exists.return_value = False
-        self.mock_repo.parent.is_server_repo.return_value = True
+        self.mock_server.list_tree.return_value = [
+            ("configure", "tree"), ("other_appApp", "tree")]
 
         exists = self.nmc_obj._check_if_remote_repo_has_app("test_repo_path")
 
@@ -1,17 +1,148 @@
 import os
 import shutil
+import string
 import logging
-
+try:
+    from shutil import which
+except ImportError:  # Python 2
+    from distutils.spawn import find_executable as which
+
+import dls_ade
+from dls_ade import base_app
+from dls_ade import cookiecutter_cache
 from dls_ade.exceptions import ArgumentError, TemplateFolderError
 
-from cookiecutter.main import cookiecutter
-
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 log = logging.getLogger(__name__)
 
 TEMPLATES_FOLDER = "module_templates"
 COOKIECUTTER_BASE_URL = "https://gitlab.diamond.ac.uk/controls/templates"
 
+# Template file path to (signature, contents), so that files are only read
+# again when they change
+_template_cache = {}
+# Template text to the names of the placeholders in it
+_field_cache = {}
+
+
+def _file_signature(file_path):
+    """Return what identifies a version of a file: its mtime and size."""
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+
+def _read_template_file(file_path):
+    """Return the contents of a template file, reading it only if it has
+    changed since it was last read.
+
+    Args:
+        file_path: Path of the file
+
+    Returns:
+        str: File contents
+
+    """
+    signature = _file_signature(file_path)
+    cached = _template_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(file_path, "r") as f:
+        contents = f.read()
+    _template_cache[file_path] = (signature, contents)
+    return contents
+
+
+def template_fields(text):
+    """Return the names of the placeholders in a template, e.g. module_name
+    for "{module_name:s}". The result for each text is only worked out once.
+
+    Args:
+        text: Template text
+
+    Returns:
+        frozenset: Placeholder names, excluding positional ones. Empty if the
+            text is not a valid format string, in which case formatting it
+            reports the error.
+
+    """
+    try:
+        return _field_cache[text]
+    except KeyError:
+        pass
+
+    fields = set()
+    try:
+        for _, field_name, _, _ in string.Formatter().parse(text):
+            if field_name:
+                # Only the argument name, not attribute or index access
+                name = field_name.split(".")[0].split("[")[0]
+                if not name.isdigit():
+                    fields.add(name)
+    except ValueError:
+        fields = set()
+    fields = _field_cache[text] = frozenset(fields)
+    return fields
+
+
+def cookiecutter(*args, **kwargs):
+    """Run :func:`cookiecutter.main.cookiecutter`, which is only imported
+    when it is needed as it is slow to import."""
+    from cookiecutter.main import cookiecutter as run_cookiecutter
+    return run_cookiecutter(*args, **kwargs)
+
+
+def run_command(command):
+    """Run a shell command.
+
+    Raises:
+        OSError: If the command fails.
+
+    """
+    status = os.system(command)
+    if status != 0:
+        raise OSError("Command failed with exit status {status:d}: "
+                      "{command:s}".format(status=status, command=command))
+
+
+def make_base_app(app_type, app_name, ioc=False):
+    """Create an app, and optionally its IOC boot folder, in the current
+    directory.
+
+    The templates are expanded by :mod:`dls_ade.base_app` where they can be
+    found, otherwise makeBaseApp.pl is run.
+
+    Args:
+        app_type: makeBaseApp template type, e.g. dls
+        app_name: Name of the app
+        ioc: Whether to create the IOC boot folder too
+
+    Raises:
+        OSError: If makeBaseApp.pl fails.
+
+    """
+    top = base_app.find_template_top(app_type, ioc)
+    if top is None:
+        log.debug("No %s template found, running makeBaseApp.pl", app_type)
+        run_command('makeBaseApp.pl -t {app_type:s} {app_name:s}'.format(
+            app_type=app_type, app_name=app_name))
+        if ioc:
+            run_command(
+                'makeBaseApp.pl -i -t {app_type:s} {app_name:s}'.format(
+                    app_type=app_type, app_name=app_name))
+        return
+
+    log.debug("Creating %s app from %s", app_type, top)
+    base_app.make_app(app_type, app_name, top)
+    if ioc:
+        base_app.make_ioc_boot(app_type, app_name, top=top)
+
+
+def clear_template_cache():
+    """Forget all template files and placeholders read so far."""
+    _template_cache.clear()
+    _field_cache.clear()
+
 
 class ModuleTemplate(object):
     """Class for the creation of new module contents.
@@ -51,6 +182,8 @@ class ModuleTemplate(object):
         self._verify_template_args()
 
         self._cookiecutter_template_url = ""
+        # Local copy of the CookieCutter template, once it has been used
+        self._cookiecutter_template_copy = None
 
     def add_required_args(self, required_args):
         self._required_template_args.update(required_args)
@@ -88,7 +221,7 @@ class ModuleTemplate(object):
 
         """
         template_path = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)),
+            dls_ade.DATA_DIR or os.path.dirname(os.path.realpath(__file__)),
             TEMPLATES_FOLDER,
             template_area
         )
@@ -104,7 +237,8 @@ class ModuleTemplate(object):
 
         Note:
             All hidden files and folders (apart from '.' and '..') will be
-            included.
+            included. Files are only read if they have changed since they
+            were last read by this process.
 
         Args:
             template_folder: The relative or absolute path to template folder.
@@ -127,8 +261,7 @@ class ModuleTemplate(object):
         for dir_path, _, files in os.walk(template_folder):
             for file_name in files:
                 file_path = os.path.join(dir_path, file_name)
-                with open(file_path, "r") as f:
-                    contents = f.read()
+                contents = _read_template_file(file_path)
                 rel_path = os.path.relpath(file_path, template_folder)
 
                 log.debug("        " + rel_path)
@@ -173,19 +306,28 @@ class ModuleTemplate(object):
 
         Raises:
             :class:`~dls_ade.exceptions.ArgumentError`: If dictionary key is \
-                a directory, not a file.
+                a directory, not a file, or a placeholder has no template \
+                argument.
             OSError: From :func:`os.makedirs`
 
         """
+        # Check the placeholders of every file that will be written before
+        # anything is written, so that a missing argument cannot leave a
+        # half-created module
+        missing = set()
+        files = []
         # dictionary keys are the relative file paths for the documents
         log.debug("About to create files from template.")
         log.debug("Template files to create (relative paths):")
         for path, contents in self._template_files.items():
+            path_fields = template_fields(path)
+            if not path_fields.issubset(self._template_args):
+                missing.update(path_fields, template_fields(contents))
+                continue
+
             # Using template_args allows us to insert eg. module_name
             rel_path = path.format(**self._template_args)
 
-            dir_path = os.path.dirname(rel_path)
-
             log.debug("        " + rel_path)
 
             # Stops us from overwriting files in folder (eg .gitignore and
@@ -195,6 +337,19 @@ class ModuleTemplate(object):
                 log.debug("File already exists: " + rel_path)
                 continue
 
+            missing.update(template_fields(contents))
+            files.append((rel_path, contents))
+
+        missing.difference_update(self._template_args)
+        if missing:
+            raise ArgumentError(
+                "Template arguments missing for placeholders: " +
+                ", ".join(sorted(missing))
+            )
+
+        for rel_path, contents in files:
+            dir_path = os.path.dirname(rel_path)
+
             if os.path.normpath(dir_path) == os.path.normpath(rel_path):
                 # If folder given instead of file (ie. rel_path ends with a
                 # slash or folder already exists)
@@ -206,8 +361,11 @@ class ModuleTemplate(object):
             if dir_path and not os.path.isdir(dir_path):
                 os.makedirs(dir_path)
 
+            # Only text with braces can change when it is formatted
+            if "{" in contents or "}" in contents:
+                contents = contents.format(**self._template_args)
             with open(rel_path, "w") as f:
-                f.write(contents.format(**self._template_args))
+                f.write(contents)
 
     def _run_cookiecutter(self):
         """ Run CookieCutter to populate the module folder
@@ -218,10 +376,21 @@ class ModuleTemplate(object):
         {{cookiecutter.project_name}}, this name will be set to one of the
         template args, firstly it tries using module_name if it does not exits, it
         uses app_name otherwise CookieCutter's defaults
+
+        The template is used from the local cache, see
+        :mod:`dls_ade.cookiecutter_cache`.
+
+        Raises:
+            :class:`~dls_ade.exceptions.ModuleTemplateError`: If the template \
+                cannot be reached and there is no local copy of it
+
         """
         if self._cookiecutter_template_url:
-            log.info("Running CookieCutter using template: %s",
-                     self.cookiecutter_template)
+            template = cookiecutter_cache.get_template(
+                self._cookiecutter_template_url)
+            self._cookiecutter_template_copy = template
+            log.info("Running CookieCutter using template: %s at %s",
+                     template.name, template.commit[:7])
             _cwd = os.getcwd()
             # ModuleCreator enters the module directory, but CookieCutters
             # expects to be in the parent folder
@@ -234,7 +403,7 @@ class ModuleTemplate(object):
                 self._template_args['project_name'] = project_name
 
             project_path = cookiecutter(
-                template=self._cookiecutter_template_url, no_input=True,
+                template=template.path, no_input=True,
                 overwrite_if_exists=True,
                 extra_context=self._template_args)
 
@@ -264,6 +433,15 @@ class ModuleTemplate(object):
         """Return a string with a message to detail the user's next steps."""
         raise NotImplementedError
 
+    def _get_template_version_message(self):
+        """Return a line naming the CookieCutter template commit used, or an
+        empty string if no template has been used."""
+        template = self._cookiecutter_template_copy
+        if template is None:
+            return ""
+        message = "\nCreated from the {name:s} template at commit {commit:s}."
+        return message.format(name=template.name, commit=template.commit[:7])
+
 
 class ModuleTemplateTools(ModuleTemplate):
     """Class for the management of the creation of new Tools modules.
@@ -338,7 +516,7 @@ A new Python 3 module has been created in the {0:s} directory.
 Edit setup.cfg to make sure it has the correct metadata.
 Python code should typically be added to the {0:s} package.
 """.format(self._template_args['module_path'])
-        return message
+        return message + self._get_template_version_message()
 
 
 class ModuleTemplateWithApps(ModuleTemplate):
@@ -412,15 +590,19 @@ class ModuleTemplateSupport(ModuleTemplateWithApps):
     def _create_custom_files(self):
         """Creates the folder structure and files in the current directory.
 
-        This uses the makeBaseApp.pl program for file creation.
+        This uses the makeBaseApp templates for file creation, see
+        :func:`make_base_app`.
 
         Raises:
             OSError: If system call fails.
 
         """
-        os.system('makeBaseApp.pl -t dls {app_name:s}'.format(
-            app_name=self._template_args['app_name']))
-        os.system('dls-make-etc-dir.py && make clean uninstall')
+        make_base_app("dls", self._template_args['app_name'])
+        if which('dls-make-etc-dir.py') is None:
+            log.warning("dls-make-etc-dir.py not found, the etc folder has "
+                        "not been created")
+        else:
+            run_command('dls-make-etc-dir.py && make clean uninstall')
 
 
 class ModuleTemplateIOC(ModuleTemplateWithApps):
@@ -433,7 +615,8 @@ class ModuleTemplateIOC(ModuleTemplateWithApps):
     def _create_custom_files(self):
         """Creates the folder structure and files in the current directory.
 
-        This uses the makeBaseApp.pl program for file creation.
+        This uses the makeBaseApp templates for file creation, see
+        :func:`make_base_app`.
 
         Note:
             When using `ModuleCreatorAddAppToModule`, an IOC app is added to a
@@ -458,10 +641,7 @@ class ModuleTemplateIOC(ModuleTemplateWithApps):
         if os.path.exists(boot_file):
             shutil.rmtree(boot_file)
 
-        os.system('makeBaseApp.pl -t dls {app_name:s}'.format(
-            **self._template_args))
-        os.system('makeBaseApp.pl -i -t dls {app_name:s}'.format(
-            **self._template_args))
+        make_base_app("dls", self._template_args['app_name'], ioc=True)
 
         shutil.rmtree(os.path.join(app_folder, 'opi'))
 
@@ -472,13 +652,14 @@ class ModuleTemplateIOCBL(ModuleTemplateWithApps):
     def _create_custom_files(self):
         """Creates the folder structure and files in the current directory.
 
-        This uses the makeBaseApp.pl program for file creation.
+        This uses the makeBaseApp templates for file creation, see
+        :func:`make_base_app`.
 
         Raises:
             OSError: If system call fails.
 
         """
-        os.system('makeBaseApp.pl -t dlsBL ' + self._template_args['app_name'])
+        make_base_app("dlsBL", self._template_args['app_name'])
 
     def get_print_message(self):
         module_path = self._template_args['module_path']
@@ -574,4 +755,4 @@ class ModuleTemplateIOCUI(ModuleTemplateWithApps):
                    "expanded as needed.")
         message = message.format(**message_dict)
 
-        return message
+        return message + self._get_template_version_message()
@@ -1,6 +1,8 @@
 
 import unittest
 import os
+import shutil
+import tempfile
 import logging
 
 import dls_ade.module_template as mt
@@ -105,6 +107,16 @@ class ModuleTemplateSetTemplateFilesFromArea(unittest.TestCase):
         self.assertEqual(self.mt_obj._template_files, "template dictionary")
         self.mock_get_from_folder.assert_called_once_with("test_dir/" + self.module_template_folder + "/this_folder_exists")
 
+    def test_given_data_dir_set_then_templates_read_from_data_dir(self):
+
+        self.mock_os.path.realpath.return_value = "test_dir/script_name"
+        self.mock_os.path.isdir.return_value = True
+
+        with patch("dls_ade.DATA_DIR", "data_dir"):
+            self.mt_obj._set_template_files_from_area("this_folder_exists")
+
+        self.mock_get_from_folder.assert_called_once_with("data_dir/" + self.module_template_folder + "/this_folder_exists")
+
 
 class ModuleTemplateGetTemplateFilesFromFolderTest(unittest.TestCase):
 
@@ -205,6 +217,54 @@ class ModuleTemplateGetTemplateFilesFromFolderTest(unittest.TestCase):
         self.assertEqual(comp_dict, template_files)
 
 
+class ModuleTemplateTemplateCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.addCleanup(mt.clear_template_cache)
+        self.file_path = os.path.join(self.folder, "file1.txt")
+        with open(self.file_path, "w") as f:
+            f.write("{module_name:s} text")
+
+        self.mt_obj = mt.ModuleTemplate({})
+
+    def test_given_folder_read_twice_then_files_only_read_once(self):
+        first = self.mt_obj._get_template_files_from_folder(self.folder)
+
+        with patch.object(builtins, 'open') as mock_open_file:
+            second = self.mt_obj._get_template_files_from_folder(self.folder)
+
+        self.assertFalse(mock_open_file.called)
+        self.assertEqual(first, {"file1.txt": "{module_name:s} text"})
+        self.assertEqual(second, first)
+
+    def test_given_file_changed_then_file_read_again(self):
+        self.mt_obj._get_template_files_from_folder(self.folder)
+        stat = os.stat(self.file_path)
+        with open(self.file_path, "w") as f:
+            f.write("{module_name:s} new text")
+        os.utime(self.file_path, (stat.st_atime, stat.st_mtime + 10))
+
+        template_files = self.mt_obj._get_template_files_from_folder(
+            self.folder)
+
+        self.assertEqual(template_files,
+                         {"file1.txt": "{module_name:s} new text"})
+
+
+class TemplateFieldsTest(unittest.TestCase):
+
+    def test_given_placeholders_then_argument_names_returned(self):
+        fields = mt.template_fields(
+            "{module_name:s} {app.name} {paths[0]} {{escaped}} {0}")
+
+        self.assertEqual(fields, frozenset(["module_name", "app", "paths"]))
+
+    def test_given_invalid_format_string_then_no_fields_returned(self):
+        self.assertEqual(mt.template_fields("{unclosed"), frozenset())
+
+
 class ModuleTemplateCreateFilesTest(unittest.TestCase):
 
     @patch('dls_ade.module_template.ModuleTemplate._create_files_from_template_dict')
@@ -376,6 +436,31 @@ class ModuleTemplateCreateFilesFromTemplateDictTest(unittest.TestCase):
         file_handle_mock = self.open_mock()
         file_handle_mock.write.assert_called_once_with("Written contents")
 
+    def test_given_placeholder_without_argument_then_exception_raised_and_nothing_written(self):
+
+        self.mt_obj._template_files = {"file1.txt": "Written contents",
+                                       "{arg3:s}.txt": "{arg4:s}"}
+
+        with patch.object(builtins, 'open', self.open_mock):
+            with self.assertRaises(mt.ArgumentError) as e:
+                self.mt_obj._create_files_from_template_dict()
+
+        self.assertEqual(str(e.exception),
+                         "Template arguments missing for placeholders: "
+                         "arg3, arg4")
+        self.assertFalse(self.open_mock.called)
+
+    def test_given_placeholder_without_argument_in_existing_file_then_file_skipped(self):
+
+        self.mt_obj._template_files = {"file1.txt": "Written contents",
+                                       ".gitignore": "{arg3:s}"}
+        self.mock_isfile.side_effect = lambda path: path == ".gitignore"
+
+        with patch.object(builtins, 'open', self.open_mock):
+            self.mt_obj._create_files_from_template_dict()
+
+        self.open_mock.assert_called_once_with("file1.txt", "w")
+
     def test_given_file_with_no_folder_then_makedirs_not_called(self):
 
         self.mt_obj._template_files = {"file.txt": "Written contents"}
@@ -461,7 +546,11 @@ class ModuleTemplateWithAppsPrintMessageTest(unittest.TestCase):
 
 class ModuleTemplateSupportCreateCustomFilesTest(unittest.TestCase):
 
-    @patch('dls_ade.module_template.os.system')
+    def setUp(self):
+        set_up_mock(self, 'dls_ade.module_template.base_app.find_template_top').return_value = None
+        set_up_mock(self, 'dls_ade.module_template.which').return_value = "/bin/dls-make-etc-dir.py"
+
+    @patch('dls_ade.module_template.os.system', return_value=0)
     def test_given_create_files_called_then_correct_functions_called(self, mock_os_system):
 
         mt_obj = mt.ModuleTemplateSupport({'module_name': "test_module_name",
@@ -481,6 +570,8 @@ class ModuleTemplateIOCCreateCustomFilesTest(unittest.TestCase):
     def setUp(self):
 
         self.mock_os_system = set_up_mock(self, 'dls_ade.module_template.os.system')
+        self.mock_os_system.return_value = 0
+        set_up_mock(self, 'dls_ade.module_template.base_app.find_template_top').return_value = None
         self.mock_rmtree = set_up_mock(self, 'dls_ade.module_template.shutil.rmtree')
         self.mock_exists = set_up_mock(self, 'dls_ade.module_template.os.path.exists')
 
@@ -579,8 +670,9 @@ class ModuleTemplateIOCCreateCustomFilesTest(unittest.TestCase):
 
 class ModuleTemplateIOCBLCreateCustomFilesTest(unittest.TestCase):
 
-    @patch('dls_ade.module_template.os.system')
-    def test_given_create_files_called_then_correct_functions_called(self, mock_os_system):
+    @patch('dls_ade.module_template.base_app.find_template_top', return_value=None)
+    @patch('dls_ade.module_template.os.system', return_value=0)
+    def test_given_create_files_called_then_correct_functions_called(self, mock_os_system, _):
 
         mt_obj = mt.ModuleTemplateIOCBL({'module_name': "test_module_name",
                                           'module_path': "test_module_path",
@@ -592,6 +684,41 @@ class ModuleTemplateIOCBLCreateCustomFilesTest(unittest.TestCase):
         mock_os_system.assert_called_once_with("makeBaseApp.pl -t dlsBL {app_name:s}".format(app_name="test_app_name"))
 
 
+class MakeBaseAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_find = set_up_mock(self, 'dls_ade.module_template.base_app.find_template_top')
+        self.mock_make_app = set_up_mock(self, 'dls_ade.module_template.base_app.make_app')
+        self.mock_make_ioc_boot = set_up_mock(self, 'dls_ade.module_template.base_app.make_ioc_boot')
+        self.mock_os_system = set_up_mock(self, 'dls_ade.module_template.os.system')
+        self.mock_os_system.return_value = 0
+
+    def test_given_template_found_then_app_and_boot_created_without_makebaseapp(self):
+        self.mock_find.return_value = "/templates/top"
+
+        mt.make_base_app("dls", "test_app_name", ioc=True)
+
+        self.mock_find.assert_called_once_with("dls", True)
+        self.mock_make_app.assert_called_once_with("dls", "test_app_name", "/templates/top")
+        self.mock_make_ioc_boot.assert_called_once_with("dls", "test_app_name", top="/templates/top")
+        self.assertFalse(self.mock_os_system.called)
+
+    def test_given_no_template_then_makebaseapp_run(self):
+        self.mock_find.return_value = None
+
+        mt.make_base_app("dls", "test_app_name")
+
+        self.mock_os_system.assert_called_once_with("makeBaseApp.pl -t dls test_app_name")
+        self.assertFalse(self.mock_make_app.called)
+
+    def test_given_makebaseapp_fails_then_error_raised(self):
+        self.mock_find.return_value = None
+        self.mock_os_system.return_value = 256
+
+        with self.assertRaises(OSError):
+            mt.make_base_app("dls", "test_app_name")
+
+
 class ModuleTemplateIOCBLPrintMessageTest(unittest.TestCase):
 
     def test_given_print_message_called_then_message_printed(self):
@@ -627,11 +754,21 @@ class ModuleTemplateIOCUITest(unittest.TestCase):
                                               'user_login': "test_login",
                                               'app_name': "test_app_name"})
 
+    @patch("dls_ade.module_template.cookiecutter_cache.get_template")
     @patch("dls_ade.module_template.cookiecutter")
-    def test_given_create_files_called_then_cookiecutter_called(self, mock_cookiecutter):
+    def test_given_create_files_called_then_cookiecutter_called_with_cached_template(self, mock_cookiecutter, mock_get_template):
         mock_cookiecutter.return_value = 'dummy-basename'
+        mock_get_template.return_value = mt.cookiecutter_cache.CachedTemplate(
+            "dls_css_template_module", "0123456789abcdef", "/cache/0123456789abcdef")
+
         self.mt_obj.create_files()
-        self.assertEqual(mock_cookiecutter.call_args[1].get("template"),
+
+        mock_get_template.assert_called_once_with(
             "https://gitlab.diamond.ac.uk/controls/templates/"
             "dls_css_template_module")
+        self.assertEqual(mock_cookiecutter.call_args[1].get("template"),
+                         "/cache/0123456789abcdef")
+        self.assertTrue(self.mt_obj.get_print_message().endswith(
+            "\nCreated from the dls_css_template_module template at commit "
+            "0123456."))
 
@@ -0,0 +1,517 @@
+"""
+Index of the module releases in prod areas, e.g.
+/dls_sw/prod/R3.14.12.7/support/<module>/<release>.
+
+The index is kept in the local store and refreshed from the modification
+times of the directories: a directory is only listed again when an entry
+has been added to or removed from it since it was last listed. Releases that
+have been archived by dls-tar-module (<release>.tar.gz etc.) are indexed as
+well, separately from the live releases.
+
+The index also records which releases each live release is built against,
+from its installed configure/RELEASE file, which the build server rewrites
+to refer to prod releases. A RELEASE file is only read again when it has
+been modified.
+"""
+
+import os
+import stat
+import logging
+from multiprocessing.pool import ThreadPool
+
+from dls_ade import configure_release
+from dls_ade import dlsbuild
+from dls_ade import local_store
+
+try:
+    from os import scandir
+except ImportError:  # Python 2
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+log = logging.getLogger(__name__)
+
+INDEX_DB = "prod_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS modules (
+    area_dir TEXT NOT NULL,
+    module TEXT NOT NULL,
+    PRIMARY KEY (area_dir, module)
+);
+CREATE TABLE IF NOT EXISTS releases (
+    area_dir TEXT NOT NULL,
+    module TEXT NOT NULL,
+    release TEXT NOT NULL,
+    archived INTEGER NOT NULL,
+    PRIMARY KEY (area_dir, module, release, archived)
+);
+CREATE INDEX IF NOT EXISTS releases_release ON releases (area_dir, release);
+CREATE TABLE IF NOT EXISTS release_files (
+    area_dir TEXT NOT NULL,
+    module TEXT NOT NULL,
+    release TEXT NOT NULL,
+    dep_dir TEXT NOT NULL,
+    mtime REAL,
+    PRIMARY KEY (area_dir, module, release, dep_dir)
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    area_dir TEXT NOT NULL,
+    module TEXT NOT NULL,
+    release TEXT NOT NULL,
+    dep_dir TEXT NOT NULL,
+    dep_module TEXT NOT NULL,
+    dep_release TEXT NOT NULL,
+    PRIMARY KEY (area_dir, module, release, dep_dir, dep_module, dep_release)
+);
+CREATE INDEX IF NOT EXISTS dependencies_dep
+    ON dependencies (dep_dir, dep_module, dep_release);
+"""
+
+# Number of directory path components in a module name, by area
+MODULE_DEPTH = {"ioc": 2}
+
+# Areas whose releases can be built against support module releases
+DEPENDENT_AREAS = ["support", "ioc"]
+
+
+def _scan_dir(path, follow_symlinks=True):
+    """
+    List a directory.
+
+    Args:
+        path(str): Directory
+        follow_symlinks(bool): Whether symbolic links to directories are
+            listed as directories. Prod areas have symlinked releases.
+
+    Returns:
+        tuple(list of str, list of str): Names of the directories and of the
+            other entries, without hidden entries
+    """
+    dirs = []
+    others = []
+    if scandir is not None:
+        for entry in scandir(path):
+            if entry.name.startswith("."):
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+            except OSError:
+                is_dir = False
+            if is_dir:
+                dirs.append(entry.name)
+            else:
+                others.append(entry.name)
+    else:
+        for name in os.listdir(path):
+            if name.startswith("."):
+                continue
+            try:
+                if follow_symlinks:
+                    mode = os.stat(os.path.join(path, name)).st_mode
+                else:
+                    mode = os.lstat(os.path.join(path, name)).st_mode
+            except OSError:
+                mode = 0
+            if stat.S_ISDIR(mode):
+                dirs.append(name)
+            else:
+                others.append(name)
+    return sorted(dirs), sorted(others)
+
+
+def _mtime(path):
+    """Return the modification time of a file, or None if it is missing"""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _map(function, items, jobs):
+    """Apply a function to items in jobs threads, keeping the order"""
+    if not items:
+        return []
+    pool = ThreadPool(max(1, min(jobs, len(items))))
+    try:
+        return pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def release_file(area_dir, module, release):
+    """Return the path of the configure/RELEASE file of a prod release"""
+    return os.path.join(area_dir, module, release, "configure", "RELEASE")
+
+
+def archived_release(name):
+    """Return the release a file name is an archive of, or None"""
+    for _, extension in dlsbuild.ARCHIVE_CODECS:
+        if name.endswith(extension) and len(name) > len(extension):
+            return name[:-len(extension)]
+    return None
+
+
+class ProdIndex(object):
+    """
+    Index of the module releases in prod areas.
+
+    Areas are identified by their directory, as returned by
+    :meth:`dls_ade.dls_environment.environment.prodArea`. Call
+    :meth:`refresh` before querying to bring an area up to date.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = local_store.cache_path(INDEX_DB)
+        self.connection = local_store.connect(path, SCHEMA)
+        self.directories_listed = 0
+
+    def close(self):
+        self.connection.close()
+
+    def _dir_mtime(self, path):
+        row = self.connection.execute(
+            "SELECT mtime FROM dirs WHERE path = ?", (path,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_dir_mtime(self, path, mtime):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO dirs (path, mtime) VALUES (?, ?)",
+            (path, mtime))
+
+    def _indexed_modules(self, area_dir):
+        return [row[0] for row in self.connection.execute(
+            "SELECT module FROM modules WHERE area_dir = ?", (area_dir,))]
+
+    def _forget_module(self, area_dir, module):
+        self.connection.execute(
+            "DELETE FROM modules WHERE area_dir = ? AND module = ?",
+            (area_dir, module))
+        self.connection.execute(
+            "DELETE FROM releases WHERE area_dir = ? AND module = ?",
+            (area_dir, module))
+        self.connection.execute(
+            "DELETE FROM dirs WHERE path = ?",
+            (os.path.join(area_dir, module),))
+
+    def _list_modules(self, area_dir, depth, rescan):
+        """Return the modules in an area, listing only the directories that
+        have changed since they were last listed, and the (path, mtime) of
+        the directories listed"""
+        indexed = self._indexed_modules(area_dir)
+        modules = []
+        listed = []
+
+        def walk(parts, path):
+            if len(parts) == depth:
+                modules.append("/".join(parts))
+                return
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                return
+            if rescan or self._dir_mtime(path) != mtime:
+                # Not following links, so that a link cannot make a loop
+                children = _scan_dir(path, follow_symlinks=False)[0]
+                self.directories_listed += 1
+                listed.append((path, mtime))
+            else:
+                prefix = "".join(part + "/" for part in parts)
+                children = sorted(set(
+                    module[len(prefix):].split("/")[0] for module in indexed
+                    if module.startswith(prefix)))
+            for child in children:
+                walk(parts + (child,), os.path.join(path, child))
+
+        walk((), area_dir)
+        return modules, listed
+
+    def _scan_module(self, area_dir, module, rescan):
+        """List the releases of a module if its directory has changed.
+
+        Returns:
+            tuple(float, list of tuple): Directory mtime and releases rows,
+                with a None mtime if the module has gone. None if the module
+                has not changed.
+        """
+        path = os.path.join(area_dir, module)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None, []
+        if not rescan and self._dir_mtime(path) == mtime:
+            return None
+
+        try:
+            dirs, others = _scan_dir(path)
+        except OSError:
+            return None, []
+        self.directories_listed += 1
+
+        rows = [(area_dir, module, release, 0) for release in dirs]
+        for name in others:
+            release = archived_release(name)
+            if release is not None:
+                rows.append((area_dir, module, release, 1))
+        return mtime, rows
+
+    def _store_module(self, area_dir, module, mtime, rows):
+        """Replace the indexed releases of a module with those from
+        :meth:`_scan_module`"""
+        if mtime is None:
+            self._forget_module(area_dir, module)
+            return
+        self.connection.execute(
+            "DELETE FROM releases WHERE area_dir = ? AND module = ?",
+            (area_dir, module))
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO releases (area_dir, module, release, "
+            "archived) VALUES (?, ?, ?, ?)", rows)
+        self.connection.execute(
+            "INSERT OR IGNORE INTO modules (area_dir, module) VALUES (?, ?)",
+            (area_dir, module))
+        self._set_dir_mtime(os.path.join(area_dir, module), mtime)
+
+    def refresh(self, area_dir, depth=1, modules=None, rescan=False):
+        """
+        Bring the index of an area up to date.
+
+        The directories are all listed before the index is written, so that
+        the database is not locked while the file system is slow to answer.
+
+        Args:
+            area_dir(str): Prod area directory
+            depth(int): Number of path components in a module name, see
+                MODULE_DEPTH
+            modules(list of str): Only refresh these modules. Default is
+                every module in the area.
+            rescan(bool): List every directory again, whether or not it
+                has changed
+
+        """
+        listed = []
+        removed = set()
+        if modules is None:
+            modules, listed = self._list_modules(area_dir, depth, rescan)
+            removed = set(self._indexed_modules(area_dir)) - set(modules)
+        scanned = [(module, self._scan_module(area_dir, module, rescan))
+                   for module in modules]
+
+        with self.connection:
+            for path, mtime in listed:
+                self._set_dir_mtime(path, mtime)
+            for module in removed:
+                self._forget_module(area_dir, module)
+            for module, scan in scanned:
+                if scan is not None:
+                    self._store_module(area_dir, module, *scan)
+        log.debug("Refreshed prod index of {}: listed {} directories".format(
+            area_dir, self.directories_listed))
+
+    def releases(self, area_dir, module, archived=False):
+        """
+        Return the releases of a module.
+
+        Args:
+            area_dir(str): Prod area directory
+            module(str): Module name
+            archived(bool): Return the archived releases instead of the live
+                ones
+
+        Returns:
+            list of str: Releases, unsorted
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT release FROM releases WHERE area_dir = ? AND module = ? "
+            "AND archived = ?", (area_dir, module, int(archived)))]
+
+    def latest_release(self, area_dir, module, env):
+        """
+        Return the latest live release of a module.
+
+        Args:
+            area_dir(str): Prod area directory
+            module(str): Module name
+            env(:class:`~dls_ade.dls_environment.environment`): Environment,
+                for comparing releases
+
+        Returns:
+            str: Release, or None if the module has no live releases
+        """
+        releases = self.releases(area_dir, module)
+        if not releases:
+            return None
+        return env.latest(releases)
+
+    def modules_with_release(self, area_dir, release, archived=False):
+        """
+        Return the modules that have a release.
+
+        Args:
+            area_dir(str): Prod area directory
+            release(str): Release, e.g. 4-41
+            archived(bool): Look for archived releases instead of live ones
+
+        Returns:
+            list of str: Module names, sorted
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT module FROM releases WHERE area_dir = ? AND release = ? "
+            "AND archived = ? ORDER BY module",
+            (area_dir, release, int(archived)))]
+
+    def modules(self, area_dir):
+        """
+        Return the indexed modules of an area.
+
+        Args:
+            area_dir(str): Prod area directory
+
+        Returns:
+            list of str: Module names, sorted
+        """
+        return sorted(self._indexed_modules(area_dir))
+
+    def refresh_dependencies(self, area_dir, dep_dir, dep_depth=1, jobs=16,
+                             rescan=False):
+        """
+        Bring the dependencies of the live releases of an area on the
+        releases of another area up to date. Call :meth:`refresh` on the
+        area first.
+
+        The RELEASE files of the releases are checked for changes, and the
+        changed ones read, several at a time.
+
+        Args:
+            area_dir(str): Prod area directory of the dependent releases
+            dep_dir(str): Prod area directory of the releases depended on,
+                e.g. /dls_sw/prod/R3.14.12.7/support
+            dep_depth(int): Number of path components in the module names of
+                `dep_dir`
+            jobs(int): Number of files to check or read at the same time
+            rescan(bool): Read every RELEASE file again
+
+        """
+        live = [tuple(row) for row in self.connection.execute(
+            "SELECT module, release FROM releases WHERE area_dir = ? AND "
+            "archived = 0", (area_dir,))]
+        indexed = dict(((row[0], row[1]), row[2]) for row in
+                       self.connection.execute(
+                           "SELECT module, release, mtime FROM release_files "
+                           "WHERE area_dir = ? AND dep_dir = ?",
+                           (area_dir, dep_dir)))
+
+        mtimes = _map(lambda release: _mtime(release_file(area_dir, *release)),
+                      live, jobs)
+        changed = [(release, mtime) for release, mtime in zip(live, mtimes)
+                   if rescan or release not in indexed or
+                   indexed[release] != mtime]
+
+        def read(item):
+            (module, release), mtime = item
+            if mtime is None:
+                return []
+            macros = configure_release.read_release(
+                release_file(area_dir, module, release))
+            return configure_release.module_references(macros, dep_dir,
+                                                       dep_depth)
+
+        references = _map(read, changed, jobs)
+        removed = set(indexed) - set(live)
+
+        with self.connection:
+            for module, release in removed | set(
+                    release for release, _ in changed):
+                self.connection.execute(
+                    "DELETE FROM dependencies WHERE area_dir = ? AND "
+                    "module = ? AND release = ? AND dep_dir = ?",
+                    (area_dir, module, release, dep_dir))
+                self.connection.execute(
+                    "DELETE FROM release_files WHERE area_dir = ? AND "
+                    "module = ? AND release = ? AND dep_dir = ?",
+                    (area_dir, module, release, dep_dir))
+            for ((module, release), mtime), refs in zip(changed, references):
+                self.connection.execute(
+                    "INSERT INTO release_files (area_dir, module, release, "
+                    "dep_dir, mtime) VALUES (?, ?, ?, ?, ?)",
+                    (area_dir, module, release, dep_dir, mtime))
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO dependencies (area_dir, module, "
+                    "release, dep_dir, dep_module, dep_release) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(area_dir, module, release, dep_dir, dep_module,
+                      dep_release) for dep_module, dep_release in refs])
+        log.debug("Refreshed dependencies of {} on {}: read {} of {} RELEASE "
+                  "files".format(area_dir, dep_dir, len(changed), len(live)))
+
+    def dependents(self, dep_dir, module, release=None):
+        """
+        Return the live releases that are built against a module.
+
+        Args:
+            dep_dir(str): Prod area directory of the module
+            module(str): Module name
+            release(str): Only releases built against this release of the
+                module
+
+        Returns:
+            list of tuple(str, str, str, str): Area directory, module name
+                and release of each dependent release and the release of
+                `module` it uses, sorted
+        """
+        sql = ("SELECT area_dir, module, release, dep_release FROM "
+               "dependencies WHERE dep_dir = ? AND dep_module = ?")
+        params = [dep_dir, module]
+        if release is not None:
+            sql += " AND dep_release = ?"
+            params.append(release)
+        return sorted(tuple(row) for row in
+                      self.connection.execute(sql, params))
+
+    def referenced(self, dep_dir):
+        """
+        Return the releases of an area that live releases are built against.
+
+        Args:
+            dep_dir(str): Prod area directory
+
+        Returns:
+            set of tuple(str, str): (module, release) of each release
+        """
+        return set(tuple(row) for row in self.connection.execute(
+            "SELECT DISTINCT dep_module, dep_release FROM dependencies "
+            "WHERE dep_dir = ?", (dep_dir,)))
+
+
+def refresh_dependents(index, env, areas=None, jobs=16, rescan=False):
+    """
+    Bring the dependencies on the prod support area of an EPICS version up
+    to date.
+
+    Args:
+        index(:class:`ProdIndex`): Index to refresh
+        env(:class:`~dls_ade.dls_environment.environment`): Environment of
+            the EPICS version
+        areas(list of str): Areas whose releases to check. Default is
+            DEPENDENT_AREAS.
+        jobs(int): Number of files to check or read at the same time
+        rescan(bool): List every directory and read every RELEASE file again
+
+    Returns:
+        str: Prod support area directory, for :meth:`ProdIndex.dependents`
+    """
+    dep_dir = env.prodArea("support")
+    for area in areas or DEPENDENT_AREAS:
+        area_dir = env.prodArea(area)
+        index.refresh(area_dir, MODULE_DEPTH.get(area, 1), rescan=rescan)
+        index.refresh_dependencies(area_dir, dep_dir, jobs=jobs,
+                                   rescan=rescan)
+    return dep_dir
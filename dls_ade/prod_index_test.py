@@ -0,0 +1,261 @@
+#!/bin/env dls-python
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from mock import patch
+
+from dls_ade import prod_index
+from dls_ade.dls_environment import environment
+
+
+class ProdIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.area_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.area_dir)
+        self.index = prod_index.ProdIndex(":memory:")
+        self.addCleanup(self.index.close)
+
+    def add_release(self, module, release):
+        os.makedirs(os.path.join(self.area_dir, module, release))
+        self.touch(os.path.join(self.area_dir, module))
+
+    def add_archive(self, module, release, extension=".tar.gz"):
+        open(os.path.join(self.area_dir, module, release + extension),
+             "w").close()
+        self.touch(os.path.join(self.area_dir, module))
+
+    def touch(self, path):
+        # Make sure the change is seen, whatever the mtime resolution
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+    def test_live_and_archived_releases_indexed(self):
+        self.add_release("asyn", "4-41")
+        self.add_release("asyn", "4-9")
+        self.add_archive("asyn", "4-2")
+        self.add_archive("asyn", "4-1", ".tar.zst")
+
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(sorted(self.index.releases(self.area_dir, "asyn")),
+                         ["4-41", "4-9"])
+        self.assertEqual(
+            sorted(self.index.releases(self.area_dir, "asyn", archived=True)),
+            ["4-1", "4-2"])
+        self.assertEqual(
+            self.index.latest_release(self.area_dir, "asyn", environment()),
+            "4-41")
+
+    def test_symlinked_release_indexed(self):
+        self.add_release("asyn", "4-41")
+        os.symlink(os.path.join(self.area_dir, "asyn", "4-41"),
+                   os.path.join(self.area_dir, "asyn", "4-41-1"))
+        os.symlink(os.path.join(self.area_dir, "missing"),
+                   os.path.join(self.area_dir, "asyn", "broken"))
+        self.touch(os.path.join(self.area_dir, "asyn"))
+
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(sorted(self.index.releases(self.area_dir, "asyn")),
+                         ["4-41", "4-41-1"])
+
+    def test_given_directories_listed_then_database_not_locked(self):
+        self.add_release("asyn", "4-41")
+        self.add_release("motor", "7-0")
+        db_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, db_dir)
+        path = os.path.join(db_dir, "index.sqlite")
+        index = prod_index.ProdIndex(path)
+        self.addCleanup(index.close)
+        scan_dir = prod_index._scan_dir
+
+        def scan_unlocked(*args, **kwargs):
+            # Fails with "database is locked" if a write is in progress
+            other = sqlite3.connect(path, timeout=0)
+            try:
+                other.execute("BEGIN IMMEDIATE")
+                other.rollback()
+            finally:
+                other.close()
+            return scan_dir(*args, **kwargs)
+
+        with patch.object(prod_index, "_scan_dir",
+                          side_effect=scan_unlocked):
+            index.refresh(self.area_dir)
+
+        self.assertEqual(index.modules(self.area_dir), ["asyn", "motor"])
+
+    def test_modules_with_release(self):
+        self.add_release("asyn", "1-0")
+        self.add_release("motor", "1-0")
+        self.add_release("calc", "2-0")
+
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(self.index.modules_with_release(self.area_dir, "1-0"),
+                         ["asyn", "motor"])
+
+    def test_given_nothing_changed_then_no_directories_listed(self):
+        self.add_release("asyn", "4-41")
+        self.index.refresh(self.area_dir)
+        self.index.directories_listed = 0
+
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(self.index.directories_listed, 0)
+        self.assertEqual(self.index.modules(self.area_dir), ["asyn"])
+
+    def test_given_module_changed_then_only_it_is_listed_again(self):
+        self.add_release("asyn", "4-41")
+        self.add_release("motor", "7-0")
+        self.index.refresh(self.area_dir)
+        self.index.directories_listed = 0
+
+        self.add_release("motor", "7-1")
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(self.index.directories_listed, 1)
+        self.assertEqual(sorted(self.index.releases(self.area_dir, "motor")),
+                         ["7-0", "7-1"])
+
+    def test_given_rescan_then_everything_listed(self):
+        self.add_release("asyn", "4-41")
+        self.index.refresh(self.area_dir)
+        self.index.directories_listed = 0
+
+        self.index.refresh(self.area_dir, rescan=True)
+
+        self.assertEqual(self.index.directories_listed, 2)
+
+    def test_given_module_removed_then_forgotten(self):
+        self.add_release("asyn", "4-41")
+        self.add_release("motor", "7-0")
+        self.index.refresh(self.area_dir)
+
+        shutil.rmtree(os.path.join(self.area_dir, "motor"))
+        self.touch(self.area_dir)
+        self.index.refresh(self.area_dir)
+
+        self.assertEqual(self.index.modules(self.area_dir), ["asyn"])
+        self.assertEqual(self.index.releases(self.area_dir, "motor"), [])
+
+    def test_given_ioc_depth_then_module_names_have_two_parts(self):
+        self.add_release(os.path.join("BL08J", "BL08J-MO-IOC-01"), "1-2")
+
+        self.index.refresh(self.area_dir, depth=2)
+
+        self.assertEqual(self.index.modules(self.area_dir),
+                         ["BL08J/BL08J-MO-IOC-01"])
+
+    def test_given_single_module_then_only_it_is_refreshed(self):
+        self.add_release("asyn", "4-41")
+        self.add_release("motor", "7-0")
+
+        self.index.refresh(self.area_dir, modules=["motor"])
+
+        self.assertEqual(self.index.modules(self.area_dir), ["motor"])
+
+
+class DependenciesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.prod_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.prod_dir)
+        self.support_dir = os.path.join(self.prod_dir, "support")
+        self.ioc_dir = os.path.join(self.prod_dir, "ioc")
+        self.index = prod_index.ProdIndex(":memory:")
+        self.addCleanup(self.index.close)
+
+    def add_release(self, area_dir, module, release, *dependencies):
+        configure = os.path.join(area_dir, module, release, "configure")
+        os.makedirs(configure)
+        self.write_release(area_dir, module, release, *dependencies)
+
+    def write_release(self, area_dir, module, release, *dependencies):
+        path = prod_index.release_file(area_dir, module, release)
+        with open(path, "w") as f:
+            f.write("SUPPORT = {}\n".format(self.support_dir))
+            for dep_module, dep_release in dependencies:
+                f.write("{} = $(SUPPORT)/{}/{}\n".format(
+                    dep_module.upper(), dep_module, dep_release))
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+    def refresh(self):
+        self.index.refresh(self.ioc_dir, 2)
+        self.index.refresh_dependencies(self.ioc_dir, self.support_dir)
+
+    def test_dependents_of_release_found(self):
+        self.add_release(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0",
+                         ("asyn", "4-41"), ("motor", "7-0"))
+        self.add_release(self.ioc_dir, "BL02I/BL02I-EA-IOC-01", "2-0",
+                         ("asyn", "4-40"))
+
+        self.refresh()
+
+        self.assertEqual(
+            self.index.dependents(self.support_dir, "asyn", "4-41"),
+            [(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0", "4-41")])
+        self.assertEqual(len(self.index.dependents(self.support_dir, "asyn")),
+                         2)
+        self.assertEqual(self.index.referenced(self.support_dir),
+                         {("asyn", "4-41"), ("asyn", "4-40"),
+                          ("motor", "7-0")})
+
+    def test_only_modified_release_files_read(self):
+        self.add_release(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0",
+                         ("asyn", "4-41"))
+        self.refresh()
+        path = prod_index.release_file(self.ioc_dir, "BL01I/BL01I-EA-IOC-01",
+                                       "1-0")
+        st = os.stat(path)
+
+        self.write_release(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0",
+                           ("asyn", "4-42"))
+        os.utime(path, (st.st_atime, st.st_mtime))
+        self.refresh()
+
+        self.assertEqual(self.index.referenced(self.support_dir),
+                         {("asyn", "4-41")})
+
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.refresh()
+
+        self.assertEqual(self.index.referenced(self.support_dir),
+                         {("asyn", "4-42")})
+
+    def test_removed_release_forgotten(self):
+        self.add_release(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0",
+                         ("asyn", "4-41"))
+        self.refresh()
+
+        shutil.rmtree(os.path.join(self.ioc_dir, "BL01I/BL01I-EA-IOC-01",
+                                   "1-0"))
+        path = os.path.join(self.ioc_dir, "BL01I/BL01I-EA-IOC-01")
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.refresh()
+
+        self.assertEqual(self.index.dependents(self.support_dir, "asyn"), [])
+
+    def test_refresh_dependents_uses_prod_areas(self):
+        self.add_release(self.support_dir, "motor", "7-0", ("asyn", "4-41"))
+        self.add_release(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0",
+                         ("motor", "7-0"))
+        env = environment()
+        env.prodArea = lambda area: os.path.join(self.prod_dir, area)
+
+        dep_dir = prod_index.refresh_dependents(self.index, env)
+
+        self.assertEqual(dep_dir, self.support_dir)
+        self.assertEqual(
+            self.index.dependents(dep_dir, "motor"),
+            [(self.ioc_dir, "BL01I/BL01I-EA-IOC-01", "1-0", "7-0")])
+        self.assertEqual(
+            self.index.dependents(dep_dir, "asyn"),
+            [(self.support_dir, "motor", "7-0", "4-41")])
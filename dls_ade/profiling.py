@@ -0,0 +1,283 @@
+"""
+Timing of the phases of a command, for the --profile option of the dls-*
+scripts.
+
+Code marks a phase with a span::
+
+    with profiling.span("git clone"):
+        ...
+
+    @profiling.timed("ldap")
+    def lookup_contact_details(fed_id):
+        ...
+
+Profiling is off unless :func:`enable` is called, as --profile does, and a
+span then costs one check of a flag. When it is on, the git commands run by
+GitPython and the python-gitlab API calls are timed as well, and at exit a
+summary table is written to stderr and the total time of each phase is logged
+with GELF extra fields profile_<phase>, e.g. profile_git_clone, which Graylog
+can search and plot.
+
+Spans can nest and can run in several threads at once, so the times of the
+phases need not add up to the time of the command.
+"""
+
+import re
+import sys
+import time
+import atexit
+import logging
+import argparse
+import functools
+import threading
+
+log = logging.getLogger(__name__)
+
+# Wall clock with the best resolution, time.perf_counter is not in Python 2
+_clock = getattr(time, "perf_counter", time.time)
+
+_enabled = False
+_started = None
+# (phase, seconds) of each finished span
+_durations = []
+_lock = threading.Lock()
+# (class, attribute, original) of the library methods timed while enabled
+_instrumented = []
+
+
+class _Span(object):
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, _clock() - self.start)
+        return False
+
+
+class _NullSpan(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def is_enabled():
+    """Return whether spans are being recorded."""
+    return _enabled
+
+
+def span(name):
+    """
+    Return a context manager which records the time spent in it, if
+    profiling is enabled.
+
+    Args:
+        name(str): Phase name, e.g. git clone
+
+    Returns:
+        Context manager
+
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name):
+    """
+    Decorator recording the time spent in each call of a function, if
+    profiling is enabled.
+
+    Args:
+        name(str): Phase name, e.g. ldap
+
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, duration):
+    """Record the time a phase took, in seconds."""
+    with _lock:
+        _durations.append((name, duration))
+
+
+def _git_command_name(command):
+    # e.g. ['git', 'ls-remote', url] gives git ls-remote
+    if isinstance(command, (list, tuple)) and len(command) > 1:
+        return "git " + str(command[1])
+    return "git"
+
+
+def _instrument(cls, attribute, get_name):
+    original = getattr(cls, attribute)
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        with _Span(get_name(*args)):
+            return original(self, *args, **kwargs)
+
+    setattr(cls, attribute, wrapper)
+    _instrumented.append((cls, attribute, original))
+
+
+def _instrument_libraries():
+    """Time the git commands run by GitPython and the python-gitlab API
+    calls, which happen deep inside those libraries."""
+    try:
+        import git
+        _instrument(git.cmd.Git, "execute",
+                    lambda command=None, *args: _git_command_name(command))
+    except ImportError:
+        pass
+    try:
+        import gitlab
+        _instrument(gitlab.Gitlab, "http_request", lambda *args: "gitlab api")
+    except (ImportError, AttributeError):
+        pass
+
+
+def enable(report_at_exit=True):
+    """
+    Start recording spans.
+
+    Args:
+        report_at_exit(bool): Report the phases with :func:`report` when the
+            interpreter exits
+
+    """
+    global _enabled, _started
+    if _enabled:
+        return
+    _enabled = True
+    _started = _clock()
+    _instrument_libraries()
+    if report_at_exit:
+        atexit.register(report)
+
+
+def disable():
+    """Stop recording spans and forget the ones recorded."""
+    global _enabled, _started
+    _enabled = False
+    _started = None
+    while _instrumented:
+        cls, attribute, original = _instrumented.pop()
+        setattr(cls, attribute, original)
+    with _lock:
+        del _durations[:]
+
+
+def summary():
+    """
+    Return the time spent in each phase.
+
+    Returns:
+        list of tuple(str, int, float, float): Phase, number of spans, total
+            and longest time in seconds, slowest phase first
+
+    """
+    phases = {}
+    with _lock:
+        durations = list(_durations)
+    for name, duration in durations:
+        count, total, longest = phases.get(name, (0, 0.0, 0.0))
+        phases[name] = (count + 1, total + duration, max(longest, duration))
+    return sorted(((name,) + phase for name, phase in phases.items()),
+                  key=lambda phase: (-phase[2], phase[0]))
+
+
+def format_summary(phases, elapsed):
+    """
+    Format the phases from :func:`summary` as a table.
+
+    Args:
+        phases(list of tuple): From :func:`summary`
+        elapsed(float): Time the command took in seconds
+
+    Returns:
+        str: Table with a row per phase
+
+    """
+    width = max([len("Phase")] + [len(phase[0]) for phase in phases])
+    row = "{:<%d}  {:>5}  {:>9}  {:>9}" % width
+    lines = [row.format("Phase", "Calls", "Total/s", "Max/s")]
+    for name, count, total, longest in phases:
+        lines.append(row.format(name, count, "{:.3f}".format(total),
+                                "{:.3f}".format(longest)))
+    lines.append(row.format("command", "", "{:.3f}".format(elapsed), ""))
+    return "\n".join(lines)
+
+
+def gelf_fields(phases, elapsed):
+    """
+    Return the total time of each phase as GELF extra fields.
+
+    Args:
+        phases(list of tuple): From :func:`summary`
+        elapsed(float): Time the command took in seconds
+
+    Returns:
+        dict: e.g. {"profile_git_clone": 1.2, "profile_command": 3.4}
+
+    """
+    fields = {"profile_command": round(elapsed, 3)}
+    for name, _, total, _ in phases:
+        fields["profile_" + re.sub(r"\W+", "_", name).strip("_")] = \
+            round(total, 3)
+    return fields
+
+
+def report(stream=None):
+    """Write the summary table to stderr and log the phase times, with GELF
+    extra fields through the logconfig handlers."""
+    if not _enabled:
+        return
+    elapsed = _clock() - _started
+    phases = summary()
+    stream = stream or sys.stderr
+    stream.write(format_summary(phases, elapsed) + "\n")
+    log.info("Profile of %s: %.3fs", " ".join(sys.argv), elapsed,
+             extra=gelf_fields(phases, elapsed))
+
+
+class ProfileAction(argparse.Action):
+    """Argument action enabling profiling as soon as the option is parsed,
+    so that no changes are needed in the scripts' main functions."""
+
+    def __init__(self, option_strings, dest, default=False, help=None):
+        super(ProfileAction, self).__init__(option_strings, dest, nargs=0,
+                                            default=default, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, True)
+        enable()
+
+
+def add_profile_arg(parser):
+    """Add the --profile option to an argument parser."""
+    parser.add_argument(
+        "--profile", action=ProfileAction, dest="profile",
+        help="Print how long each phase (git, GitLab, LDAP...) took at exit")
@@ -0,0 +1,159 @@
+import argparse
+import unittest
+
+import git
+from mock import patch
+from six import StringIO
+
+from dls_ade import profiling
+
+
+class ProfilingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        profiling.disable()
+        self.addCleanup(profiling.disable)
+
+
+class SpanTest(ProfilingTestCase):
+
+    def test_given_disabled_then_nothing_recorded(self):
+        with profiling.span("phase"):
+            pass
+
+        self.assertEqual(profiling.summary(), [])
+
+    def test_given_enabled_then_span_recorded(self):
+        profiling.enable(report_at_exit=False)
+
+        with profiling.span("phase"):
+            pass
+        with profiling.span("phase"):
+            pass
+
+        [(name, count, total, longest)] = profiling.summary()
+        self.assertEqual((name, count), ("phase", 2))
+        self.assertGreaterEqual(total, longest)
+
+    def test_given_exception_then_span_recorded_and_exception_raised(self):
+        profiling.enable(report_at_exit=False)
+
+        with self.assertRaises(ValueError):
+            with profiling.span("phase"):
+                raise ValueError()
+
+        self.assertEqual(profiling.summary()[0][:2], ("phase", 1))
+
+
+class TimedTest(ProfilingTestCase):
+
+    def setUp(self):
+        super(TimedTest, self).setUp()
+
+        @profiling.timed("function")
+        def function(value, increment=1):
+            return value + increment
+
+        self.function = function
+
+    def test_given_disabled_then_result_returned_and_nothing_recorded(self):
+        self.assertEqual(self.function(1, increment=2), 3)
+        self.assertEqual(profiling.summary(), [])
+
+    def test_given_enabled_then_result_returned_and_call_recorded(self):
+        profiling.enable(report_at_exit=False)
+
+        self.assertEqual(self.function(1, increment=2), 3)
+        self.assertEqual(profiling.summary()[0][:2], ("function", 1))
+
+
+class InstrumentLibrariesTest(ProfilingTestCase):
+
+    def test_given_enabled_then_git_commands_recorded(self):
+        profiling.enable(report_at_exit=False)
+
+        git.cmd.Git().execute(["git", "--version"])
+
+        self.assertEqual(profiling.summary()[0][:2], ("git --version", 1))
+
+    def test_given_disabled_then_git_restored(self):
+        execute = git.cmd.Git.execute
+        profiling.enable(report_at_exit=False)
+
+        profiling.disable()
+
+        self.assertEqual(git.cmd.Git.execute, execute)
+
+
+class SummaryTest(ProfilingTestCase):
+
+    def setUp(self):
+        super(SummaryTest, self).setUp()
+        profiling.record("git clone", 1.5)
+        profiling.record("ldap", 0.25)
+        profiling.record("git clone", 0.5)
+
+    def test_phases_totalled_slowest_first(self):
+        self.assertEqual(profiling.summary(),
+                         [("git clone", 2, 2.0, 1.5), ("ldap", 1, 0.25, 0.25)])
+
+    def test_format_summary(self):
+        self.assertEqual(
+            profiling.format_summary(profiling.summary(), 3.0),
+            "Phase      Calls    Total/s      Max/s\n"
+            "git clone      2      2.000      1.500\n"
+            "ldap           1      0.250      0.250\n"
+            "command               3.000           ")
+
+    def test_gelf_fields(self):
+        self.assertEqual(profiling.gelf_fields(profiling.summary(), 3.0),
+                         {"profile_command": 3.0,
+                          "profile_git_clone": 2.0,
+                          "profile_ldap": 0.25})
+
+    @patch('dls_ade.profiling.log')
+    def test_given_enabled_then_report_writes_table_and_logs_fields(
+            self, mock_log):
+        profiling.enable(report_at_exit=False)
+        stream = StringIO()
+
+        profiling.report(stream)
+
+        self.assertIn("ldap", stream.getvalue())
+        fields = mock_log.info.call_args[1]["extra"]
+        self.assertEqual(fields["profile_ldap"], 0.25)
+        self.assertIn("profile_command", fields)
+
+    @patch('dls_ade.profiling.log')
+    def test_given_disabled_then_report_does_nothing(self, mock_log):
+        stream = StringIO()
+
+        profiling.report(stream)
+
+        self.assertEqual(stream.getvalue(), "")
+        self.assertFalse(mock_log.info.called)
+
+
+class ProfileArgTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = argparse.ArgumentParser()
+        profiling.add_profile_arg(self.parser)
+
+    @patch('dls_ade.profiling.enable')
+    def test_given_profile_then_enabled(self, mock_enable):
+        args = self.parser.parse_args(["--profile"])
+
+        self.assertTrue(args.profile)
+        mock_enable.assert_called_once_with()
+
+    @patch('dls_ade.profiling.enable')
+    def test_given_no_profile_then_not_enabled(self, mock_enable):
+        args = self.parser.parse_args([])
+
+        self.assertFalse(args.profile)
+        self.assertFalse(mock_enable.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+from mock import patch
+
+import dls_ade
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that are slow to import and must only be imported when used
+LAZY_MODULES = ["gitlab", "requests", "ldap", "packaging", "cookiecutter"]
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_given_module_not_imported_then_imported_on_first_use(self):
+        with patch.dict(sys.modules):
+            sys.modules.pop("json", None)
+            json = dls_ade.lazy_import("json")
+
+            self.assertNotIn("json", sys.modules)
+            self.assertEqual(json.dumps([1]), "[1]")
+            self.assertIn("json", sys.modules)
+
+    def test_given_module_imported_then_module_returned(self):
+        self.assertIs(dls_ade.lazy_import("os"), os)
+
+    def test_given_attribute_patched_then_patch_used(self):
+        module = dls_ade.LazyModule("json")
+
+        with patch.object(module, "dumps", return_value="patched"):
+            self.assertEqual(module.dumps([1]), "patched")
+
+        self.assertEqual(module.dumps([1]), "[1]")
+
+
+class EntryPointImportsTest(unittest.TestCase):
+
+    def test_entry_points_do_not_import_lazy_modules(self):
+        with open(os.path.join(TOP, "setup.py")) as f:
+            modules = re.findall(r"=\s*(dls_ade\.\w+):main", f.read())
+        self.assertTrue(modules)
+        script = ("import sys\n" +
+                  "".join("import {}\n".format(m) for m in modules) +
+                  "print(' '.join(m for m in {!r} if m in sys.modules))"
+                  .format(LAZY_MODULES))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [TOP] + [p for p in [env.get("PYTHONPATH")] if p])
+
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         env=env)
+
+        self.assertEqual(output.decode().strip(), "")
@@ -579,7 +579,7 @@ class Git(BaseVCS):
         self.push_to_remote(remote, tag)
 
     def add_new_remote_and_push(self, dest, remote_name="gitlab",
-                                branch_name="master"):
+                                branch_name="master", create_remote=True):
         """
         Adds a remote to a git repository, and pushes to the server.
 
@@ -599,6 +599,8 @@ class Git(BaseVCS):
             remote_name(str): The git repository's alias for the destination
             path.
             branch_name(str): The name of the branch to push from / to.
+            create_remote(bool): Create the repository on the server first.
+                False if it has been created already, e.g. by a batch.
 
         Raises:
             :class:`~dls_ade.exceptions.VCSGitError`: If there is an issue with
@@ -618,7 +620,8 @@ class Git(BaseVCS):
                            "remote {remote:s} is already defined")
             raise VCSGitError(err_message.format(remote=remote_name))
 
-        self.parent.create_remote_repo(dest)
+        if create_remote:
+            self.parent.create_remote_repo(dest)
         remote_url = os.path.join(self.parent.url, dest)
         usermsg.info("Adding remote to repo. {name}: {url}".format(name=dest, url=remote_url))
         remote = repo.create_remote(remote_name, remote_url)
@@ -340,6 +340,25 @@ class AddNewRemoteAndPushTest(unittest.TestCase):
             "gitlab", "test@url.ac.uk/test_destination")
         mock_remote.push.assert_called_once_with("master")
 
+    def test_given_create_remote_false_then_remote_repo_not_created(self):
+
+        mock_remote = MagicMock()
+        mock_create_remote = MagicMock()
+
+        self.mock_is_local_repo_root.return_value = True
+        branches_list = [self.BranchEntry("master")]
+        mock_repo = self.StubGitRepo(branches_list, [], mock_remote, mock_create_remote)
+
+        server_mock = MagicMock()
+        server_mock.url = "test@url.ac.uk"
+        git_inst = vcs_git.Git("test_module", "area", server_mock)
+        git_inst.repo = mock_repo
+
+        git_inst.add_new_remote_and_push("test_destination", create_remote=False)
+
+        server_mock.create_remote_repo.assert_not_called()
+        mock_remote.push.assert_called_once_with("master")
+
 
 class PushToRemoteTest(unittest.TestCase):
 
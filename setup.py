@@ -64,7 +64,8 @@ setup(
     package_data={"dls_ade": additional_files},
     # define console_scripts
     entry_points={'console_scripts':
-                  ['dls-changes-since-release.py = dls_ade.dls_changes_since_release:main',
+                  ['dls-archive-releases.py = dls_ade.dls_archive_releases:main',
+                   'dls-changes-since-release.py = dls_ade.dls_changes_since_release:main',
                    'dls-checkout-module.py = dls_ade.dls_checkout_module:main',
                    'dls-last-release.py = dls_ade.dls_last_release:main',
                    'dls-list-branches.py = dls_ade.dls_list_branches:main',
@@ -72,7 +73,10 @@ setup(
                    'dls-list-releases.py = dls_ade.dls_list_releases:main',
                    'dls-logs-since-release.py = dls_ade.dls_logs_since_release:main',
                    'dls-module-contacts.py = dls_ade.dls_module_contacts:main',
+                   'dls-module-dependencies.py = dls_ade.dls_module_dependencies:main',
+                   'dls-queue-status.py = dls_ade.dls_queue_status:main',
                    'dls-release.py = dls_ade.dls_release:main',
+                   'dls-release-history.py = dls_ade.dls_release_history:main',
                    'dls-start-new-module.py = dls_ade.dls_start_new_module:main',
                    'dls-tar-module.py = dls_ade.dls_tar_module:main',
                    'dls-gitlab-ci-validate.py = dls_ade.dls_gitlab_ci_validate:main']},
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Build dls_ade and its dependencies into a single zipapp, with bytecode
+already compiled, and a launcher for each dls-* script.
+
+Run from the top of the repository with the interpreter the scripts will run
+under, as the bytecode is specific to its version:
+
+    python3 tools/build_zipapp.py [--output DIR] [--find-links DIR]
+
+The output directory is laid out as::
+
+    bin/dls-*.py        one launcher per console script in setup.py
+    lib/dls_ade.pyz     dls_ade and its pure-Python dependencies
+    lib/<package>/      dependencies that cannot be imported from a zip
+                        (extension modules, e.g. python-ldap, and certifi)
+    data/               module_templates and dlsbuild_scripts of dls_ade
+
+Importing from one zip needs a single open and read of its index rather than
+a stat of every directory on sys.path for each module, which is what makes
+startup slow over NFS. The zipapp can also be run directly, with the script
+as its first argument:
+
+    python3 lib/dls_ade.pyz dls-list-modules.py --help
+
+Requires Python 3.5 or later.
+"""
+
+import os
+import re
+import sys
+import shutil
+import zipapp
+import argparse
+import tempfile
+import compileall
+import subprocess
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 'dls-list-releases.py = dls_ade.dls_list_releases:main' in setup.py
+ENTRY_POINT_RE = re.compile(r"'([\w.-]+)\s*=\s*([\w.]+):(\w+)'")
+
+ARCHIVE_NAME = "dls_ade.pyz"
+# Folders of the dls_ade package that are opened as files at run time
+DATA_FOLDERS = ("module_templates", "dlsbuild_scripts")
+# Pure-Python packages that open their own files by path
+UNZIPPED_PACKAGES = ("certifi",)
+EXTENSION_SUFFIXES = (".so", ".pyd")
+
+MAIN_TEMPLATE = '''\
+import os
+import sys
+
+ENTRY_POINTS = {entry_points!r}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ENTRY_POINTS:
+        sys.stderr.write("Usage: {{}} <script> [args...]\\nScripts: {{}}\\n"
+                         .format(sys.argv[0], ", ".join(sorted(ENTRY_POINTS))))
+        return 2
+    lib = os.path.dirname(os.path.realpath(sys.argv[0]))
+    sys.path.insert(1, lib)
+    import dls_ade
+    dls_ade.DATA_DIR = os.path.join(os.path.dirname(lib), "data")
+    module, function = ENTRY_POINTS[sys.argv[1]]
+    del sys.argv[0]
+    return getattr(__import__(module, fromlist=[function]), function)()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+'''
+
+LAUNCHER_TEMPLATE = '''\
+#!{python} -s
+import os
+import sys
+
+_top = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path[:0] = [os.path.join(_top, "lib", "{archive}"),
+                os.path.join(_top, "lib")]
+
+import dls_ade
+dls_ade.DATA_DIR = os.path.join(_top, "data")
+
+from {module} import {function}
+
+if __name__ == "__main__":
+    sys.exit({function}())
+'''
+
+
+def entry_points(setup_path=os.path.join(TOP, "setup.py")):
+    """Return (script, module, function) for each console script in
+    setup.py."""
+    with open(setup_path) as f:
+        return ENTRY_POINT_RE.findall(f.read())
+
+
+def install(stage, find_links=None, no_deps=False):
+    """Install dls_ade and its dependencies into the stage directory, without
+    compiling them."""
+    command = [sys.executable, "-m", "pip", "install", "--quiet",
+               "--no-compile", "--target", stage]
+    if find_links:
+        command += ["--no-index", "--find-links", find_links]
+    if no_deps:
+        command.append("--no-deps")
+    command.append(TOP)
+    subprocess.check_call(command)
+
+
+def _has_extension(path):
+    for _, _, files in os.walk(path):
+        if any(f.endswith(EXTENSION_SUFFIXES) for f in files):
+            return True
+    return False
+
+
+def split_stage(stage, lib, data):
+    """Move what cannot be imported or opened from inside a zip out of the
+    stage directory: the data folders of dls_ade to data, and dependencies
+    with extension modules to lib.
+
+    Returns:
+        list of str: Names moved to lib
+    """
+    for folder in DATA_FOLDERS:
+        path = os.path.join(stage, "dls_ade", folder)
+        if os.path.isdir(path):
+            shutil.move(path, os.path.join(data, folder))
+
+    moved = []
+    for name in sorted(os.listdir(stage)):
+        path = os.path.join(stage, name)
+        if name in ("dls_ade", "bin") or name.endswith(".dist-info"):
+            continue
+        if (name in UNZIPPED_PACKAGES or name.endswith(".libs") or
+                name.endswith(EXTENSION_SUFFIXES) or
+                os.path.isdir(path) and _has_extension(path)):
+            shutil.move(path, os.path.join(lib, name))
+            moved.append(name)
+    return moved
+
+
+def remove_tests(stage):
+    """Remove the unit tests of dls_ade, which are not needed to run it."""
+    folder = os.path.join(stage, "dls_ade")
+    for name in os.listdir(folder):
+        if name.endswith("_test.py"):
+            os.remove(os.path.join(folder, name))
+
+
+def compile_stage(stage):
+    """Compile every module to a .pyc beside its source, the only layout
+    zipimport reads bytecode from."""
+    if not compileall.compile_dir(stage, quiet=1, legacy=True):
+        raise RuntimeError("Compiling {} failed".format(stage))
+    for dir_path, dir_names, _ in os.walk(stage):
+        if "__pycache__" in dir_names:
+            dir_names.remove("__pycache__")
+            shutil.rmtree(os.path.join(dir_path, "__pycache__"))
+
+
+def write_launchers(bin_dir, scripts, python):
+    for script, module, function in scripts:
+        path = os.path.join(bin_dir, script)
+        with open(path, "w") as f:
+            f.write(LAUNCHER_TEMPLATE.format(python=python,
+                                             archive=ARCHIVE_NAME,
+                                             module=module,
+                                             function=function))
+        os.chmod(path, 0o755)
+
+
+def build(output, find_links=None, no_deps=False, python=sys.executable):
+    scripts = entry_points()
+    bin_dir, lib, data = [os.path.join(output, d)
+                          for d in ("bin", "lib", "data")]
+    for path in (bin_dir, lib, data):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+    stage = tempfile.mkdtemp(prefix="dls_ade_zipapp_")
+    try:
+        install(stage, find_links, no_deps)
+        shutil.rmtree(os.path.join(stage, "bin"), ignore_errors=True)
+        moved = split_stage(stage, lib, data)
+        remove_tests(stage)
+        with open(os.path.join(stage, "__main__.py"), "w") as f:
+            f.write(MAIN_TEMPLATE.format(entry_points={
+                script: (module, function)
+                for script, module, function in scripts}))
+        compile_stage(stage)
+        archive = os.path.join(lib, ARCHIVE_NAME)
+        # Stored rather than deflated, so that imports do not decompress
+        zipapp.create_archive(stage, archive, interpreter=python)
+    finally:
+        shutil.rmtree(stage)
+
+    write_launchers(bin_dir, scripts, python)
+    return archive, moved
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=os.path.join(TOP, "zipapp"),
+                        help="Output directory, default %(default)s")
+    parser.add_argument("--find-links",
+                        help="Install dependencies only from this directory "
+                             "of wheels and source archives")
+    parser.add_argument("--no-deps", action="store_true",
+                        help="Package dls_ade only, for dependencies "
+                             "installed elsewhere on sys.path")
+    parser.add_argument("--python", default=sys.executable,
+                        help="Interpreter of the launchers, default "
+                             "%(default)s. Must be the same version as the "
+                             "one building the zipapp.")
+    return parser
+
+
+def main():
+    args = make_parser().parse_args()
+    archive, moved = build(os.path.abspath(args.output), args.find_links,
+                           args.no_deps, args.python)
+    print("Built {} ({:.1f} MB)".format(
+        archive, os.path.getsize(archive) / 1e6))
+    if moved:
+        print("Outside the zip: {}".format(", ".join(moved)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())